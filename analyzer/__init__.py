@@ -1,3 +1,5 @@
-from .project_analyzer import ProjectAnalyzer
+from .project_analyzer import CONTEXT_STAGES, DETAIL_STAGES, ProjectAnalyzer
+from .module_skeleton import SkeletonExtractor, extract_skeleton
+from .import_graph import ImportGraph
 
-__all__ = ['ProjectAnalyzer'] 
\ No newline at end of file
+__all__ = ['ProjectAnalyzer', 'CONTEXT_STAGES', 'DETAIL_STAGES', 'SkeletonExtractor', 'extract_skeleton', 'ImportGraph']
@@ -0,0 +1,270 @@
+import ast
+import math
+import os
+import re
+import sys
+import sysconfig
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Import names whose distribution name differs, used when matching against declared requirements
+KNOWN_IMPORT_ALIASES = {
+    "dotenv": "python-dotenv",
+    "yaml": "pyyaml",
+    "cv2": "opencv-python",
+    "PIL": "pillow",
+    "sklearn": "scikit-learn",
+    "bs4": "beautifulsoup4",
+    "jwt": "pyjwt",
+    "dateutil": "python-dateutil",
+    "google": "protobuf",
+    "attr": "attrs",
+    "magic": "python-magic",
+    "serial": "pyserial",
+    "Crypto": "pycryptodome",
+}
+
+_REQUIREMENT_NAME = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)')
+# Import statements at the start of a line, including parenthesised and backslash-continued ones
+_IMPORT_STATEMENT = re.compile(
+    r'^[ \t]*(from[ \t]+[\w.]+[ \t]+import[ \t]*(?:\([^)]*\)|(?:[^\n#;\\]|\\\n)*)|import[ \t]+(?:[^\n#;\\]|\\\n)*)',
+    re.MULTILINE
+)
+# Top-level public definitions and the main guard, located the same cheap way as the imports
+_PUBLIC_DEFINITION = re.compile(r'^(?:async[ \t]+def|def|class)[ \t]+[A-Za-z]', re.MULTILINE)
+_MAIN_GUARD = re.compile(r'^if[ \t]+__name__[ \t]*==[ \t]*[\'"]__main__[\'"][ \t]*:', re.MULTILINE)
+
+def _stdlib_modules() -> Set[str]:
+    if hasattr(sys, "stdlib_module_names"):
+        return set(sys.stdlib_module_names)
+    # Python < 3.10: derive the list from the standard library directory
+    names = set(sys.builtin_module_names)
+    stdlib_dir = Path(sysconfig.get_paths()["stdlib"])
+    for entry in stdlib_dir.iterdir():
+        if entry.name == "site-packages":
+            continue
+        names.add(entry.stem if entry.suffix == ".py" else entry.name.split(".")[0])
+    return names
+
+def normalize_distribution(name: str) -> str:
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+def parse_imports(source: str) -> List[Tuple[str, int]]:
+    """Return (module, level) for every import statement; level > 0 marks a relative import.
+
+    Statements are located with a line regex and parsed one by one, which is
+    an order of magnitude cheaper than building the AST of the whole file. The
+    trade-off is that import lines quoted inside docstrings are counted too.
+    """
+    imports = []
+    for match in _IMPORT_STATEMENT.finditer(source):
+        statement = match.group(1).replace("\\\n", " ").strip()
+        try:
+            node = ast.parse(statement).body[0]
+        except (SyntaxError, ValueError, IndexError):
+            continue
+        if isinstance(node, ast.Import):
+            imports.extend((alias.name, 0) for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            if node.module:
+                imports.append((node.module, node.level))
+            else:
+                imports.extend((alias.name, node.level) for alias in node.names)
+    return imports
+
+def parse_file(file_path: str) -> Tuple[List[Tuple[str, int]], int, bool]:
+    """Return the imports, the number of top-level public definitions and whether the file has a main guard."""
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+            source = f.read()
+    except OSError:
+        return [], 0, False
+    return parse_imports(source), len(_PUBLIC_DEFINITION.findall(source)), bool(_MAIN_GUARD.search(source))
+
+def parse_requirements(content: str) -> Set[str]:
+    names = set()
+    for line in content.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if not line or line.startswith("-"):
+            continue
+        match = _REQUIREMENT_NAME.match(line)
+        if match:
+            names.add(normalize_distribution(match.group(1)))
+    return names
+
+def parse_pyproject(content: str) -> Set[str]:
+    try:
+        import tomllib
+    except ImportError:
+        try:
+            import tomli as tomllib
+        except ImportError:
+            logger.debug("tomllib/tomli not available, skipping pyproject.toml dependencies")
+            return set()
+    try:
+        data = tomllib.loads(content)
+    except Exception as e:
+        logger.warning(f"Could not parse pyproject.toml: {e}")
+        return set()
+    requirements = list(data.get("project", {}).get("dependencies", []))
+    for extra in data.get("project", {}).get("optional-dependencies", {}).values():
+        requirements.extend(extra)
+    poetry = data.get("tool", {}).get("poetry", {})
+    requirements.extend(name for name in poetry.get("dependencies", {}) if name.lower() != "python")
+    return parse_requirements("\n".join(requirements))
+
+class ImportGraph:
+    """Deterministic import graph over every Python file of a project.
+
+    Imports are classified as stdlib, third-party or local, local edges are
+    resolved to files, and third-party imports are cross-referenced with the
+    requirements.txt / pyproject.toml declarations.
+    """
+
+    def __init__(self, project_path: Path):
+        self.project_path = Path(project_path)
+        self.module_files: Dict[str, Path] = {}
+        self.local_roots: Set[str] = set()
+        self.edges: Dict[Path, Set[Path]] = {}
+        self.stdlib: Counter = Counter()
+        self.third_party: Counter = Counter()
+        self.local: Counter = Counter()
+        self.declared: Set[str] = set()
+        self.dependency_files: List[str] = []
+        self.public_definitions: Dict[Path, int] = {}
+        self.entry_points: Set[Path] = set()
+
+    def _module_name(self, file: Path) -> str:
+        parts = list(file.relative_to(self.project_path).with_suffix("").parts)
+        if parts and parts[-1] == "__init__":
+            parts = parts[:-1]
+        return ".".join(parts)
+
+    def _resolve(self, file: Path, module: str, level: int) -> Optional[str]:
+        if level:
+            package = self._module_name(file).split(".")
+            if file.name != "__init__.py":
+                package = package[:-1]
+            package = package[:len(package) - (level - 1)] if level > 1 else package
+            return ".".join([part for part in package if part] + ([module] if module else []))
+        return module
+
+    def _local_target(self, module: str) -> Optional[Path]:
+        # Longest prefix that names a project module, so `pkg.mod.func` resolves to pkg/mod.py
+        parts = module.split(".")
+        for end in range(len(parts), 0, -1):
+            target = self.module_files.get(".".join(parts[:end]))
+            if target:
+                return target
+        return None
+
+    def build(self, python_files: List[Path], dependency_files: Iterable[Path] = (),
+              use_process_pool: bool = False) -> "ImportGraph":
+        for file in python_files:
+            module_name = self._module_name(file)
+            if module_name:
+                self.module_files[module_name] = file
+                self.local_roots.add(module_name.split(".")[0])
+        stdlib_names = _stdlib_modules()
+
+        paths = [str(file) for file in python_files]
+        if use_process_pool:
+            with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+                parsed = list(executor.map(parse_file, paths, chunksize=64))
+        else:
+            parsed = [parse_file(path) for path in paths]
+
+        for file, (imports, public_definitions, main_guard) in zip(python_files, parsed):
+            self.public_definitions[file] = public_definitions
+            if main_guard or file.name in config.ENTRY_POINT_NAMES:
+                self.entry_points.add(file)
+            targets = self.edges.setdefault(file, set())
+            for module, level in imports:
+                resolved = self._resolve(file, module, level)
+                if not resolved:
+                    continue
+                root = resolved.split(".")[0]
+                if level or root in self.local_roots:
+                    self.local[resolved] += 1
+                    target = self._local_target(resolved)
+                    if target and target != file:
+                        targets.add(target)
+                elif root in stdlib_names:
+                    self.stdlib[root] += 1
+                else:
+                    self.third_party[root] += 1
+
+        for dependency_file in dependency_files:
+            try:
+                content = dependency_file.read_text(encoding='utf-8', errors='replace')
+            except OSError:
+                continue
+            if dependency_file.name == "pyproject.toml":
+                self.declared |= parse_pyproject(content)
+            else:
+                self.declared |= parse_requirements(content)
+            self.dependency_files.append(dependency_file.relative_to(self.project_path).as_posix())
+        return self
+
+    def fan_in(self) -> Counter:
+        """Number of project files importing each project file."""
+        counts: Counter = Counter()
+        for targets in self.edges.values():
+            counts.update(targets)
+        return counts
+
+    def importance(self, file: Path, size: int, fan_in: Optional[Counter] = None) -> float:
+        """Local estimate of how much a module's description is worth, used to order work under a budget.
+
+        Modules many others import, entry points and modules with a wide public
+        API come first; size only breaks ties between otherwise similar modules.
+        """
+        fan_in = self.fan_in() if fan_in is None else fan_in
+        return (config.IMPORTANCE_FAN_IN_WEIGHT * fan_in[file]
+                + (config.IMPORTANCE_ENTRY_POINT_BONUS if file in self.entry_points else 0.0)
+                + config.IMPORTANCE_PUBLIC_WEIGHT * min(self.public_definitions.get(file, 0),
+                                                        config.IMPORTANCE_PUBLIC_CAP)
+                + config.IMPORTANCE_SIZE_WEIGHT * math.log2(1 + size))
+
+    def _is_declared(self, import_name: str) -> bool:
+        candidates = {normalize_distribution(import_name)}
+        if import_name in KNOWN_IMPORT_ALIASES:
+            candidates.add(KNOWN_IMPORT_ALIASES[import_name])
+        return bool(candidates & self.declared)
+
+    @staticmethod
+    def _most_common(counter: Counter, limit: int) -> List[Tuple]:
+        # Counter.most_common breaks ties by insertion order, which follows parse completion order
+        return sorted(counter.items(), key=lambda item: (-item[1], str(item[0])))[:limit]
+
+    def summary(self, limit: Optional[int] = None) -> str:
+        limit = config.IMPORT_SUMMARY_LIMIT if limit is None else limit
+        lines = [f"File Python dianalisis: {len(self.edges)}"]
+        if self.third_party:
+            third_party = []
+            for name, count in self._most_common(self.third_party, limit):
+                marker = "" if not self.declared or self._is_declared(name) else ", tidak dideklarasikan"
+                third_party.append(f"{name} ({count}x{marker})")
+            lines.append("Library pihak ketiga: " + ", ".join(third_party))
+        if self.stdlib:
+            lines.append("Library standar: " + ", ".join(f"{name} ({count}x)" for name, count in self._most_common(self.stdlib, limit)))
+        if self.dependency_files:
+            lines.append(f"Dependensi terdeklarasi ({', '.join(self.dependency_files)}): " + ", ".join(sorted(self.declared)))
+            imported = {normalize_distribution(name) for name in self.third_party}
+            imported |= {KNOWN_IMPORT_ALIASES[name] for name in self.third_party if name in KNOWN_IMPORT_ALIASES}
+            unused = sorted(self.declared - imported)
+            if unused:
+                lines.append("Dideklarasikan tetapi tidak diimpor: " + ", ".join(unused))
+        if self.local_roots:
+            lines.append("Paket/modul lokal: " + ", ".join(sorted(self.local_roots)[:limit]))
+        fan_in = self.fan_in()
+        if fan_in:
+            most_used = [f"{file.relative_to(self.project_path).as_posix()} ({count})" for file, count in self._most_common(fan_in, limit // 2 or 1)]
+            lines.append("Modul lokal paling banyak diimpor: " + ", ".join(most_used))
+        return "\n".join(lines)
@@ -0,0 +1,117 @@
+import ast
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _unparse(node: ast.AST, source: str) -> str:
+    if hasattr(ast, "unparse"):
+        return ast.unparse(node)
+    return ast.get_source_segment(source, node) or "..."  # Python 3.8
+
+def _docstring(node: ast.AST, max_chars: int) -> Optional[str]:
+    docstring = ast.get_docstring(node)
+    if not docstring:
+        return None
+    # Keep the summary paragraph only
+    docstring = " ".join(docstring.strip().split("\n\n")[0].split())
+    if len(docstring) > max_chars:
+        docstring = docstring[:max_chars].rstrip() + "..."
+    return docstring
+
+def _signature(node, source: str) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    returns = f" -> {_unparse(node.returns, source)}" if node.returns else ""
+    return f"{prefix} {node.name}({_unparse(node.args, source)}){returns}:"
+
+def _skeleton_lines(body: List[ast.stmt], source: str, indent: str, docstring_chars: int) -> List[str]:
+    lines = []
+    for node in body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            lines.append(f"{indent}{_unparse(node, source)}")
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            for decorator in node.decorator_list:
+                lines.append(f"{indent}@{_unparse(decorator, source)}")
+            if isinstance(node, ast.ClassDef):
+                bases = [_unparse(base, source) for base in node.bases + node.keywords]
+                lines.append(f"{indent}class {node.name}({', '.join(bases)}):" if bases else f"{indent}class {node.name}:")
+            else:
+                lines.append(f"{indent}{_signature(node, source)}")
+            docstring = _docstring(node, docstring_chars)
+            if docstring:
+                lines.append(f'{indent}    """{docstring}"""')
+            if isinstance(node, ast.ClassDef):
+                members = _skeleton_lines(node.body, source, indent + "    ", docstring_chars)
+                lines.extend(members or [f"{indent}    ..."])
+            else:
+                lines.append(f"{indent}    ...")
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            names = [_unparse(target, source) for target in targets]
+            annotation = f": {_unparse(node.annotation, source)}" if isinstance(node, ast.AnnAssign) else ""
+            lines.append(f"{indent}{' = '.join(names)}{annotation} = ...")
+        elif isinstance(node, ast.Try):
+            # Optional imports and fallbacks usually live in try/except blocks
+            lines.extend(_skeleton_lines(node.body, source, indent, docstring_chars))
+            for handler in node.handlers:
+                lines.extend(_skeleton_lines(handler.body, source, indent, docstring_chars))
+        elif isinstance(node, ast.If) and not indent and "__main__" in _unparse(node.test, source):
+            lines.append("if __name__ == '__main__': ...")
+    return lines
+
+def extract_skeleton(source: str, docstring_chars: Optional[int] = None,
+                     max_chars: Optional[int] = None) -> Optional[str]:
+    """Compact outline of a module: docstring, imports, signatures, decorators and docstrings.
+
+    Returns None when the source cannot be parsed.
+    """
+    docstring_chars = config.SKELETON_DOCSTRING_CHARS if docstring_chars is None else docstring_chars
+    max_chars = config.SKELETON_MAX_CHARS if max_chars is None else max_chars
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return None
+    lines = []
+    docstring = _docstring(tree, docstring_chars)
+    if docstring:
+        lines.append(f'"""{docstring}"""')
+    lines.extend(_skeleton_lines(tree.body, source, "", docstring_chars))
+    skeleton = "\n".join(lines)
+    if len(skeleton) > max_chars:
+        skeleton = skeleton[:max_chars] + "\n# ... (kerangka dipotong)"
+    return skeleton
+
+class SkeletonExtractor:
+    """Builds module skeletons for sources too large to send in full.
+
+    Parsing is CPU bound, so large repositories parse in a process pool
+    instead of competing for the GIL with the describer threads.
+    """
+
+    def __init__(self, use_process_pool: bool = False, workers: Optional[int] = None):
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count()) if use_process_pool else None
+
+    @property
+    def min_chars(self) -> int:
+        return config.SKELETON_MIN_CHARS or config.MAX_TOKENS_PER_FILE
+
+    def extract(self, module_path: Path, content: str) -> Optional[str]:
+        if len(content) <= self.min_chars:
+            return None
+        try:
+            if self.executor:
+                # Settings are passed along, worker processes may not have loaded the overrides
+                return self.executor.submit(extract_skeleton, content, config.SKELETON_DOCSTRING_CHARS,
+                                            config.SKELETON_MAX_CHARS).result()
+            return extract_skeleton(content)
+        except Exception:
+            logger.warning(f"Could not extract skeleton for {module_path.name}, sending the source instead", exc_info=True)
+            return None
+
+    def close(self) -> None:
+        if self.executor:
+            self.executor.shutdown()
@@ -1,106 +1,195 @@
-from typing import Dict, List, Set, Tuple
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
 from pathlib import Path
-from openai import OpenAI, OpenAIError
 import config
 from scanner.file_scanner import FileScanner
+from transport.errors import api_errors
+from budget.run_budget import BUDGET_FALLBACK_NOTE, BudgetExhausted
+from budget.token_counter import truncate_to_tokens
+from analyzer.import_graph import ImportGraph
+from pipeline.stage_scheduler import StageScheduler
+import hashlib
+import threading
 import logging
 
+if TYPE_CHECKING:
+    from transport.llm_transport import LLMTransport
+
 logger = logging.getLogger(__name__)
 
+# Stages quoted in the describer's project context, and the rest, which only the project description needs
+CONTEXT_STAGES = ("project_purpose", "technologies")
+DETAIL_STAGES = ("project_analysis", "additional_notes")
+
 class ProjectAnalyzer:
-    def __init__(self, file_scanner: FileScanner):
+    def __init__(self, file_scanner: FileScanner, transport: Optional["LLMTransport"] = None,
+                 offline_technologies: bool = False):
         self.file_scanner = file_scanner
+        self.offline_technologies = offline_technologies
+        if transport is None and not offline_technologies:
+            from transport.llm_transport import LLMTransport
+            transport = LLMTransport()
+        self.transport = transport
         self.project_path = file_scanner.project_path
         self.project_name = file_scanner.project_name
-        try:
-            self.client = OpenAI(
-                api_key=config.GROQ_API_KEY,
-                base_url=config.GROQ_API_BASE,
-                default_headers={
-                    "Content-Type": "application/json"
-                }
-            )
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {e}", exc_info=True)
-            raise  # Re-raise the exception to be caught in main
+        self.stage_records: Dict[str, Dict[str, str]] = {}
+        self.import_graph: Optional[ImportGraph] = None
+        # The technologies stage and module ranking may both ask for the graph first
+        self._import_graph_lock = threading.Lock()
 
-    def _call_groq_api(self, prompt: str) -> str:
+    def _call_groq_api(self, prompt: str, stage: str) -> str:
         try:
-            logger.debug(f"Sending prompt to Groq: {prompt[:100]}...") # Log snippet of prompt
-            response = self.client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            content = response.choices[0].message.content.strip()
-            logger.debug(f"Received response from Groq: {content[:100]}...")
-            return content
-        except OpenAIError as e:
+            return self.transport.complete(prompt, stage=stage)
+        except BudgetExhausted:
+            raise # Out of budget is expected; the caller falls back to a local summary
+        except api_errors() as e:
             logger.error(f"Groq API error during analysis call: {e}")
             raise # Re-raise the specific OpenAIError to be handled in main
         except Exception as e:
             logger.exception("Unexpected error during Groq API call")
             raise # Re-raise other exceptions
 
-    def analyze_project(self) -> Dict[str, str]:
-        logger.info("Scanning project files...")
+    def analyze_project(self, previous_stages: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, str]:
+        """Run the analysis stages, reusing results from `previous_stages` whose inputs are unchanged."""
+        self.stage_records = {}
+        return self.analyze_stages(CONTEXT_STAGES + DETAIL_STAGES, previous_stages)
+
+    def analyze_stages(self, names: Tuple[str, ...],
+                       previous_stages: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, str]:
+        """Run the named analysis stages concurrently; the results carry the project name and go into stage_records.
+
+        The pipeline runs CONTEXT_STAGES and DETAIL_STAGES as separate calls,
+        so the describer's project context does not wait for the rest.
+        """
         files, directories = self.file_scanner.scan()
-        logger.info("Analyzing project components...")
-        project_purpose = self._analyze_project_purpose(files["documentation"])
-        technologies = self._analyze_technologies(files["python"])
-        project_analysis = self._analyze_project_structure(directories, files)
-        additional_notes = self._generate_additional_notes(files)
-        logger.info("Project analysis components generated.")
-        return {
-            "project_name": self.project_name,
-            "project_purpose": project_purpose,
-            "technologies": technologies,
-            "project_analysis": project_analysis,
-            "additional_notes": additional_notes
+        logger.info(f"Analyzing project components: {', '.join(names)}")
+        previous_stages = previous_stages or {}
+        structure = self.file_scanner.get_project_structure()
+        counts = [str(len(files[file_type])) for file_type in ("python", "documentation", "config", "other")]
+        stages = {
+            "project_purpose": lambda _: self._purpose_stage(files["documentation"], previous_stages),
+            "technologies": lambda _: self._run_stage(
+                "technologies", self._fingerprint(self.get_import_graph().summary(), str(self.offline_technologies)),
+                previous_stages, lambda: self._analyze_technologies(files["python"]),
+                lambda: self.get_import_graph().summary()
+            ),
+            "project_analysis": lambda _: self._run_stage(
+                "project_analysis", self._fingerprint(structure), previous_stages,
+                lambda: self._analyze_project_structure(directories, files),
+                lambda: truncate_to_tokens(structure, config.LOCAL_SUMMARY_TOKENS)
+            ),
+            "additional_notes": lambda _: self._run_stage(
+                "additional_notes", self._fingerprint(*counts), previous_stages,
+                lambda: self._generate_additional_notes(files),
+                lambda: (f"File Python: {counts[0]}, dokumentasi: {counts[1]}, konfigurasi: {counts[2]}, "
+                         f"lainnya: {counts[3]}.")
+            ),
         }
+        # The stages are independent of each other, so they run concurrently
+        scheduler = StageScheduler()
+        for name in names:
+            scheduler.add(name, stages[name])
+        results = scheduler.run()
+        logger.info("Project analysis components generated.")
+        return {"project_name": self.project_name, **{name: results[name] for name in names}}
+
+    def stages_fingerprint(self, *extra_inputs: str) -> str:
+        """Fingerprint of every stage input, used to decide whether the project description is stale."""
+        return self._fingerprint(*(record["fingerprint"] for _, record in sorted(self.stage_records.items())),
+                                 *extra_inputs)
 
-    def _analyze_project_purpose(self, doc_files: List[Path]) -> str:
+    def _run_stage(self, name: str, fingerprint: str, previous_stages: Dict[str, Dict[str, str]],
+                   run: Callable[[], str], local_result: Callable[[], str]) -> str:
+        previous = previous_stages.get(name)
+        if previous and previous.get("fingerprint") == fingerprint:
+            logger.info(f"Reusing unchanged stage result: {name}")
+            result = previous["result"]
+        else:
+            try:
+                result = run()
+            except BudgetExhausted as e:
+                # Not recorded, so the next run with budget left redoes the stage
+                logger.warning(f"Run budget used up, stage {name} summarized locally: {e}")
+                return f"{BUDGET_FALLBACK_NOTE}\n{local_result()}"
+        self.stage_records[name] = {"fingerprint": fingerprint, "result": result}
+        return result
+
+    def _fingerprint(self, *parts: str) -> str:
+        digest = hashlib.sha256((config.GROQ_MODEL or "").encode('utf-8'))
+        for part in parts:
+            digest.update(b"\0")
+            digest.update(part.encode('utf-8'))
+        return digest.hexdigest()
+
+    def _purpose_stage(self, doc_files: List[Path], previous_stages: Dict[str, Dict[str, str]]) -> str:
+        # Fingerprinted on the text the model reads, so documentation past the token budget is never read or hashed
+        content = self.file_scanner.read_budgeted(doc_files, config.PURPOSE_TOKEN_BUDGET)
+        return self._run_stage("project_purpose", self._fingerprint(content), previous_stages,
+                               lambda: self._analyze_project_purpose(content),
+                               lambda: self._local_project_purpose(doc_files))
+
+    def _analyze_project_purpose(self, content: str) -> str:
         logger.debug("Analyzing project purpose...")
-        if not doc_files:
+        if not content:
             logger.warning("No documentation files found to determine project purpose.")
             return "No documentation found to determine project purpose."
-        content = ""
-        for file in doc_files:
-            content += self.file_scanner.get_file_content(file)
         prompt = f"""
         Analisis dokumentasi proyek berikut dan tentukan tujuan utamanya:
-        {content[:config.MAX_TOKENS_PER_FILE]}
+        {content}
         
         Berikan deskripsi singkat dan profesional tentang tujuan proyek dalam bahasa Indonesia.
         """
-        return self._call_groq_api(prompt)
+        return self._call_groq_api(prompt, "project_purpose")
+
+    def _local_project_purpose(self, doc_files: List[Path]) -> str:
+        if not doc_files:
+            return "No documentation found to determine project purpose."
+        # The README says best what the project is for
+        doc_files = sorted(doc_files, key=lambda file: not file.name.lower().startswith("readme"))
+        return self.file_scanner.read_budgeted(doc_files, config.LOCAL_SUMMARY_TOKENS)
+
+    def invalidate(self, changed_files: Set[Path]) -> None:
+        """Forget the import graph when Python or dependency files changed (watch mode)."""
+        if any(file.suffix in config.PYTHON_EXTENSIONS or file.name in config.DEPENDENCY_FILES
+               or file.name.startswith("requirements") for file in changed_files):
+            self.import_graph = None
+
+    def get_import_graph(self) -> ImportGraph:
+        with self._import_graph_lock:
+            if self.import_graph is None:
+                files, _ = self.file_scanner.scan()
+                dependency_files = [
+                    file for file in files["documentation"] + files["config"]
+                    if file.name in config.DEPENDENCY_FILES or (file.name.startswith("requirements") and file.suffix == ".txt")
+                ]
+                use_process_pool = len(files["python"]) >= config.PROCESS_POOL_MIN_FILES
+                self.import_graph = ImportGraph(self.project_path).build(files["python"], dependency_files, use_process_pool)
+            return self.import_graph
 
     def _analyze_technologies(self, python_files: List[Path]) -> str:
         logger.debug("Analyzing technologies...")
         if not python_files:
             logger.warning("No Python files found to analyze technologies.")
             return "No Python files found to analyze technologies."
-        content = ""
-        files_to_analyze = python_files[:5] # Limit analysis to first 5 files for performance
-        logger.debug(f"Analyzing technologies from files: {[f.name for f in files_to_analyze]}")
-        for file in files_to_analyze:
-            content += f"\n\nFile: {file.name}\n"
-            content += self.file_scanner.get_file_content(file)
+        # The import graph covers every file locally; only its summary goes to the LLM
+        summary = self.get_import_graph().summary()
+        if self.offline_technologies:
+            return summary
         prompt = f"""
-        Analisis kode Python berikut dan identifikasi:
+        Berdasarkan ringkasan import dari seluruh file Python proyek berikut, identifikasi:
         1. Teknologi dan library utama yang digunakan
         2. Framework yang digunakan (jika ada)
         3. Pola arsitektur kunci
         
-        Kode:
-        {content[:config.MAX_TOKENS_PER_FILE]}
+        Ringkasan import:
+        {summary}
         
         Berikan daftar singkat teknologi dan pola yang ditemukan dalam bahasa Indonesia.
         """
-        return self._call_groq_api(prompt)
+        return self._call_groq_api(prompt, "technologies")
 
     def _analyze_project_structure(self, directories: Set[Path], files: Dict[str, List[Path]]) -> str:
         logger.debug("Analyzing project structure...")
-        structure = self.file_scanner.get_project_structure()
+        structure = truncate_to_tokens(self.file_scanner.get_project_structure(), config.STRUCTURE_TOKEN_BUDGET)
         prompt = f"""
         Analisis struktur proyek berikut dan berikan wawasan tentang:
         1. Arsitektur keseluruhan
@@ -112,7 +201,7 @@ class ProjectAnalyzer:
         
         Berikan analisis profesional tentang struktur proyek dalam bahasa Indonesia.
         """
-        return self._call_groq_api(prompt)
+        return self._call_groq_api(prompt, "project_analysis")
 
     def _generate_additional_notes(self, files: Dict[str, List[Path]]) -> str:
         logger.debug("Generating additional notes...")
@@ -125,4 +214,4 @@ class ProjectAnalyzer:
         
         Berikan observasi atau rekomendasi tambahan tentang proyek dalam bahasa Indonesia.
         """
-        return self._call_groq_api(prompt) 
\ No newline at end of file
+        return self._call_groq_api(prompt, "additional_notes") 
\ No newline at end of file
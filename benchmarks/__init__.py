@@ -0,0 +1,4 @@
+from .fake_server import FakeChatServer
+from .project_generator import generate_project
+
+__all__ = ['FakeChatServer', 'generate_project']
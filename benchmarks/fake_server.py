@@ -0,0 +1,142 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+import json
+import random
+import re
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FakeChatServer:
+    """Local stand-in for an OpenAI-compatible chat-completions endpoint.
+
+    Answers every request after `latency` (+/- `jitter`) seconds plus the time
+    needed to "generate" the answer at `tokens_per_second`. Every
+    `rate_limit_every`-th request is rejected with a 429 and a Retry-After
+    header. Batched JSON prompts get a JSON object keyed by their module paths.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.2, jitter: float = 0.05,
+                 rate_limit_every: int = 0, retry_after: float = 1.0, tokens_per_second: float = 0,
+                 answer_tokens: int = 120, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.rate_limit_every = rate_limit_every
+        self.retry_after = retry_after
+        self.tokens_per_second = tokens_per_second
+        self.answer_tokens = answer_tokens
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeChatServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-chat-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Fake chat server listening on {self.base_url}")
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "rate_limited": self.rate_limited,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+    def _next_request(self, prompt_tokens: int) -> tuple:
+        with self._lock:
+            self.requests += 1
+            throttle = bool(self.rate_limit_every) and self.requests % self.rate_limit_every == 0
+            if throttle:
+                self.rate_limited += 1
+            else:
+                self.prompt_tokens += prompt_tokens
+            delay = max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+            return self.requests, throttle, delay
+
+    def _answer(self, number: int, prompt: str) -> str:
+        if "objek JSON" in prompt:
+            return json.dumps({path: f"Deskripsi sintetis untuk {path}." for path in re.findall(r'### (\S+)', prompt)})
+        filler = " ".join(["kata"] * self.answer_tokens)
+        return f"<think>analisis</think>Deskripsi sintetis #{number}. {filler}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+                prompt = "".join(message.get("content") or "" for message in body.get("messages", []))
+                number, throttle, delay = server._next_request(len(prompt) // 4)
+                time.sleep(delay)
+                if throttle:
+                    self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                                    {"retry-after": f"{server.retry_after:g}"})
+                    return
+                text = server._answer(number, prompt)
+                completion_tokens = max(1, len(text) // 4)
+                with server._lock:
+                    server.completion_tokens += completion_tokens
+                generation_time = completion_tokens / server.tokens_per_second if server.tokens_per_second else 0.0
+                if body.get("stream"):
+                    self._stream(body["model"], text, generation_time)
+                    return
+                time.sleep(generation_time)
+                self._send_json(200, {
+                    "id": f"chatcmpl-{number}", "object": "chat.completion", "created": int(time.time()),
+                    "model": body["model"],
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": completion_tokens,
+                              "total_tokens": len(prompt) // 4 + completion_tokens},
+                })
+
+            def _send_json(self, status: int, payload: dict, headers: Optional[dict] = None) -> None:
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _stream(self, model: str, text: str, generation_time: float) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                pieces = [text[i:i + 16] for i in range(0, len(text), 16)]
+                for piece in pieces:
+                    chunk = {"id": "chatcmpl-stream", "object": "chat.completion.chunk", "created": int(time.time()),
+                             "model": model,
+                             "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+                    self.wfile.write(b"data: " + json.dumps(chunk).encode("utf-8") + b"\n\n")
+                    self.wfile.flush()
+                    time.sleep(generation_time / len(pieces))
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        return Handler
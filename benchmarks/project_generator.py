@@ -0,0 +1,67 @@
+from pathlib import Path
+import random
+
+_MODULE_TEMPLATE = '''"""Synthetic module {name} used by the benchmark suite."""
+import os
+import json
+{imports}
+
+CONSTANT_{index} = {index}
+
+{body}
+'''
+
+_CLASS_TEMPLATE = '''class Component{index}_{number}:
+    """Component {number} of module {index}."""
+
+    def __init__(self, value: int = {number}):
+        self.value = value
+
+    def compute(self, factor: int) -> int:
+        total = 0
+        for step in range(factor):
+            total += (self.value * step) % {modulus}
+        return total
+
+    def describe(self) -> str:
+        return json.dumps({{"component": {number}, "value": self.value, "cwd": os.getcwd()}})
+
+'''
+
+def generate_project(root: Path, num_files: int, files_per_directory: int = 20, seed: int = 0) -> Path:
+    """Write a synthetic Python project with `num_files` modules below `root`.
+
+    Modules are spread over a directory tree with `files_per_directory`
+    modules per package, import a few earlier modules, and vary in size so
+    both the batching and the skeleton paths get exercised.
+    """
+    rng = random.Random(seed)
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "README.md").write_text(f"# Proyek sintetis\n\nProyek benchmark dengan {num_files} modul.\n", encoding="utf-8")
+    (root / "requirements.txt").write_text("requests>=2.0\nnumpy>=1.20\n", encoding="utf-8")
+    modules = []
+    for index in range(num_files):
+        # Nested layout: pkg_3/pkg_3_1/... so directories get subdirectories too
+        directory_index = index // files_per_directory
+        parts = []
+        while True:
+            parts.append(directory_index % files_per_directory)
+            directory_index //= files_per_directory
+            if not directory_index:
+                break
+        package = root.joinpath(*(f"pkg_{part}" for part in reversed(parts)))
+        if not package.exists():
+            package.mkdir(parents=True)
+            (package / "__init__.py").write_text("", encoding="utf-8")
+        name = f"module_{index}"
+        imports = "\n".join(f"from {modules[other]} import CONSTANT_{other}"
+                            for other in rng.sample(range(len(modules)), min(3, len(modules))))
+        # Mostly small modules, with a tail of large ones
+        classes = rng.choice([1, 1, 1, 2, 3, 5, 20])
+        body = "".join(_CLASS_TEMPLATE.format(index=index, number=number, modulus=rng.randint(3, 97))
+                       for number in range(classes))
+        (package / f"{name}.py").write_text(
+            _MODULE_TEMPLATE.format(name=name, index=index, imports=imports, body=body), encoding="utf-8"
+        )
+        modules.append(".".join(package.relative_to(root).parts + (name,)))
+    return root
@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from benchmarks.fake_server import FakeChatServer
+from benchmarks.project_generator import generate_project
+import logging
+
+logger = logging.getLogger(__name__)
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+MAIN_SCRIPT = REPO_ROOT / "main.py"
+
+_STAGE_LINE = re.compile(r'Finished stage (\w+) in ([\d.]+)s')
+_TRANSPORT_LINE = re.compile(r'LLM transport: (\d+) requests, (\d+) retries, (\d+) throttled')
+
+def run_main(project: Path, workdir: Path, base_url: str, main_args: List[str]) -> Dict:
+    """Run one analysis in a child process and collect wall time, phase times and peak RSS."""
+    argv = ["--folder", str(project), "--no-cache"] + main_args
+    # Environment variables take precedence over any .env, so this points config at the fake server
+    env = dict(os.environ, GROQ_API_KEY="benchmark-key", GROQ_API_BASE=base_url, GROQ_MODEL="benchmark-model")
+    started = time.monotonic()
+    process = subprocess.Popen([sys.executable, str(MAIN_SCRIPT)] + argv, cwd=workdir, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    phases: Dict[str, float] = {}
+    transport: Dict[str, int] = {}
+    errors = 0
+    for line in process.stderr:
+        match = _STAGE_LINE.search(line)
+        if match:
+            phases[match.group(1)] = float(match.group(2))
+        match = _TRANSPORT_LINE.search(line)
+        if match:
+            transport = dict(zip(("requests", "retries", "throttled"), map(int, match.groups())))
+        if " - ERROR - " in line:
+            errors += 1
+    peak_rss_mb = None
+    if hasattr(os, "wait4"):
+        # The child's own rusage, unlike RUSAGE_CHILDREN which keeps the peak of every child so far
+        _, status, rusage = os.wait4(process.pid, 0)
+        process.returncode = _exit_code(status)
+        peak_rss_mb = _rss_mb(rusage.ru_maxrss)
+    else:  # Windows
+        process.wait()
+    wall_time = time.monotonic() - started
+    return {
+        "exit_code": process.returncode,
+        "wall_time": wall_time,
+        "phases": phases,
+        "transport": transport,
+        "errors": errors,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+def _exit_code(status: int) -> int:
+    """Exit code from a wait status, negative for a signal like Popen.returncode."""
+    return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -os.WTERMSIG(status)
+
+def _rss_mb(max_rss: int) -> float:
+    # Linux reports kilobytes, macOS bytes
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+def run_benchmark(size: int, args: argparse.Namespace, main_args: List[str]) -> Dict:
+    with tempfile.TemporaryDirectory(prefix=f"bench-{size}-") as tmp:
+        workdir = Path(tmp)
+        started = time.monotonic()
+        project = generate_project(workdir / "proyek", size, seed=args.seed)
+        generation_time = time.monotonic() - started
+        server = FakeChatServer(latency=args.latency, jitter=args.jitter, rate_limit_every=args.rate_limit_every,
+                                retry_after=args.retry_after, tokens_per_second=args.tokens_per_second,
+                                seed=args.seed).start()
+        try:
+            result = run_main(project, workdir, server.base_url, main_args)
+        finally:
+            server.stop()
+        result.update(size=size, generation_time=generation_time, server=server.stats(),
+                      files_per_second=size / result["wall_time"] if result["wall_time"] else 0.0)
+        return result
+
+def _format_rss(peak_rss_mb: Optional[float]) -> str:
+    return "-" if peak_rss_mb is None else f"{peak_rss_mb:.1f}"
+
+def format_report(results: List[Dict]) -> str:
+    lines = [f"{'files':>8} {'wall s':>8} {'files/s':>9} {'RSS MB':>8} {'requests':>9} {'429s':>6} {'retries':>8} "
+             f"{'errors':>7}  phases"]
+    for result in results:
+        phases = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in result["phases"].items())
+        lines.append(
+            f"{result['size']:>8} {result['wall_time']:>8.2f} {result['files_per_second']:>9.1f} "
+            f"{_format_rss(result['peak_rss_mb']):>8} {result['server']['requests']:>9} {result['server']['rate_limited']:>6} "
+            f"{result['transport'].get('retries', 0):>8} {result['errors']:>7}  {phases}"
+        )
+    return "\n".join(lines)
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Benchmark the analyzer end to end against a local fake LLM server.',
+                                     epilog='Arguments after "--" are passed to main.py, e.g. -- --batch --concurrency 8')
+    parser.add_argument('--sizes', type=str, default="10,1000",
+                        help='Comma separated numbers of generated modules (default: 10,1000; try 10,1000,100000)')
+    parser.add_argument('--latency', type=float, default=0.2, help='Seconds before the fake server answers (default: 0.2)')
+    parser.add_argument('--jitter', type=float, default=0.05, help='Random +/- seconds added to the latency (default: 0.05)')
+    parser.add_argument('--rate-limit-every', type=int, default=0,
+                        help='Answer every Nth request with a 429, 0 to never throttle')
+    parser.add_argument('--retry-after', type=float, default=1.0, help='Retry-After seconds sent with a 429 (default: 1)')
+    parser.add_argument('--tokens-per-second', type=float, default=0,
+                        help='Simulated generation speed of the fake model, 0 for instant answers')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the generated trees and the latency jitter')
+    parser.add_argument('--json', type=str, help='Also write the raw results to this JSON file')
+    args, main_args = parser.parse_known_args()
+    if main_args and main_args[0] == "--":
+        main_args = main_args[1:]
+
+    results = []
+    for size in (int(size) for size in args.sizes.split(",") if size.strip()):
+        logger.info(f"Benchmarking {size} files with main.py {' '.join(main_args)}")
+        result = run_benchmark(size, args, main_args)
+        if result["exit_code"] != 0:
+            logger.error(f"main.py exited with code {result['exit_code']} for {size} files")
+        results.append(result)
+    print(format_report(results))
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
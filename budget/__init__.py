@@ -0,0 +1,12 @@
+from .token_counter import count_tokens, fit_tokens, tokenizer_name, truncate_to_tokens
+from .run_budget import BUDGET_FALLBACK_NOTE, BudgetExhausted, RunBudget, expected_output_tokens
+
+__all__ = ['count_tokens', 'fit_tokens', 'tokenizer_name', 'truncate_to_tokens', 'BUDGET_FALLBACK_NOTE', 'BudgetExhausted',
+           'RunBudget', 'expected_output_tokens', 'PlannedCall', 'PlanningTransport']
+
+def __getattr__(name):
+    # The planner builds on the describer, which itself counts tokens; import it only when asked for
+    if name in ('PlannedCall', 'PlanningTransport'):
+        from . import run_planner
+        return getattr(run_planner, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,70 @@
+import threading
+import time
+from typing import Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Heads every summary written locally because the budget ran out; such results are never recorded as final
+BUDGET_FALLBACK_NOTE = "[Ringkasan lokal: anggaran token/waktu habis sebelum deskripsi LLM dibuat]"
+
+def expected_output_tokens() -> int:
+    """Answer length assumed for a call before it is made."""
+    if config.MAX_OUTPUT_TOKENS:
+        return min(config.ESTIMATED_OUTPUT_TOKENS, config.MAX_OUTPUT_TOKENS)
+    return config.ESTIMATED_OUTPUT_TOKENS
+
+class BudgetExhausted(RuntimeError):
+    """Raised instead of sending an LLM call once the run's token budget or deadline is used up."""
+
+class RunBudget:
+    """Token and wall-clock budget shared by every LLM call of a run.
+
+    A call reserves its prompt plus the expected answer before it is sent and
+    settles with the actual count afterwards, so concurrent calls overshoot
+    the token budget by no more than the answer-length estimate. Once the
+    deadline has passed no new call is started; calls already in flight finish.
+    """
+
+    def __init__(self, token_budget: int = 0, deadline_seconds: float = 0.0):
+        self.token_budget = token_budget
+        self.deadline_seconds = deadline_seconds
+        self._deadline = time.monotonic() + deadline_seconds if deadline_seconds else None
+        self.spent = 0
+        self.reserved = 0
+        self.granted = 0
+        self.refused = 0
+        self._lock = threading.Lock()
+
+    def remaining_seconds(self) -> Optional[float]:
+        if self._deadline is None:
+            return None
+        return max(0.0, self._deadline - time.monotonic())
+
+    def reserve(self, tokens: int) -> None:
+        with self._lock:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                self.refused += 1
+                raise BudgetExhausted(f"Deadline of {self.deadline_seconds:g}s reached")
+            if self.token_budget and self.spent + self.reserved + tokens > self.token_budget:
+                self.refused += 1
+                raise BudgetExhausted(f"Token budget of {self.token_budget} would be exceeded "
+                                      f"({self.spent} spent, {self.reserved} reserved, {tokens} needed)")
+            self.reserved += tokens
+            self.granted += 1
+
+    def settle(self, reserved: int, actual: int) -> None:
+        with self._lock:
+            self.reserved -= reserved
+            self.spent += actual
+
+    def stats(self) -> str:
+        limits = []
+        if self.token_budget:
+            limits.append(f"{self.spent}/{self.token_budget} tokens spent")
+        else:
+            limits.append(f"{self.spent} tokens spent")
+        if self.deadline_seconds:
+            limits.append(f"deadline {self.deadline_seconds:g}s")
+        return f"Run budget: {', '.join(limits)}, {self.granted} calls sent, {self.refused} refused"
@@ -0,0 +1,144 @@
+import json
+import threading
+from collections import Counter
+from dataclasses import dataclass
+from typing import Hashable, List, Optional
+import config
+from budget.run_budget import expected_output_tokens
+from budget.token_counter import count_tokens, tokenizer_name
+from cache.response_cache import ResponseCache
+from describer.llm_describer import batched_module_paths
+from transport.streaming import StreamSink, strip_reasoning
+from transport.tenant_transport import TenantTransport
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Report order; stages missing here are listed after these
+STAGE_ORDER = ("project_purpose", "technologies", "project_analysis", "additional_notes",
+               "module", "module_batch", "directory", "reduce", "project_description")
+
+def _stage_rank(stage: str) -> int:
+    return STAGE_ORDER.index(stage) if stage in STAGE_ORDER else len(STAGE_ORDER)
+
+@dataclass
+class PlannedCall:
+    stage: str
+    item: str
+    tenant: Optional[str]
+    input_tokens: int
+    output_tokens: int
+    cached: bool
+
+def format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {seconds:02d}s"
+    return f"{minutes}m {seconds:02d}s" if minutes else f"{seconds}s"
+
+class PlanningTransport:
+    """Stands in for LLMTransport in --plan mode: records every prompt instead of sending it.
+
+    Answers already in the response cache are returned as they are; every
+    other call gets a placeholder of config.ESTIMATED_OUTPUT_TOKENS tokens, so
+    later stages that quote earlier answers are planned with realistic sizes.
+    """
+
+    def __init__(self, response_cache: Optional[ResponseCache] = None,
+                 concurrency: Optional[int] = None,
+                 requests_per_minute: Optional[int] = None,
+                 tokens_per_minute: Optional[int] = None):
+        self.response_cache = response_cache
+        self.concurrency = max(1, config.DEFAULT_CONCURRENCY if concurrency is None else concurrency)
+        self.requests_per_minute = config.REQUESTS_PER_MINUTE if requests_per_minute is None else requests_per_minute
+        self.tokens_per_minute = config.TOKENS_PER_MINUTE if tokens_per_minute is None else tokens_per_minute
+        self.calls: List[PlannedCall] = []
+        self.tenant_requests: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def for_tenant(self, tenant: Hashable) -> TenantTransport:
+        return TenantTransport(self, tenant)
+
+    def _placeholder(self, tokens: int) -> str:
+        return " ".join(["kata"] * tokens)
+
+    def complete(self, prompt: str, sink: Optional[StreamSink] = None, tenant: Hashable = None,
+                 stage: Optional[str] = None, item: Optional[str] = None, system: Optional[str] = None) -> str:
+        answer = None
+        if self.response_cache:
+            answer = self.response_cache.get(ResponseCache.make_key(config.GROQ_MODEL, config.GROQ_API_BASE,
+                                                                    prompt, system))
+        cached = answer is not None
+        if cached:
+            answer = strip_reasoning(answer)
+            output_tokens = count_tokens(answer)
+        elif stage == "module_batch":
+            # Batched answers are parsed as JSON keyed by module path; one placeholder per module
+            paths = batched_module_paths(prompt)
+            output_tokens = expected_output_tokens() * len(paths)
+            answer = json.dumps({path: self._placeholder(expected_output_tokens()) for path in paths})
+        else:
+            output_tokens = expected_output_tokens()
+            answer = self._placeholder(output_tokens)
+        call = PlannedCall(stage or "other", item or "", None if tenant is None else str(tenant),
+                           count_tokens(prompt) + count_tokens(system or ""), output_tokens, cached)
+        with self._lock:
+            self.calls.append(call)
+            if not cached:
+                self.tenant_requests[tenant] += 1
+        if sink:
+            sink.write(answer)
+        return answer
+
+    def _sorted_calls(self) -> List[PlannedCall]:
+        return sorted(self.calls, key=lambda call: (call.tenant or "", _stage_rank(call.stage), call.stage, call.item))
+
+    def projected_seconds(self) -> float:
+        """Wall time of the uncached calls at the configured concurrency and rate limits.
+
+        A lower bound: every call is assumed to be ready as soon as a slot is
+        free, although the project description waits for the stages it quotes.
+        """
+        sent = [call for call in self.calls if not call.cached]
+        latency = sum(config.PLAN_REQUEST_LATENCY + call.output_tokens / config.PLAN_OUTPUT_TOKENS_PER_SECOND
+                      for call in sent)
+        bounds = [latency / self.concurrency]
+        if self.requests_per_minute:
+            bounds.append(len(sent) / self.requests_per_minute * 60)
+        if self.tokens_per_minute:
+            bounds.append(sum(call.input_tokens for call in sent) / self.tokens_per_minute * 60)
+        return max(bounds)
+
+    def report(self) -> str:
+        calls = self._sorted_calls()
+        with_tenant = any(call.tenant for call in calls)
+        lines = [f"{'Project  ' if with_tenant else ''}{'Stage':<20} {'Input':>8} {'Output':>8}  Cached  Item"]
+        for call in calls:
+            tenant = f"{call.tenant:<8} " if with_tenant else ""
+            lines.append(f"{tenant}{call.stage:<20} {call.input_tokens:>8} {call.output_tokens:>8}  "
+                         f"{'yes' if call.cached else '':<6}  {call.item}")
+        lines.append("")
+        stages = Counter(call.stage for call in calls)
+        for stage, count in sorted(stages.items(), key=lambda item: (_stage_rank(item[0]), item[0])):
+            stage_calls = [call for call in calls if call.stage == stage]
+            lines.append(f"{stage}: {count} calls, {sum(call.input_tokens for call in stage_calls)} input tokens, "
+                         f"{sum(call.output_tokens for call in stage_calls)} output tokens")
+        sent = [call for call in calls if not call.cached]
+        over_budget = [call for call in sent if call.input_tokens + call.output_tokens > config.MODEL_CONTEXT_TOKENS]
+        lines.append(f"Total: {len(calls)} calls ({len(calls) - len(sent)} answered from the cache), "
+                     f"{sum(call.input_tokens for call in sent)} input and {sum(call.output_tokens for call in sent)} "
+                     f"output tokens to send")
+        limits = [f"concurrency {self.concurrency}"]
+        if self.requests_per_minute:
+            limits.append(f"{self.requests_per_minute} requests/min")
+        if self.tokens_per_minute:
+            limits.append(f"{self.tokens_per_minute} tokens/min")
+        lines.append(f"Projected wall time: at least {format_duration(self.projected_seconds())} ({', '.join(limits)})")
+        if over_budget:
+            lines.append(f"Warning: {len(over_budget)} calls exceed the {config.MODEL_CONTEXT_TOKENS}-token context window")
+        lines.append(f"Token counts: {tokenizer_name()}, {expected_output_tokens()} output tokens assumed per uncached answer")
+        return "\n".join(lines)
+
+    def stats(self) -> str:
+        return f"Plan: {len(self.calls)} LLM calls recorded, none sent"
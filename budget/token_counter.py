@@ -0,0 +1,88 @@
+import math
+import re
+from functools import lru_cache
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Roughly the pre-tokenization of BPE tokenizers: words with their leading space, digit groups,
+# punctuation runs and whitespace runs
+_PIECE = re.compile(r" ?[^\W\d_]+| ?\d{1,3}| ?[^\w\s]+|_+|\s+")
+_SKIP_MARKER = "\n...\n[sekitar {skipped} token dilewati]\n...\n"
+_ESTIMATE_CHARS_PER_WORD_TOKEN = 5
+_ESTIMATE_CHARS_PER_PUNCTUATION_TOKEN = 2
+
+@lru_cache(maxsize=None)
+def _encoding():
+    if not config.TOKENIZER_ENCODING:
+        return None
+    try:
+        import tiktoken
+    except ImportError:
+        logger.debug("tiktoken not installed, estimating token counts")
+        return None
+    try:
+        return tiktoken.get_encoding(config.TOKENIZER_ENCODING)
+    except Exception as e:
+        # The encoding file is downloaded on first use, which fails offline
+        logger.warning(f"Could not load tiktoken encoding {config.TOKENIZER_ENCODING}, estimating token counts: {e}")
+        return None
+
+def tokenizer_name() -> str:
+    return f"tiktoken {config.TOKENIZER_ENCODING}" if _encoding() else "offline estimate"
+
+def _piece_tokens(piece: str) -> int:
+    word = piece.lstrip(" ") or piece
+    if word[0].isspace() or word[0] == "_" or word[0].isdigit():
+        return 1
+    if word[0].isalpha():
+        if word.isascii():
+            return math.ceil(len(word) / _ESTIMATE_CHARS_PER_WORD_TOKEN)
+        # Non-Latin scripts take about one token per two or three UTF-8 bytes
+        return math.ceil(len(word.encode('utf-8')) / 3)
+    return math.ceil(len(word) / _ESTIMATE_CHARS_PER_PUNCTUATION_TOKEN)
+
+def _estimated_cut(text: str, max_tokens: int, from_end: bool) -> int:
+    # Offset of the first piece (or, from the end, the end of the last piece) that no longer fits
+    pieces = list(_PIECE.finditer(text))
+    total = 0
+    for match in (reversed(pieces) if from_end else pieces):
+        total += _piece_tokens(match.group())
+        if total > max_tokens:
+            return match.end() if from_end else match.start()
+    return 0 if from_end else len(text)
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in `text`: exact with tiktoken, otherwise a conservative offline estimate."""
+    encoding = _encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return sum(_piece_tokens(match.group()) for match in _PIECE.finditer(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, from_end: bool = False) -> str:
+    """The longest start (or end, with `from_end`) of `text` that fits in `max_tokens` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = _encoding()
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        return encoding.decode(tokens[-max_tokens:] if from_end else tokens[:max_tokens])
+    cut = _estimated_cut(text, max_tokens, from_end)
+    return text[cut:] if from_end else text[:cut]
+
+def fit_tokens(text: str, max_tokens: int, sample: str = "prefix") -> str:
+    """Cut `text` to `max_tokens` tokens, keeping its start, or its start and end for sample="head_tail"."""
+    total = count_tokens(text)
+    if total <= max_tokens:
+        return text
+    if sample != "head_tail":
+        return truncate_to_tokens(text, max_tokens)
+    # The marker between head and tail comes out of the budget too
+    budget = max(0, max_tokens - count_tokens(_SKIP_MARKER.format(skipped=total)))
+    head = truncate_to_tokens(text, budget * 2 // 3)
+    tail = truncate_to_tokens(text[len(head):], budget - count_tokens(head), from_end=True)
+    skipped = total - count_tokens(head) - count_tokens(tail)
+    return head + _SKIP_MARKER.format(skipped=max(0, skipped)) + tail
@@ -0,0 +1,134 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Persistent SQLite cache of LLM responses keyed on (model, base URL, prompt).
+
+    Entries are evicted least-recently-used first once the cache grows past
+    `max_bytes`, and entries older than `max_age_days` are dropped entirely.
+    Both limits are applied while the cache is written to, not only on close:
+    every `evict_every` writes, and as soon as the size passes `max_bytes`.
+    With `refresh` enabled lookups always miss but fresh responses are still stored.
+    """
+
+    # Size evictions trim to this share of max_bytes, so the next few writes do not trigger another one
+    EVICT_TO = 0.9
+
+    def __init__(self, db_path: str, max_bytes: int = 0, max_age_days: float = 0, refresh: bool = False,
+                 evict_every: Optional[int] = None):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.refresh = refresh
+        self.evict_every = config.CACHE_EVICT_EVERY if evict_every is None else evict_every
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created REAL NOT NULL,
+                accessed REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed)")
+        self._conn.commit()
+        # Upper bound of the stored bytes, kept up to date by put() and corrected by every eviction
+        self._size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self._writes_since_evict = 0
+
+    @staticmethod
+    def make_key(model: str, base_url: str, prompt: str, system: Optional[str] = None) -> str:
+        digest = hashlib.sha256()
+        # Prompts without a system message keep the keys they had before system messages existed
+        for part in (model or "", base_url or "", prompt) + ((system,) if system else ()):
+            digest.update(part.encode('utf-8'))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if self.refresh:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            row = self._conn.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            now = time.time()
+            if row and self.max_age_days and now - row[1] > self.max_age_days * 86400:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, response: str) -> None:
+        now = time.time()
+        size = len(response.encode('utf-8'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now)
+            )
+            self._conn.commit()
+            self.writes += 1
+            self._size += size
+            self._writes_since_evict += 1
+            due = ((self.evict_every and self._writes_since_evict >= self.evict_every)
+                   or (self.max_bytes and self._size > self.max_bytes))
+            if due:
+                self._writes_since_evict = 0
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """Apply age and size limits, returning the number of entries removed."""
+        removed = 0
+        with self._lock:
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self._conn.execute("DELETE FROM responses WHERE created < ?", (cutoff,)).rowcount
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if self.max_bytes and total > self.max_bytes:
+                target = self.max_bytes * self.EVICT_TO
+                stale_keys = []
+                for key, size in self._conn.execute("SELECT key, size FROM responses ORDER BY accessed ASC"):
+                    if total <= target:
+                        break
+                    stale_keys.append((key,))
+                    total -= size
+                self._conn.executemany("DELETE FROM responses WHERE key = ?", stale_keys)
+                removed += len(stale_keys)
+            self._conn.commit()
+            self._size = total
+        if removed:
+            logger.info(f"Evicted {removed} cached responses")
+        return removed
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        hit_rate = (self.hits / lookups * 100) if lookups else 0.0
+        return f"Response cache: {self.hits} hits, {self.misses} misses ({hit_rate:.1f}% hit rate), {self.writes} writes"
+
+    def close(self) -> None:
+        self.evict()
+        with self._lock:
+            self._conn.close()
@@ -1,20 +1,49 @@
 import os
-from typing import Dict, Any
-from dotenv import dotenv_values
+from typing import Dict, Any, Optional
 from pathlib import Path
 
-# Load environment variables from .env file
-env_path = Path.cwd() / '.env'
-print(f"Loading .env from: {env_path}")
+# API settings, filled in by load() from .env and the environment
+GROQ_API_KEY = None
+GROQ_MODEL = 'deepseek-r1-distill-llama-70b'
+GROQ_API_BASE = 'https://api.groq.com/openai/v1/chat/completions'
+ENV_OVERRIDE_PREFIX = "ANALYZER_"  # e.g. ANALYZER_DEFAULT_CONCURRENCY=8 overrides DEFAULT_CONCURRENCY
 
-env_values = dotenv_values(env_path)
-GROQ_API_KEY = env_values.get('GROQ_API_KEY')
-GROQ_MODEL = env_values.get('GROQ_MODEL', 'deepseek-r1-distill-llama-70b')
-GROQ_API_BASE = env_values.get('GROQ_API_BASE', 'https://api.groq.com/openai/v1/chat/completions')
+_loaded = False
 
-print(f"\nAPI Key loaded: {GROQ_API_KEY[:10]}..." if GROQ_API_KEY else "No API Key loaded!")
-print(f"Model loaded: {GROQ_MODEL}")
-print(f"API Base loaded: {GROQ_API_BASE}")
+def load(env_path: Optional[Path] = None, reload: bool = False) -> None:
+    """Load settings from a .env file and the process environment.
+
+    Nothing is read at import time. The GROQ_* settings come from .env
+    (default: the working directory) and are overridden by environment
+    variables of the same name; any other scalar setting can be overridden
+    with an ANALYZER_<NAME> environment variable.
+    """
+    global _loaded
+    if _loaded and not reload:
+        return
+    env_path = Path(env_path) if env_path else Path.cwd() / '.env'
+    env_values: Dict[str, Any] = {}
+    if env_path.is_file():
+        from dotenv import dotenv_values
+        env_values = dotenv_values(env_path)
+    settings = globals()
+    for name in ('GROQ_API_KEY', 'GROQ_MODEL', 'GROQ_API_BASE'):
+        value = os.environ.get(name) or env_values.get(name)
+        if value:
+            settings[name] = value
+    for key, value in os.environ.items():
+        name = key[len(ENV_OVERRIDE_PREFIX):]
+        if not key.startswith(ENV_OVERRIDE_PREFIX) or not name.isupper() or name not in settings:
+            continue
+        current = settings[name]
+        if isinstance(current, bool):
+            settings[name] = value.strip().lower() in ('1', 'true', 'yes', 'on')
+        elif isinstance(current, (int, float, str)):
+            try:
+                settings[name] = type(current)(value)
+            except ValueError:
+                raise ValueError(f"Invalid value for {key}: {value!r}") from None
+    _loaded = True
 
 # Analysis Configuration
 DEFAULT_OUTPUT_FILE = "project_analysis.txt"
@@ -26,15 +55,28 @@ IGNORED_DIRECTORIES = {
     "env",
     "node_modules",
     ".idea",
-    ".vscode"
+    ".vscode",
+    ".tox",
+    ".nox",
+    ".eggs",
+    ".mypy_cache",
+    ".pytest_cache",
+    "site-packages"
 }
 
 IGNORED_FILES = {
     ".gitignore",
+    ".ignore",
     ".env",
     ".DS_Store"
 }
 
+# Ignore files honored hierarchically by the scanner, later ones overriding earlier ones
+IGNORE_FILE_NAMES = (".gitignore", ".ignore")
+# Text files are dropped during the scan when their first bytes show they are binary, minified or generated
+MINIFIED_LINE_CHARS = 1000  # A line this long in the sampled header marks a minified file
+GENERATED_HEADER_LINES = 5  # Lines searched for a comment holding "@generated" or "DO NOT EDIT"
+
 # File extensions to analyze
 PYTHON_EXTENSIONS = {".py"}
 DOCUMENTATION_EXTENSIONS = {".md", ".txt", ".rst"}
@@ -42,11 +84,95 @@ CONFIG_EXTENSIONS = {".toml", ".yaml", ".yml", ".json"}
 
 # Analysis settings
 MAX_FILE_SIZE = 1024 * 1024  # 1MB
-MAX_TOKENS_PER_FILE = 2000
+MAX_TOKENS_PER_FILE = 2000  # Module source tokens sent without a skeleton
+READ_MMAP_MIN_BYTES = 1024 * 1024  # Sampled reads memory-map files from this size on
+MODULE_SAMPLE = "prefix"  # Source sent without a skeleton: "prefix" or "head_tail"
+
+# Module skeleton settings
+SKELETON_MIN_CHARS = 0  # Larger modules are described from their AST skeleton when over the token budget; 0: MAX_TOKENS_PER_FILE
+SKELETON_MAX_CHARS = 8000
+SKELETON_DOCSTRING_CHARS = 200
+
+# Local parsing settings
+PROCESS_POOL_MIN_FILES = 200  # Parse in a process pool from this many Python files on
+IMPORT_SUMMARY_LIMIT = 20
+DEPENDENCY_FILES = {"requirements.txt", "requirements-dev.txt", "pyproject.toml"}
+
+# Module importance under --token-budget/--deadline: the most valuable modules are described first
+ENTRY_POINT_NAMES = {"main.py", "__main__.py", "app.py", "cli.py", "manage.py", "wsgi.py", "asgi.py"}
+IMPORTANCE_FAN_IN_WEIGHT = 3.0  # per project file importing the module
+IMPORTANCE_ENTRY_POINT_BONUS = 10.0
+IMPORTANCE_PUBLIC_WEIGHT = 1.0  # per top-level public function or class
+IMPORTANCE_PUBLIC_CAP = 10
+IMPORTANCE_SIZE_WEIGHT = 0.5  # per doubling of the file size
+LOCAL_SUMMARY_NAME_LIMIT = 15  # Names listed per kind in summaries written without the LLM
+LOCAL_SUMMARY_TOKENS = 400  # Documentation and structure quoted in local analysis stage results
+
+# Modules up to this size with no code beyond imports, __all__ and a docstring are described locally
+TRIVIAL_MODULE_MAX_CHARS = 2000
+
+# Module batching settings
+BATCH_MAX_MODULE_CHARS = 1500  # Modules up to this size are packed into shared requests
+BATCH_TOKEN_BUDGET = 3000  # Estimated source tokens per batched request
+BATCH_MAX_MODULES = 10
+
+# Map-reduce summarization settings
+REDUCE_CHILD_TOKENS = 150  # Each child summary is cut to this many tokens in a reduce prompt
+
+# Token budgets, counted with tiktoken when it is installed and estimated offline otherwise
+TOKENIZER_ENCODING = "cl100k_base"  # Empty to always use the offline estimate
+MODEL_CONTEXT_TOKENS = 131072  # Prompt plus answer; --plan warns about calls that would not fit
+READ_CHARS_PER_TOKEN = 8  # Characters read per budgeted token before cutting to the exact count
+PURPOSE_TOKEN_BUDGET = 6000  # Documentation sent to the project purpose stage
+STRUCTURE_TOKEN_BUDGET = 6000  # Project tree sent to the structure analysis stage
+DIRECTORY_TOKEN_BUDGET = 1000  # File listing of one directory
+PROJECT_SECTION_TOKENS = 1500  # Each stage result quoted in the project description prompt
+PROJECT_CONTEXT_TOKENS = 500  # Purpose and technologies each, in the system message of module and directory prompts
+
+# --plan settings
+ESTIMATED_OUTPUT_TOKENS = 500  # Answer length assumed for every call
+PLAN_REQUEST_LATENCY = 1.0  # seconds before the first token
+PLAN_OUTPUT_TOKENS_PER_SECOND = 250.0
+
+# Streaming scan settings
+SCAN_QUEUE_SIZE = 1000  # Files buffered between the walker threads and the consumer
+SCAN_WORKERS = 4
+
+# Concurrency settings
+DEFAULT_CONCURRENCY = 4
+REQUESTS_PER_MINUTE = 0  # 0 disables the limit
+TOKENS_PER_MINUTE = 0  # 0 disables the limit
+CHARS_PER_TOKEN = 4  # Rough estimate from a file size, before the file is read
+
+# HTTP transport settings
+HTTP_MAX_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 60.0  # seconds an idle pooled connection is kept open
+HTTP_TIMEOUT = 120.0
+MAX_RETRIES = 5
+RETRY_BASE_DELAY = 1.0  # seconds, doubled on every attempt
+RETRY_MAX_DELAY = 60.0
+MAX_OUTPUT_TOKENS = 8192  # 0 leaves the limit to the provider
+CALL_TIMEOUT = 300.0  # Wall-clock and stall cutoff in seconds for one streamed call, 0 disables
+
+# Response cache settings
+CACHE_PATH = ".cache/llm_responses.sqlite3"
+CACHE_MAX_BYTES = 256 * 1024 * 1024  # 256MB, least recently used entries are evicted first
+CACHE_MAX_AGE_DAYS = 30
+CACHE_EVICT_EVERY = 1000  # Writes between evictions during a run; the size limit is also enforced as soon as it is crossed
+
+# --output-store settings
+STORE_BATCH_SIZE = 500  # Most writes committed in one transaction by the store's writer thread
 
 # Output Configuration
 DEFAULT_OUTPUT_DIR = "output"
 
+# Batch mode settings
+PARALLEL_PROJECTS = 4  # Projects in flight at once; they share the LLM transport and its limits
+
+# Watch mode settings
+WATCH_POLL_INTERVAL = 2.0  # seconds between rescans
+WATCH_DEBOUNCE = 1.0  # seconds without new changes before descriptions are updated
+
 # Output formatting
 OUTPUT_TEMPLATE = """
 📁 Proyek: {project_name}
@@ -1,3 +1,6 @@
 from .llm_describer import LLMDescriber
+from .local_describer import (describe_project_locally, describe_trivial_module, summarize_directory_locally,
+                              summarize_module_locally)
 
-__all__ = ['LLMDescriber'] 
\ No newline at end of file
+__all__ = ['LLMDescriber', 'describe_trivial_module', 'summarize_module_locally', 'summarize_directory_locally',
+           'describe_project_locally']
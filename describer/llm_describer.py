@@ -1,53 +1,97 @@
-from openai import OpenAI, OpenAIError
 import config
-from typing import Dict, List
+from typing import TYPE_CHECKING, Dict, List, Optional
 from pathlib import Path
+from transport.errors import api_errors
+from transport.streaming import StreamSink
+from budget.run_budget import BudgetExhausted
+from budget.token_counter import truncate_to_tokens
+import hashlib
+import json
+import re
 import logging
 
+if TYPE_CHECKING:
+    from transport.llm_transport import LLMTransport
+
 logger = logging.getLogger(__name__)
 
+_THINK_BLOCK = re.compile(r'<think>.*?(</think>|$)', re.DOTALL)
+# Header of every module section in a batched prompt
+_BATCH_MODULE_HEADER = re.compile(r'^\s*### (.+)\n```python$', re.MULTILINE)
+# Fixed head of the system message shared by every module and directory prompt of a run
+_SYSTEM_INSTRUCTIONS = """Anda adalah penulis dokumentasi teknis untuk sebuah proyek Python.
+Tulis semua deskripsi dalam bahasa Indonesia dengan nada profesional, teknis, dan ringkas.
+Jelaskan kode berdasarkan isi yang diberikan saja dan jangan mengarang detail yang tidak ada."""
+
+def parse_json_object(text: str) -> Dict[str, str]:
+    """Extract the JSON object from a model answer that may wrap it in reasoning or code fences."""
+    text = _THINK_BLOCK.sub('', text)
+    start, end = text.find('{'), text.rfind('}')
+    if start == -1 or end <= start:
+        raise ValueError("No JSON object found in response")
+    data = json.loads(text[start:end + 1])
+    if not isinstance(data, dict):
+        raise ValueError("Response JSON is not an object")
+    return {str(key): value.strip() for key, value in data.items() if isinstance(value, str) and value.strip()}
+
+def batched_module_paths(prompt: str) -> List[str]:
+    """Module paths of a prompt built by LLMDescriber.describe_modules_batch, i.e. the keys its answer must use."""
+    return [path.strip() for path in _BATCH_MODULE_HEADER.findall(prompt)]
+
 class LLMDescriber:
-    def __init__(self):
-        try:
-            self.client = OpenAI(
-                api_key=config.GROQ_API_KEY,
-                base_url=config.GROQ_API_BASE,
-                default_headers={
-                    "Content-Type": "application/json"
-                }
-            )
-        except Exception as e:
-            logger.error(f"Failed to initialize OpenAI client: {e}", exc_info=True)
-            raise # Re-raise the exception to be caught in main
+    def __init__(self, transport: Optional["LLMTransport"] = None):
+        if transport is None:
+            from transport.llm_transport import LLMTransport
+            transport = LLMTransport()
+        self.transport = transport
+        self.system_message = _SYSTEM_INSTRUCTIONS
+
+    def set_project_context(self, analysis_results: Dict[str, str]) -> None:
+        """Add the project's name, purpose and technologies to the system message of later module and directory prompts.
+
+        The message is built once, so it is byte-for-byte the same in every
+        call and the provider can serve it from its prompt cache. Set it
+        before the first call of the run, not in between.
+        """
+        limit = config.PROJECT_CONTEXT_TOKENS
+        self.system_message = f"""{_SYSTEM_INSTRUCTIONS}
+
+Konteks proyek:
+Nama Proyek: {analysis_results['project_name']}
+Tujuan: {truncate_to_tokens(analysis_results['project_purpose'], limit)}
+Teknologi: {truncate_to_tokens(analysis_results['technologies'], limit)}"""
+
+    def context_fingerprint(self) -> str:
+        """Hash of the system message, so a run can tell whether earlier descriptions saw the same project context."""
+        return hashlib.sha256(self.system_message.encode('utf-8')).hexdigest()
 
-    def _call_groq_api(self, prompt: str) -> str:
+    def _call_groq_api(self, prompt: str, sink: Optional[StreamSink] = None, stage: Optional[str] = None,
+                       item: Optional[str] = None, system: Optional[str] = None) -> str:
         try:
-            logger.debug(f"Sending prompt to Groq: {prompt[:100]}...")
-            response = self.client.chat.completions.create(
-                model=config.GROQ_MODEL,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            content = response.choices[0].message.content.strip()
-            logger.debug(f"Received response from Groq: {content[:100]}...")
-            return content
-        except OpenAIError as e:
+            return self.transport.complete(prompt, sink, stage=stage, item=item, system=system)
+        except BudgetExhausted:
+            raise # Out of budget is expected; the caller falls back to a local summary
+        except api_errors() as e:
             logger.error(f"Groq API error during description call: {e}")
             raise # Re-raise the specific OpenAIError
         except Exception as e:
             logger.exception("Unexpected error during Groq API call")
             raise # Re-raise other exceptions
 
-    def describe_project(self, analysis_results: Dict[str, str]) -> str:
+    def describe_project(self, analysis_results: Dict[str, str], tree_summary: Optional[str] = None) -> str:
         logger.debug("Describing project...")
+        # In map-reduce mode the code itself is represented by the reduced root summary
+        limit = config.PROJECT_SECTION_TOKENS
+        code_summary = f"\n        Ringkasan Kode: {truncate_to_tokens(tree_summary, limit)}\n" if tree_summary else ""
         prompt = f"""
         Berdasarkan analisis proyek berikut, tulis deskripsi yang komprehensif dan profesional dalam bahasa Indonesia:
         
         Nama Proyek: {analysis_results['project_name']}
-        Tujuan: {analysis_results['project_purpose']}
-        Teknologi: {analysis_results['technologies']}
-        Analisis: {analysis_results['project_analysis']}
-        Catatan Tambahan: {analysis_results['additional_notes']}
-        
+        Tujuan: {truncate_to_tokens(analysis_results['project_purpose'], limit)}
+        Teknologi: {truncate_to_tokens(analysis_results['technologies'], limit)}
+        Analisis: {truncate_to_tokens(analysis_results['project_analysis'], limit)}
+        Catatan Tambahan: {truncate_to_tokens(analysis_results['additional_notes'], limit)}
+        {code_summary}
         Tulis deskripsi profesional yang terstruktur dengan baik yang:
         1. Dimulai dengan pengantar yang jelas
         2. Menjelaskan tujuan dan sasaran proyek
@@ -57,41 +101,100 @@ class LLMDescriber:
         
         Gunakan bahasa profesional dan pertahankan nada yang teknis namun mudah dipahami.
         """
-        return self._call_groq_api(prompt)
+        return self._call_groq_api(prompt, stage="project_description")
 
-    def describe_module(self, module_path: Path, content: str) -> str:
+    def describe_module(self, module_path: Path, content: str, skeleton: Optional[str] = None,
+                        sink: Optional[StreamSink] = None) -> str:
         logger.debug(f"Describing module: {module_path.name}")
-        prompt = f"""
-        Analisis modul Python berikut dan berikan deskripsi yang jelas dalam bahasa Indonesia:
+        # Instructions before the payload, so the shared prefix runs as far as possible
+        instructions = """
+        Analisis modul Python berikut dan berikan deskripsi yang:
+        1. Menjelaskan tujuan modul
+        2. Mendeskripsikan komponen dan fungsi utamanya
+        3. Menyoroti pola atau pilihan desain penting
+        4. Mencatat ketergantungan atau hubungan dengan modul lain
         
+        Pertahankan deskripsi yang ringkas dan profesional.
+        """
+        if skeleton:
+            # Large module: describe it from its AST outline instead of a truncated body
+            prompt = f"""{instructions}
+        Modul: {module_path.name}
+        Ukuran: {len(content.splitlines())} baris
+        Kerangka (import, kelas, fungsi, dekorator, dan docstring):
+        {skeleton}
+        """
+        else:
+            prompt = f"""{instructions}
         Modul: {module_path.name}
         Isi:
-        {content[:config.MAX_TOKENS_PER_FILE]}
-        
-        Berikan deskripsi yang:
+        {truncate_to_tokens(content, config.MAX_TOKENS_PER_FILE)}
+        """
+        return self._call_groq_api(prompt, sink, "module", module_path.as_posix(), self.system_message)
+
+    def describe_modules_batch(self, modules: Dict[str, str]) -> Dict[str, str]:
+        """Describe several small modules in one request; returns descriptions keyed by module path."""
+        logger.debug(f"Describing {len(modules)} modules in one batch")
+        sections = "\n\n".join(
+            f"### {module_path}\n```python\n{truncate_to_tokens(content, config.MAX_TOKENS_PER_FILE)}\n```"
+            for module_path, content in modules.items()
+        )
+        prompt = f"""
+        Analisis setiap modul Python berikut dan berikan untuk masing-masing modul deskripsi yang:
         1. Menjelaskan tujuan modul
         2. Mendeskripsikan komponen dan fungsi utamanya
         3. Menyoroti pola atau pilihan desain penting
         4. Mencatat ketergantungan atau hubungan dengan modul lain
         
         Pertahankan deskripsi yang ringkas dan profesional.
+        Jawab HANYA dengan satu objek JSON yang valid, dengan kunci berupa path modul persis seperti tertulis setelah "###" dan nilai berupa deskripsi modul dalam bentuk string.
+        
+        {sections}
         """
-        return self._call_groq_api(prompt)
+        try:
+            return parse_json_object(self._call_groq_api(prompt, stage="module_batch", item=f"{len(modules)} modules",
+                                                         system=self.system_message))
+        except (ValueError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not parse batched module descriptions: {e}")
+            return {}
 
-    def describe_directory(self, dir_path: Path, contents: List[Path]) -> str:
+    def describe_directory(self, dir_path: Path, contents: List[Path], sink: Optional[StreamSink] = None) -> str:
         logger.debug(f"Describing directory: {dir_path.name}")
         prompt = f"""
-        Analisis direktori berikut dan isinya dalam bahasa Indonesia:
-        
-        Direktori: {dir_path.name}
-        Isi: {[f.name for f in contents]}
-        
-        Berikan deskripsi yang:
+        Analisis direktori berikut dan isinya, lalu berikan deskripsi yang:
         1. Menjelaskan peran direktori dalam proyek
         2. Mendeskripsikan bagaimana isinya diorganisir
         3. Menjelaskan pola atau konvensi yang digunakan
         4. Mencatat hubungan penting dengan direktori lain
         
         Pertahankan deskripsi yang ringkas dan profesional.
+        
+        Direktori: {dir_path.name}
+        Isi: {truncate_to_tokens(str([f.name for f in contents]), config.DIRECTORY_TOKEN_BUDGET)}
+        """
+        return self._call_groq_api(prompt, sink, "directory", dir_path.as_posix(), self.system_message)
+
+    def reduce_directory(self, dir_path: Path, module_summaries: Dict[str, str],
+                         subdirectory_summaries: Dict[str, str], sink: Optional[StreamSink] = None) -> str:
+        """Summarize a directory from the descriptions of its modules and subdirectories."""
+        logger.debug(f"Reducing directory: {dir_path.name}")
+        limit = config.REDUCE_CHILD_TOKENS
+        modules = "\n".join(f"- {name}: {truncate_to_tokens(summary, limit)}" for name, summary in sorted(module_summaries.items()))
+        subdirectories = "\n".join(f"- {name}/: {truncate_to_tokens(summary, limit)}" for name, summary in sorted(subdirectory_summaries.items()))
+        prompt = f"""
+        Analisis direktori berikut berdasarkan ringkasan isinya, lalu berikan deskripsi yang:
+        1. Menjelaskan peran direktori dalam proyek
+        2. Merangkum tanggung jawab modul dan subdirektorinya
+        3. Menjelaskan pola atau konvensi yang digunakan
+        4. Mencatat hubungan penting antar komponen
+        
+        Pertahankan deskripsi yang ringkas dan profesional.
+        
+        Direktori: {dir_path.name}
+        Ringkasan modul:
+        {modules or '-'}
+        
+        Ringkasan subdirektori:
+        {subdirectories or '-'}
         """
-        return self._call_groq_api(prompt) 
\ No newline at end of file
+        return self._call_groq_api(prompt, sink, "reduce", dir_path.as_posix(), self.system_message)
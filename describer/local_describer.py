@@ -0,0 +1,117 @@
+import ast
+import io
+import tokenize
+from pathlib import Path
+from typing import Dict, List, Optional
+import config
+from budget.run_budget import BUDGET_FALLBACK_NOTE
+
+def _has_code(content: str) -> bool:
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(content).readline):
+            if token.type not in (tokenize.COMMENT, tokenize.NL, tokenize.NEWLINE, tokenize.ENDMARKER,
+                                  tokenize.INDENT, tokenize.DEDENT, tokenize.ENCODING):
+                return True
+    except (tokenize.TokenError, SyntaxError):
+        return True
+    return False
+
+def _import_names(node: ast.stmt) -> List[str]:
+    return [alias.asname or alias.name for alias in node.names]
+
+def describe_trivial_module(module_path: Path, content: str) -> Optional[str]:
+    """Describe an empty, comment-only, docstring-only or import-only module without an LLM call.
+
+    Returns None when the module holds real code and needs a proper description.
+    """
+    if len(content) > config.TRIVIAL_MODULE_MAX_CHARS:
+        return None
+    is_package = module_path.name == "__init__.py"
+    subject = f"File `__init__.py` paket `{module_path.parent.name}`" if is_package else f"Modul `{module_path.name}`"
+    if not _has_code(content):
+        if is_package:
+            return (f"File `__init__.py` kosong yang menandai direktori `{module_path.parent.name}` sebagai paket Python. "
+                    "Tidak berisi kode.")
+        if content.strip():
+            return f"{subject} hanya berisi komentar dan tidak memiliki kode yang dapat dijalankan."
+        return f"{subject} kosong dan tidak berisi kode."
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        return None
+    body = list(tree.body)
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        body = body[1:]
+    imported: List[str] = []
+    sources: List[str] = []
+    exported: List[str] = []
+    for node in body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            imported += _import_names(node)
+            source = ("." * node.level + (node.module or "")) if isinstance(node, ast.ImportFrom) else None
+            if source and source not in sources:
+                sources.append(source)
+        elif (isinstance(node, ast.Assign) and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name)
+              and node.targets[0].id == "__all__" and isinstance(node.value, (ast.List, ast.Tuple))):
+            exported += [element.value for element in node.value.elts
+                         if isinstance(element, ast.Constant) and isinstance(element.value, str)]
+        elif not (isinstance(node, ast.Pass) or (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))):
+            return None
+    summary = f' Docstring: "{docstring.strip().splitlines()[0]}"' if docstring else ""
+    if not imported and not exported:
+        return f"{subject} tidak berisi kode selain docstring.{summary}"
+    names = ", ".join(f"`{name}`" for name in (exported or imported))
+    origin = f" dari {', '.join(f'`{source}`' for source in sources)}" if sources else ""
+    if exported or is_package:
+        return f"{subject} hanya mengekspor ulang nama berikut{origin}: {names}.{summary}"
+    return f"{subject} hanya berisi pernyataan import{origin}: {names}.{summary}"
+
+def _names(names: List[str], limit: Optional[int] = None) -> str:
+    limit = config.LOCAL_SUMMARY_NAME_LIMIT if limit is None else limit
+    shown = ", ".join(f"`{name}`" for name in names[:limit])
+    return shown + (f" dan {len(names) - limit} lainnya" if len(names) > limit else "")
+
+def summarize_module_locally(module_path: Path, content: str, fan_in: int = 0) -> str:
+    """Outline of a module from its AST, written instead of an LLM description once the run budget is used up."""
+    lines = [BUDGET_FALLBACK_NOTE]
+    usage = f", diimpor oleh {fan_in} file proyek" if fan_in else ""
+    lines.append(f"Modul `{module_path.name}`: {len(content.splitlines())} baris{usage}.")
+    try:
+        tree = ast.parse(content)
+    except (SyntaxError, ValueError):
+        lines.append("Kode modul tidak dapat di-parse.")
+        return "\n".join(lines)
+    docstring = ast.get_docstring(tree)
+    if docstring:
+        first_paragraph = docstring.strip().split("\n\n")[0].strip()
+        lines.append(f'Docstring: "{first_paragraph}"')
+    classes = [node.name for node in tree.body if isinstance(node, ast.ClassDef) and not node.name.startswith("_")]
+    functions = [node.name for node in tree.body
+                 if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and not node.name.startswith("_")]
+    if classes:
+        lines.append(f"Kelas: {_names(classes)}.")
+    if functions:
+        lines.append(f"Fungsi publik: {_names(functions)}.")
+    if not classes and not functions:
+        lines.append("Tidak ada kelas atau fungsi publik di tingkat modul.")
+    return "\n".join(lines)
+
+def summarize_directory_locally(dir_path: Path, module_names: List[str], subdirectory_names: List[str] = ()) -> str:
+    """Listing of a directory, written instead of an LLM description once the run budget is used up."""
+    lines = [BUDGET_FALLBACK_NOTE, f"Direktori `{dir_path.name}`."]
+    if module_names:
+        lines.append(f"Modul Python ({len(module_names)}): {_names(sorted(module_names))}.")
+    if subdirectory_names:
+        lines.append(f"Subdirektori ({len(subdirectory_names)}): {_names(sorted(subdirectory_names))}.")
+    return "\n".join(lines)
+
+def describe_project_locally(analysis_results: Dict[str, str]) -> str:
+    """Project description assembled from the analysis sections once the run budget is used up."""
+    return "\n\n".join([
+        BUDGET_FALLBACK_NOTE,
+        f"Proyek {analysis_results['project_name']}.",
+        f"Tujuan:\n{analysis_results['project_purpose']}",
+        f"Teknologi:\n{analysis_results['technologies']}",
+        f"Struktur:\n{analysis_results['project_analysis']}",
+    ])
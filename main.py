@@ -1,11 +1,28 @@
 import argparse
+from datetime import datetime
 from pathlib import Path
+from typing import Optional, Tuple
 import os
-from openai import OpenAI, OpenAIError
+import shutil
+import sys
+import tempfile
 from scanner.file_scanner import FileScanner
 from analyzer.project_analyzer import ProjectAnalyzer
+from analyzer.module_skeleton import SkeletonExtractor
 from describer.llm_describer import LLMDescriber
 from writer.output_writer import OutputWriter
+from writer.run_manifest import RunManifest
+from writer.batch_index import BatchIndex
+from transport.rate_limiter import RateLimiter
+from pipeline.worker_pool import WorkerPool
+from pipeline.project_pipeline import ProjectPipeline
+from pipeline.watcher import ProjectWatcher
+from pipeline.batch_runner import BatchRunner, resolve_projects
+from cache.response_cache import ResponseCache
+from budget.run_budget import RunBudget
+from budget.run_planner import PlanningTransport
+from transport.batch_job import BatchJobTransport, import_batch_results
+from tracing import get_tracer
 import config
 import logging
 
@@ -26,156 +43,323 @@ def check_api_key():
     logger.info(f"Using model: {config.GROQ_MODEL}")
     return True
 
-def handle_groq_error(e: OpenAIError) -> str:
-    """Handle Groq API errors with user-friendly messages."""
-    error_message = f"Groq API error: {e}"
-    try:
-        # Try to get structured error details if available
-        error_data = e.response.json().get('error', {})
-        code = error_data.get('code')
-        message = error_data.get('message', str(e)) # Fallback to default message
-
-        if code == 'rate_limit_exceeded':
-            error_message = f"""
-Error: Groq API rate limit exceeded.
-Message: {message}
-Please check your Groq account billing and quota at: https://console.groq.com/settings/billing
-"""
-        elif code == 'model_not_found' or 'decommissioned' in message:
-             error_message = f"""
-Error: The model '{config.GROQ_MODEL}' is not available or decommissioned.
-Message: {message}
-Please check available models or modify config.py.
-"""
-        elif code == 'invalid_api_key' or e.http_status == 401:
-             error_message = f"""
-Error: Invalid Groq API key.
-Message: {message}
-Please check that your API key is correct and properly set in the environment variable.
-"""
-        else:
-             error_message = f"Groq API error (Code: {code}): {message}"
-
-    except Exception:
-        # Fallback if parsing error details fails
-        logger.debug("Could not parse structured error details from Groq API response.", exc_info=True)
-        # Use basic string checks as fallback
-        if "insufficient_quota" in str(e) or "rate_limit_exceeded" in str(e):
-            error_message = "Error: Groq API quota exceeded or rate limit reached."
-        elif "model_not_found" in str(e) or "decommissioned" in str(e):
-            error_message = f"Error: The model '{config.GROQ_MODEL}' is not available or decommissioned."
-        elif "invalid_api_key" in str(e) or getattr(e, 'http_status', None) == 401:
-            error_message = "Error: Invalid Groq API key."
-
-    return error_message
+def dry_run(file_scanner: FileScanner) -> None:
+    """Scan only: report what a full run would describe without touching the LLM client."""
+    files, directories = file_scanner.scan()
+    for file_type, type_files in files.items():
+        logger.info(f"{file_type}: {len(type_files)} files")
+    logger.info(f"{len(directories)} directories")
+    print(file_scanner.get_project_structure())
 
-def main():
-    # Check Groq API key first
-    if not check_api_key():
-        return
-
-    logger.info("Starting main function")
+def main() -> int:
+    # Settings are read explicitly (and only once) so importing modules has no side effects
+    try:
+        config.load()
+    except ValueError as e:
+        logger.error(str(e))
+        return 1
 
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Analyze a Python project and generate documentation.')
-    parser.add_argument('--folder', type=str, required=True, help='Path to the project folder to analyze')
+    projects = parser.add_mutually_exclusive_group(required=True)
+    projects.add_argument('--folder', type=str, help='Path to the project folder to analyze')
+    projects.add_argument('--projects', type=str, nargs='+',
+                          help='Batch mode: project folders or glob patterns, analyzed in one process with a shared rate budget')
+    projects.add_argument('--projects-file', type=str,
+                          help='Batch mode: file with one project folder or glob pattern per line')
+    parser.add_argument('--include', type=str, nargs='+', default=[],
+                        help="Only analyze files matching these gitignore-style globs (e.g. 'src/**' '*.py')")
+    parser.add_argument('--exclude', type=str, nargs='+', default=[],
+                        help="Skip files and directories matching these gitignore-style globs (e.g. 'tests/' '*_pb2.py')")
     parser.add_argument('--output', type=str, help='Path to the output file (default: project_analysis.txt)')
     parser.add_argument('--debug', action='store_true', help='Enable debug logging')
+    parser.add_argument('--concurrency', type=int, default=config.DEFAULT_CONCURRENCY,
+                        help=f'Number of concurrent LLM requests (default: {config.DEFAULT_CONCURRENCY})')
+    parser.add_argument('--rpm', type=int, default=config.REQUESTS_PER_MINUTE,
+                        help='Maximum requests per minute, 0 for unlimited')
+    parser.add_argument('--tpm', type=int, default=config.TOKENS_PER_MINUTE,
+                        help='Maximum prompt tokens per minute, 0 for unlimited')
+    parser.add_argument('--no-cache', action='store_true', help='Disable the on-disk LLM response cache')
+    parser.add_argument('--refresh', action='store_true',
+                        help='Ignore cached responses but store the fresh ones in the cache')
+    parser.add_argument('--since', type=str,
+                        help='Previous output directory; only changed modules, directories and stages are redescribed')
+    parser.add_argument('--stream-scan', action='store_true',
+                        help='Start describing modules while the file scan is still running')
+    parser.add_argument('--scan-workers', type=int, default=config.SCAN_WORKERS,
+                        help=f'Threads walking the tree in --stream-scan mode (default: {config.SCAN_WORKERS})')
+    parser.add_argument('--batch', action='store_true',
+                        help='Describe small modules several at a time in one JSON request')
+    parser.add_argument('--map-reduce', action='store_true',
+                        help='Build directory and project descriptions bottom-up from module descriptions')
+    parser.add_argument('--offline-tech', action='store_true',
+                        help='Report technologies from the local import graph without an LLM call')
+    parser.add_argument('--no-skeleton', action='store_true',
+                        help='Always send truncated module source instead of an AST skeleton for large modules')
+    parser.add_argument('--stream-output', action='store_true',
+                        help='Stream module and directory descriptions straight into their files as they are generated')
+    parser.add_argument('--max-output-tokens', type=int, default=config.MAX_OUTPUT_TOKENS,
+                        help=f'Maximum tokens generated per LLM call, 0 for the provider default (default: {config.MAX_OUTPUT_TOKENS})')
+    parser.add_argument('--call-timeout', type=float, default=config.CALL_TIMEOUT,
+                        help=f'Cut off a streamed LLM call after this many seconds, 0 to disable (default: {config.CALL_TIMEOUT:g})')
+    parser.add_argument('--trace', type=str,
+                        help='Write per-stage and per-call spans to this file in Chrome trace-event format')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Only scan the project and print its structure; no API key or LLM calls needed')
+    parser.add_argument('--plan', action='store_true',
+                        help='List every LLM call the run would make with estimated tokens and wall time, without calling the API')
+    parser.add_argument('--export-batch', type=str,
+                        help='Write the prompts that still need an answer to this JSONL file for a provider batch job')
+    parser.add_argument('--import-batch', type=str,
+                        help='Load the answers of a batch job result file; writes the output once every prompt is answered')
+    parser.add_argument('--output-store', action='store_true',
+                        help='Keep module and directory descriptions in one SQLite file in the output directory '
+                             'instead of a text file each (export with python -m writer.store_export)')
+    parser.add_argument('--output-dir', type=str,
+                        help='Write into this directory and update it in place on later runs instead of a new timestamped one')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep running and redescribe changed modules whenever the project changes')
+    parser.add_argument('--poll-interval', type=float, default=config.WATCH_POLL_INTERVAL,
+                        help=f'Seconds between checks for changes in --watch mode (default: {config.WATCH_POLL_INTERVAL:g})')
+    parser.add_argument('--debounce', type=float, default=config.WATCH_DEBOUNCE,
+                        help=f'Seconds without further changes before an update starts (default: {config.WATCH_DEBOUNCE:g})')
+    parser.add_argument('--token-budget', type=int, default=0,
+                        help='Stop sending LLM calls after this many prompt and answer tokens; the rest is summarized locally')
+    parser.add_argument('--deadline', type=float, default=0,
+                        help='Stop sending LLM calls after this many seconds; the rest is summarized locally')
+    parser.add_argument('--parallel-projects', type=int, default=config.PARALLEL_PROJECTS,
+                        help=f'Projects analyzed at the same time in batch mode (default: {config.PARALLEL_PROJECTS})')
     args = parser.parse_args()
+    config.MAX_OUTPUT_TOKENS = args.max_output_tokens
+    config.CALL_TIMEOUT = args.call_timeout
 
     # Set logging level based on debug flag
     if args.debug:
         logging.getLogger().setLevel(logging.DEBUG)
         logger.debug("Debug logging enabled.")
 
-    logger.info(f"Analyzing folder: {args.folder}")
+    if args.folder:
+        logger.info(f"Analyzing folder: {args.folder}")
+        # Validate input folder
+        project_path = Path(args.folder)
+        if not project_path.exists() or not project_path.is_dir():
+            logger.error(f"{args.folder} is not a valid directory")
+            return 1
+        project_paths = [project_path]
+    else:
+        patterns = list(args.projects or [])
+        if args.projects_file:
+            try:
+                patterns += Path(args.projects_file).read_text(encoding='utf-8').splitlines()
+            except OSError as e:
+                logger.error(f"Could not read {args.projects_file}: {e}")
+                return 1
+        project_paths = resolve_projects(patterns)
+        if not project_paths:
+            logger.error("No project directories matched")
+            return 1
+        if args.watch or args.since:
+            logger.error("--watch and --since work on a single --folder only")
+            return 1
+        logger.info(f"Analyzing {len(project_paths)} projects")
+    batch_job = bool(args.export_batch or args.import_batch)
+    if (args.plan or batch_job) and args.watch:
+        logger.error("--plan, --export-batch and --import-batch cannot be combined with --watch")
+        return 1
+    if batch_job and (args.plan or args.no_cache or (args.import_batch and args.refresh)):
+        logger.error("--export-batch/--import-batch keep answers in the response cache and cannot be combined "
+                     "with --plan, --no-cache or (when importing) --refresh")
+        return 1
+
+    budgeted = args.token_budget > 0 or args.deadline > 0
+    if budgeted and (args.watch or args.plan or batch_job):
+        logger.error("--token-budget and --deadline limit a single live run and cannot be combined with --watch, "
+                     "--plan, --export-batch or --import-batch")
+        return 1
+
+    if args.dry_run:
+        for project_path in project_paths:
+            logger.info(f"Project: {project_path}")
+            dry_run(FileScanner(project_path, args.include, args.exclude))
+        return 0
 
-    # Validate input folder
-    project_path = Path(args.folder)
-    if not project_path.exists() or not project_path.is_dir():
-        logger.error(f"{args.folder} is not a valid directory")
-        return
+    if not args.plan and not batch_job and not check_api_key():
+        return 1
 
+    batch = not args.folder
+    output_dir = args.output_dir
+    if args.watch and not output_dir:
+        # Watch mode always updates one stable directory
+        output_dir = str(Path(config.DEFAULT_OUTPUT_DIR) / f"analisis-{project_path.resolve().name}")
+    if batch and not output_dir:
+        output_dir = str(Path(config.DEFAULT_OUTPUT_DIR) / f"batch-{datetime.now().strftime('%Y%m%d-%H%M%S')}")
+    since = args.since
+    if not batch and not since and output_dir and (Path(output_dir) / RunManifest.FILE_NAME).exists():
+        since = output_dir
+
+    previous_manifest = None
+    if since:
+        try:
+            previous_manifest = RunManifest.load(since)
+            logger.info(f"Incremental run against {since}")
+        except (OSError, ValueError) as e:
+            logger.error(f"Could not load manifest from {since}: {e}")
+            return 1
+    scratch_dir = None
+    if args.plan or batch_job:
+        # The pipeline runs for real against a stand-in transport, on a throwaway copy of the output
+        scratch_dir = tempfile.mkdtemp(prefix="scratch-")
+        if output_dir and Path(output_dir).is_dir():
+            shutil.copytree(output_dir, scratch_dir, dirs_exist_ok=True)
+
+    tracer = get_tracer()
+    tracer.record_events = bool(args.trace)
+
+    response_cache = None
+    transport = None
+    output_writer = None
+    run_budget = RunBudget(args.token_budget, args.deadline) if budgeted else None
+    skeleton_extractor = None
     try:
         logger.info("Initializing components")
-        # Initialize components
-        file_scanner = FileScanner(project_path)
-        project_analyzer = ProjectAnalyzer(file_scanner)
-        llm_describer = LLMDescriber()
-        output_writer = OutputWriter(args.output)
-
-        # Scan and analyze the project
-        logger.info("Starting file scan")
-        files, directories = file_scanner.scan()
-        logger.info(f"Found {len(files['python'])} Python files")
-
-        logger.info("Starting project analysis")
-        try:
-            analysis_results = project_analyzer.analyze_project()
-            logger.info("Project analysis completed")
-        except OpenAIError as e:
-            logger.error("Groq error during project analysis:")
-            logger.error(handle_groq_error(e))
-            return
-        except Exception as e:
-            logger.exception("Unexpected error during project analysis") # Logs traceback
-            return # Exit on unexpected analysis error
-
-        logger.info("Generating project description...")
-        try:
-            description = llm_describer.describe_project(analysis_results)
-        except OpenAIError as e:
-            logger.error("Groq error during project description generation:")
-            logger.error(handle_groq_error(e))
-            description = "Error: Could not generate project description due to API error." # Provide fallback
-        except Exception as e:
-             logger.exception("Unexpected error during project description generation")
-             description = "Error: Could not generate project description due to unexpected error."
-
-        logger.info("Writing analysis results...")
-        output_writer.write_analysis(analysis_results, description)
-
-        # Generate and write module descriptions
-        logger.info("Generating module descriptions...")
-        for file in files['python']:
-            logger.debug(f"Analyzing module: {file.name}")
+        # Initialize components shared by every project
+        if not args.no_cache:
+            response_cache = ResponseCache(config.CACHE_PATH, config.CACHE_MAX_BYTES,
+                                           config.CACHE_MAX_AGE_DAYS, refresh=args.refresh)
+        if args.plan:
+            transport = PlanningTransport(response_cache, args.concurrency, args.rpm, args.tpm)
+        elif batch_job:
+            if args.import_batch:
+                try:
+                    stored, failed = import_batch_results(Path(args.import_batch), response_cache)
+                except OSError as e:
+                    logger.error(f"Could not read {args.import_batch}: {e}")
+                    return 1
+                logger.info(f"Imported {stored} answers from {args.import_batch} ({failed} failed or missing)")
+            transport = BatchJobTransport(response_cache)
+        else:
+            # Deferred: the OpenAI SDK is the slowest import and only needed from here on
+            from transport.llm_transport import LLMTransport
+            rate_limiter = RateLimiter(args.rpm, args.tpm)
+            transport = LLMTransport(rate_limiter, response_cache, concurrency=args.concurrency, budget=run_budget)
+        file_scanner = None if batch else FileScanner(project_path, args.include, args.exclude)
+        if not args.no_skeleton:
+            # Streaming scans and batches target trees whose total size is not known up front
+            use_process_pool = (batch or args.stream_scan or
+                                len(file_scanner.scan()[0]['python']) >= config.PROCESS_POOL_MIN_FILES)
+            skeleton_extractor = SkeletonExtractor(use_process_pool)
+
+        def make_pipeline(file_scanner: FileScanner, output_writer: OutputWriter, manifest: Optional[RunManifest],
+                          project_transport, project_analyzer: Optional[ProjectAnalyzer] = None) -> ProjectPipeline:
+            project_analyzer = project_analyzer or ProjectAnalyzer(file_scanner, project_transport,
+                                                                   offline_technologies=args.offline_tech)
+            return ProjectPipeline(file_scanner, project_analyzer, LLMDescriber(project_transport), output_writer,
+                                   WorkerPool(args.concurrency), manifest, skeleton_extractor,
+                                   batch_modules=args.batch, map_reduce=args.map_reduce,
+                                   stream_output=args.stream_output, prioritize=budgeted)
+
+        def run_project(name: str, project_path: Path, project_output_dir: Path):
+            manifest = None
+            if (project_output_dir / RunManifest.FILE_NAME).exists():
+                try:
+                    manifest = RunManifest.load(project_output_dir)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring manifest of {name}: {e}")
+            # Tagging calls per project lets the shared transport hand out request slots fairly
+            project_writer = OutputWriter(None, project_output_dir, project_path, use_store=args.output_store)
             try:
-                content = file_scanner.get_file_content(file)
-                module_description = llm_describer.describe_module(file, content)
-                output_writer.write_module_description(file, module_description)
-            except OpenAIError as e:
-                logger.error(f"Error analyzing module {file.name}:")
-                logger.error(handle_groq_error(e))
-                # Continue with the next module
-            except Exception as e:
-                logger.exception(f"Unexpected error analyzing module {file.name}")
-                # Continue with the next module
-
-        # Generate and write directory descriptions
-        logger.info("Generating directory descriptions...")
-        for directory in directories:
-             # Ensure directory is not in ignored list before processing
-            if directory.name in config.IGNORED_DIRECTORIES or directory == project_path:
-                 continue
-            logger.debug(f"Analyzing directory: {directory.name}")
-            dir_contents = [f for f in files['python'] if f.parent == directory]
-            if dir_contents:
+                pipeline = make_pipeline(FileScanner(project_path, args.include, args.exclude), project_writer,
+                                         manifest, transport.for_tenant(name))
+                succeeded = pipeline.run(stream_scan=args.stream_scan, scan_workers=args.scan_workers)
+            finally:
+                project_writer.close()
+            return succeeded, pipeline.manifest
+
+        def run(run_output_dir: str) -> Tuple[Optional[ProjectPipeline], Optional[OutputWriter], bool]:
+            if batch:
+                runner = BatchRunner(Path(run_output_dir), run_project, args.parallel_projects,
+                                     lambda: dict(transport.tenant_requests))
+                runner.run(project_paths)
+                return None, None, True
+            output_writer = OutputWriter(args.output, run_output_dir, project_path, use_store=args.output_store)
+            pipeline = make_pipeline(file_scanner, output_writer, previous_manifest, transport)
+            return pipeline, output_writer, pipeline.run(stream_scan=args.stream_scan, scan_workers=args.scan_workers)
+
+        pipeline, output_writer, succeeded = run(scratch_dir or output_dir)
+        if batch_job and transport.complete_run:
+            # Everything is answered: run again against the cache, this time into the real output
+            logger.info("Every prompt has an answer, writing the output")
+            transport.answers_only = True
+            if output_writer:
+                output_writer.close()
+            pipeline, output_writer, succeeded = run(output_dir)
+            if transport.missing:
+                logger.warning(f"{transport.missing} prompts had no answer and were skipped; "
+                               f"run --export-batch again to describe them")
+        elif batch_job:
+            export_path = Path(args.export_batch or Path(args.import_batch).with_name(
+                f"{Path(args.import_batch).stem}-next.jsonl"))
+            count = transport.write_requests(export_path)
+            logger.info(f"{count} requests written to {export_path} ({transport.deferred} prompts depend on them and "
+                        f"follow in a later round). Submit it as a batch job and run again with --import-batch <results>")
+            return 0
+
+        if args.plan:
+            print(transport.report())
+        elif batch:
+            logger.info(f"Batch complete! Index written to {Path(output_dir) / BatchIndex.FILE_NAME}")
+        elif succeeded:
+            logger.info(f"Analysis complete! Results written to {output_writer.output_path}")
+        if batch:
+            return 0
+
+        if args.watch:
+            # Every update is an incremental run against the previous one, with all components kept warm
+            state = {"manifest": pipeline.manifest}
+
+            def update(changed_files):
+                pipeline.project_analyzer.invalidate(changed_files)
                 try:
-                    dir_description = llm_describer.describe_directory(directory, dir_contents)
-                    output_writer.write_directory_description(directory, dir_description)
-                except OpenAIError as e:
-                    logger.error(f"Error analyzing directory {directory.name}:")
-                    logger.error(handle_groq_error(e))
-                    # Continue with the next directory
-                except Exception as e:
-                    logger.exception(f"Unexpected error analyzing directory {directory.name}")
-                    # Continue with the next directory
-
-        logger.info(f"Analysis complete! Results written to {output_writer.output_path}")
+                    cycle = make_pipeline(file_scanner, output_writer, state["manifest"], transport,
+                                          pipeline.project_analyzer)
+                    if cycle.run():
+                        logger.info(f"Descriptions updated in {output_writer.output_dir}")
+                    state["manifest"] = cycle.manifest
+                except Exception:
+                    logger.exception("Update failed, waiting for the next change")
+
+            ignore_paths = [output_writer.output_dir, Path(config.CACHE_PATH).parent]
+            try:
+                ProjectWatcher(file_scanner, update, args.poll_interval, args.debounce, ignore_paths).run()
+            except KeyboardInterrupt:
+                logger.info("Stopped watching")
+        return 0 if succeeded else 1
 
     except Exception as e:
         # Catch-all for initialization or other unexpected errors
         logger.exception("An unexpected error occurred during the process") # Use logger.exception to include traceback
+        return 1
+    finally:
+        if output_writer:
+            output_writer.close()
+        if skeleton_extractor:
+            skeleton_extractor.close()
+        if transport:
+            logger.info(transport.stats())
+        if run_budget:
+            logger.info(run_budget.stats())
+        if response_cache:
+            logger.info(response_cache.stats())
+            response_cache.close()
+        if tracer.has_spans():
+            logger.info("Span summary:\n" + tracer.summary())
+        if args.trace:
+            try:
+                tracer.export_chrome_trace(args.trace)
+            except OSError as e:
+                logger.error(f"Could not write trace to {args.trace}: {e}")
+        if scratch_dir:
+            shutil.rmtree(scratch_dir, ignore_errors=True)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    sys.exit(main()) 
\ No newline at end of file
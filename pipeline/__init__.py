@@ -0,0 +1,11 @@
+from .worker_pool import WorkerPool
+from .stage_scheduler import StageScheduler
+from .tree_reducer import TreeReducer
+from .progress import ProgressDisplay
+from .watcher import ProjectWatcher
+from .batch_runner import BatchRunner, resolve_projects
+
+# ProjectPipeline is imported from pipeline.project_pipeline directly: it depends on
+# the analyzer and describer packages, which themselves use the schedulers above.
+__all__ = ['WorkerPool', 'StageScheduler', 'TreeReducer', 'ProgressDisplay', 'ProjectWatcher',
+           'BatchRunner', 'resolve_projects']
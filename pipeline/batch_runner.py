@@ -0,0 +1,74 @@
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Tuple
+import glob
+from pipeline.worker_pool import WorkerPool
+from writer.batch_index import BatchIndex
+from writer.run_manifest import RunManifest
+import logging
+
+logger = logging.getLogger(__name__)
+
+def resolve_projects(patterns: Iterable[str]) -> List[Path]:
+    """Expand project paths and glob patterns into a sorted, de-duplicated list of directories."""
+    projects = {}
+    for pattern in patterns:
+        pattern = pattern.strip()
+        if not pattern or pattern.startswith("#"):
+            continue
+        matches = sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        for match in matches:
+            path = Path(match)
+            if path.is_dir():
+                projects.setdefault(path.resolve(), path)
+            elif not glob.has_magic(pattern):
+                logger.warning(f"Skipping {match}: not a directory")
+    return [projects[key] for key in sorted(projects)]
+
+class BatchRunner:
+    """Analyzes many projects in one process.
+
+    Up to `parallel_projects` project pipelines run at once. They share one
+    transport, so the rate limit, the adaptive concurrency and the response
+    cache are global, and the transport hands out request slots round-robin
+    per project. Each project writes into its own subdirectory of `output_dir`.
+    """
+
+    def __init__(self, output_dir: Path, run_project: Callable[[str, Path, Path], Tuple[bool, RunManifest]],
+                 parallel_projects: int, requests_by_project: Callable[[], Dict[str, int]] = dict):
+        self.output_dir = Path(output_dir)
+        self.run_project = run_project
+        self.parallel_projects = max(1, parallel_projects)
+        self.requests_by_project = requests_by_project
+
+    def _project_names(self, projects: List[Path]) -> List[Tuple[str, Path]]:
+        # Directory names may repeat across roots (services/api, tools/api): suffix them
+        seen: Dict[str, int] = {}
+        named = []
+        for project in projects:
+            name = project.resolve().name
+            seen[name] = seen.get(name, 0) + 1
+            named.append((name if seen[name] == 1 else f"{name}-{seen[name]}", project))
+        return named
+
+    def run(self, projects: List[Path]) -> BatchIndex:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        index = BatchIndex(self.output_dir)
+        logger.info(f"Analyzing {len(projects)} projects, {self.parallel_projects} at a time")
+
+        def analyze(job: Tuple[str, Path]) -> Tuple[bool, RunManifest]:
+            name, project = job
+            logger.info(f"Starting project {name} ({project})")
+            return self.run_project(name, project, self.output_dir / name)
+
+        for (name, project), result, error in WorkerPool(self.parallel_projects).run(analyze, self._project_names(projects)):
+            requests = self.requests_by_project().get(name, 0)
+            if error is not None:
+                logger.error(f"Project {name} failed: {error}")
+                index.add(name, project, self.output_dir / name, False, requests=requests, error=str(error))
+                continue
+            succeeded, manifest = result
+            logger.info(f"Finished project {name}")
+            index.add(name, project, self.output_dir / name, succeeded, len(manifest.modules),
+                      len(manifest.directories), requests)
+        index.write()
+        return index
@@ -0,0 +1,67 @@
+from typing import Dict
+import sys
+import threading
+import time
+
+class ProgressDisplay:
+    """Single live status line on stderr showing which descriptions are streaming right now.
+
+    Labels must be unique per item, e.g. paths relative to the project, since
+    two items streaming under one label would overwrite each other.
+    """
+
+    REFRESH_INTERVAL = 0.1  # seconds between redraws
+
+    def __init__(self, enabled: bool = None):
+        self.enabled = sys.stderr.isatty() if enabled is None else enabled
+        self._active: Dict[str, int] = {}
+        self._completed = 0
+        self._lock = threading.Lock()
+        self._last_render = 0.0
+
+    def track(self, label: str, sink):
+        """Wrap a stream sink so everything written to it is reflected in the status line."""
+        return _TrackedSink(self, label, sink)
+
+    def _update(self, label: str, chars: int, done: bool = False) -> None:
+        with self._lock:
+            if done:
+                self._active.pop(label, None)
+                self._completed += 1
+            else:
+                self._active[label] = chars
+            now = time.monotonic()
+            if not self.enabled or (not done and now - self._last_render < self.REFRESH_INTERVAL):
+                return
+            self._last_render = now
+            active = ", ".join(f"{name} ({count} karakter)" for name, count in list(self._active.items())[:3])
+            more = f" +{len(self._active) - 3}" if len(self._active) > 3 else ""
+            line = f"Selesai: {self._completed} | Berjalan: {active or '-'}{more}"
+            width = 120
+            sys.stderr.write("\r" + line[:width].ljust(width))
+            sys.stderr.flush()
+
+    def close(self) -> None:
+        if self.enabled and self._completed:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+class _TrackedSink:
+    def __init__(self, display: ProgressDisplay, label: str, sink):
+        self._display = display
+        self._label = label
+        self._sink = sink
+        self._chars = 0
+
+    def write(self, text: str) -> None:
+        self._sink.write(text)
+        self._chars += len(text)
+        self._display._update(self._label, self._chars)
+
+    def reset(self) -> None:
+        self._sink.reset()
+        self._chars = 0
+        self._display._update(self._label, 0)
+
+    def done(self) -> None:
+        self._display._update(self._label, self._chars, done=True)
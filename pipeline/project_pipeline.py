@@ -0,0 +1,532 @@
+from collections import Counter
+from pathlib import Path
+from typing import Callable, ContextManager, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+import config
+from scanner.file_scanner import FileScanner
+from analyzer.project_analyzer import CONTEXT_STAGES, DETAIL_STAGES, ProjectAnalyzer
+from analyzer.module_skeleton import SkeletonExtractor
+from describer.llm_describer import LLMDescriber
+from describer.local_describer import (describe_project_locally, describe_trivial_module, summarize_directory_locally,
+                                       summarize_module_locally)
+from writer.output_writer import OutputWriter
+from writer.run_manifest import RunManifest
+from pipeline.worker_pool import WorkerPool
+from pipeline.stage_scheduler import StageScheduler
+from pipeline.tree_reducer import TreeReducer
+from pipeline.progress import ProgressDisplay
+from transport.errors import api_errors, handle_groq_error
+from transport.streaming import is_truncated
+from budget.run_budget import BudgetExhausted
+from budget.token_counter import count_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProjectPipeline:
+    """Runs the scan, project summary, module and directory phases for one project."""
+
+    def __init__(self, file_scanner: FileScanner, project_analyzer: ProjectAnalyzer,
+                 llm_describer: LLMDescriber, output_writer: OutputWriter, worker_pool: WorkerPool,
+                 previous_manifest: Optional[RunManifest] = None,
+                 skeleton_extractor: Optional[SkeletonExtractor] = None,
+                 batch_modules: bool = False, map_reduce: bool = False, stream_output: bool = False,
+                 prioritize: bool = False):
+        self.file_scanner = file_scanner
+        self.project_path = file_scanner.project_path
+        self.project_analyzer = project_analyzer
+        self.llm_describer = llm_describer
+        self.output_writer = output_writer
+        self.worker_pool = worker_pool
+        self.previous_manifest = previous_manifest
+        self.skeleton_extractor = skeleton_extractor
+        self.batch_modules = batch_modules
+        self.map_reduce = map_reduce
+        self.stream_output = stream_output
+        # Under a token budget or deadline the most important modules are described first
+        self.prioritize = prioritize
+        self.progress = ProgressDisplay()
+        self.module_descriptions: Dict[Path, str] = {}
+        self.manifest = RunManifest(output_writer.output_dir)
+        # Paths whose description file was already written while the answer streamed in
+        self._streamed: Set[Path] = set()
+        # Content hash deduplication: hash per described file, finished descriptions and copies waiting for them
+        self._content_hashes: Dict[Path, str] = {}
+        self._content_descriptions: Dict[str, str] = {}
+        self._duplicates_waiting: Dict[str, List[Path]] = {}
+        # Modules and directories summarized locally because the run budget ran out; never added to the manifest
+        self.local_fallbacks: Set[Path] = set()
+        # Streamed descriptions cut off by the call timeout; written but never added to the manifest either
+        self.truncated: Set[Path] = set()
+        self._fan_in: Counter = Counter()
+
+    def run(self, stream_scan: bool = False, scan_workers: Optional[int] = None) -> bool:
+        """Run all phases; returns False when the project summary could not be produced."""
+        scan_workers = config.SCAN_WORKERS if scan_workers is None else scan_workers
+        # Filled by the two analysis stages below; the project description fingerprints all of them
+        self.project_analyzer.stage_records = {}
+        scheduler = StageScheduler()
+        if stream_scan:
+            # Describe modules while the walk is still discovering them; everything else needs the full index
+            logger.info("Starting streaming file scan")
+            if self.prioritize:
+                logger.info("Modules are described in discovery order: ranking them needs the full scan")
+            # Modules start before the analysis exists, so no call of this run gets the project context
+            scheduler.add("modules", lambda _: self.describe_modules(self._stream_python_files(scan_workers)))
+            scheduler.add("scan", lambda _: self._record_scan(), depends_on=("modules",))
+            scheduler.add("context", lambda _: self.analyze_stages(CONTEXT_STAGES), depends_on=("scan",))
+        else:
+            logger.info("Starting file scan")
+            scheduler.add("scan", lambda _: self._record_scan())
+            # Module and directory prompts share the project context: purpose and technologies only
+            scheduler.add("context", lambda _: self.analyze_stages(CONTEXT_STAGES, with_context=True),
+                          depends_on=("scan",))
+            scheduler.add("modules", lambda _: self.describe_modules(self._module_order(self.file_scanner.files['python'])),
+                          depends_on=("scan", "context"))
+        # Structure and notes are quoted by the project description alone, so nothing else waits for them
+        scheduler.add("analysis", lambda _: self.analyze_stages(DETAIL_STAGES), depends_on=("scan",))
+        if self.map_reduce:
+            # Module descriptions reduce into directory summaries, which reduce into the project description
+            scheduler.add("directories", lambda _: self.reduce_directories(), depends_on=("scan", "modules"))
+            scheduler.add("project_summary",
+                          lambda results: self.summarize_project(results["context"], results["analysis"],
+                                                                 results["directories"]),
+                          depends_on=("context", "analysis", "directories"))
+        else:
+            # The project summary and the directory descriptions don't need the module descriptions
+            scheduler.add("project_summary",
+                          lambda results: self.summarize_project(results["context"], results["analysis"]),
+                          depends_on=("context", "analysis"))
+            scheduler.add("directories", lambda _: self.describe_directories(), depends_on=("scan", "context"))
+        try:
+            results = scheduler.run()
+        finally:
+            self.progress.close()
+        self._remove_stale_outputs()
+        # The manifest must not point at descriptions still queued for the store
+        self.output_writer.flush()
+        self.manifest.save()
+        if self.local_fallbacks:
+            logger.warning(f"Run budget used up: {len(self.local_fallbacks)} modules and directories were summarized "
+                           f"locally and will be described on the next run")
+        if self.truncated:
+            logger.warning(f"{len(self.truncated)} modules and directories were cut off by the call timeout "
+                           f"and will be described again on the next run")
+        return results["project_summary"]
+
+    def _record_scan(self) -> None:
+        files, _ = self.file_scanner.scan()
+        logger.info(f"Found {len(files['python'])} Python files")
+        self.manifest.record_files(self.file_scanner, files, self.previous_manifest)
+
+    def _stream_python_files(self, scan_workers: int) -> Iterator[Path]:
+        for file_type, file in self.file_scanner.iter_scan(workers=scan_workers):
+            if file_type == 'python':
+                self.manifest.record_file(self.file_scanner, file, self.previous_manifest)
+                yield file
+
+    def _rel_path(self, path: Path) -> str:
+        return path.relative_to(self.project_path).as_posix()
+
+    def _output_rel_path(self, output_path: Path) -> str:
+        return output_path.relative_to(self.output_writer.output_dir).as_posix()
+
+    def _carry_over(self, previous_output: str, output_path: Path) -> bool:
+        return self.output_writer.carry_over(self.previous_manifest.output_dir, previous_output, output_path)
+
+    def _remove_stale_outputs(self) -> None:
+        """When updating an output directory in place, delete descriptions of modules and directories that are gone."""
+        if not self.previous_manifest or self.previous_manifest.output_dir.resolve() != self.output_writer.output_dir.resolve():
+            return
+        in_use = ({entry["output"] for entry in self.manifest.modules.values()}
+                  | {entry["output"] for entry in self.manifest.directories.values()})
+        stale = [entry["output"] for rel_path, entry in self.previous_manifest.modules.items()
+                 if not (self.project_path / rel_path).is_file()]
+        stale += [entry["output"] for rel_path, entry in self.previous_manifest.directories.items()
+                  if not (self.project_path / rel_path).is_dir()]
+        for output in stale:
+            if output not in in_use:
+                logger.info(f"Removing stale description {output}")
+                self.output_writer.remove_description(output)
+
+    def _streamed_call(self, path: Path, stream: ContextManager, call: Callable) -> str:
+        """Run an LLM call whose answer is written into its output file as it arrives."""
+        with stream as sink:
+            tracked = self.progress.track(self._rel_path(path), sink)
+            try:
+                description = call(tracked)
+            finally:
+                tracked.done()
+        self._streamed.add(path)
+        return description
+
+    def analyze_stages(self, names: Tuple[str, ...], with_context: bool = False) -> Optional[Dict[str, str]]:
+        """Run some analysis stages; with `with_context` their results become the describer's project context."""
+        logger.info(f"Starting project analysis: {', '.join(names)}")
+        try:
+            analysis_results = self.project_analyzer.analyze_stages(
+                names, self.previous_manifest.stages if self.previous_manifest else None
+            )
+            self.manifest.stages.update({name: self.project_analyzer.stage_records[name]
+                                         for name in names if name in self.project_analyzer.stage_records})
+            logger.info(f"Project analysis completed: {', '.join(names)}")
+        except api_errors() as e:
+            logger.error("Groq error during project analysis:")
+            logger.error(handle_groq_error(e))
+            return None
+        except Exception as e:
+            logger.exception("Unexpected error during project analysis") # Logs traceback
+            return None # Exit on unexpected analysis error
+        if with_context:
+            self.llm_describer.set_project_context(analysis_results)
+        return analysis_results
+
+    def summarize_project(self, context_results: Optional[Dict[str, str]], detail_results: Optional[Dict[str, str]],
+                          tree_summary: Optional[str] = None) -> bool:
+        """Run describe_project on the results of both analysis stages, then write the main analysis file."""
+        if context_results is None or detail_results is None:
+            return False
+        analysis_results = {**context_results, **detail_results}
+        logger.info("Generating project description...")
+        description_fingerprint = self.project_analyzer.stages_fingerprint(tree_summary or "")
+        previous_description = self.previous_manifest.stages.get("project_description") if self.previous_manifest else None
+        try:
+            if previous_description and previous_description["fingerprint"] == description_fingerprint:
+                logger.info("Reusing unchanged project description")
+                description = previous_description["result"]
+            else:
+                description = self.llm_describer.describe_project(analysis_results, tree_summary)
+            self.manifest.stages["project_description"] = {"fingerprint": description_fingerprint, "result": description}
+        except BudgetExhausted as e:
+            logger.warning(f"Run budget used up, project description assembled locally: {e}")
+            description = describe_project_locally(analysis_results)
+        except api_errors() as e:
+            logger.error("Groq error during project description generation:")
+            logger.error(handle_groq_error(e))
+            description = "Error: Could not generate project description due to API error." # Provide fallback
+        except Exception as e:
+             logger.exception("Unexpected error during project description generation")
+             description = "Error: Could not generate project description due to unexpected error."
+
+        logger.info("Writing analysis results...")
+        self.output_writer.write_analysis(analysis_results, description)
+        return True
+
+    def _local_description(self, file: Path) -> Optional[str]:
+        try:
+            if self.file_scanner.get_file_stat(file).st_size > config.TRIVIAL_MODULE_MAX_CHARS:
+                return None
+        except OSError:
+            return None
+        return describe_trivial_module(file, self.file_scanner.get_file_content(file))
+
+    def _module_order(self, python_files: List[Path]) -> List[Path]:
+        """Most important modules first when prioritizing, so a limited budget is spent on them."""
+        if not self.prioritize:
+            return python_files
+        import_graph = self.project_analyzer.get_import_graph()
+        self._fan_in = import_graph.fan_in()
+
+        def importance(file: Path) -> float:
+            try:
+                size = self.file_scanner.get_file_stat(file).st_size
+            except OSError:
+                size = 0
+            return import_graph.importance(file, size, self._fan_in)
+
+        return sorted(python_files, key=importance, reverse=True)
+
+    def _module_jobs(self, python_files: Iterable[Path]) -> Iterator[Path]:
+        """Yield the modules that need an LLM call.
+
+        Unchanged modules are carried over, trivial ones are described locally
+        and byte-identical copies wait for the description of the first one.
+        """
+        carried_over = trivial = duplicates = 0
+        context = self.llm_describer.context_fingerprint()
+        for file in python_files:
+            module_rel_path = self._rel_path(file)
+            output_path = self.output_writer.module_output_path(file)
+            if (self.manifest.module_unchanged(module_rel_path, self.previous_manifest, context)
+                    and self._carry_over(self.previous_manifest.modules[module_rel_path]["output"], output_path)):
+                self.manifest.modules[module_rel_path] = {"output": self._output_rel_path(output_path), "context": context}
+                carried_over += 1
+                if self.map_reduce:
+                    try:
+                        self.module_descriptions[file] = self.output_writer.read_description(output_path)
+                    except (OSError, ValueError) as e:
+                        logger.warning(f"Could not read carried over description of {file.name}: {e}")
+                continue
+            local_description = self._local_description(file)
+            if local_description is not None:
+                trivial += 1
+                self._write_module(file, local_description, None)
+                continue
+            try:
+                digest = self._content_hashes[file] = self.file_scanner.get_file_hash(file)
+            except OSError:
+                yield file
+                continue
+            if digest in self._content_descriptions:
+                duplicates += 1
+                self._write_module(file, self._content_descriptions[digest], None)
+            elif digest in self._duplicates_waiting:
+                duplicates += 1
+                self._duplicates_waiting[digest].append(file)
+            else:
+                self._duplicates_waiting[digest] = []
+                yield file
+        if self.previous_manifest:
+            logger.info(f"{carried_over} unchanged modules carried over")
+        if trivial or duplicates:
+            logger.info(f"{trivial} trivial modules described locally, {duplicates} duplicate modules reuse another description")
+
+    def _batched(self, module_files: Iterable[Path]) -> Iterator[List[Path]]:
+        """Group small modules into batches up to the token budget; larger ones stay on their own."""
+        batch: List[Path] = []
+        batch_tokens = 0
+        for file in module_files:
+            try:
+                size = self.file_scanner.get_file_stat(file).st_size
+            except OSError:
+                size = config.BATCH_MAX_MODULE_CHARS + 1
+            if not self.batch_modules or size > config.BATCH_MAX_MODULE_CHARS:
+                yield [file]
+                continue
+            tokens = size // config.CHARS_PER_TOKEN
+            if batch and (batch_tokens + tokens > config.BATCH_TOKEN_BUDGET or len(batch) >= config.BATCH_MAX_MODULES):
+                yield batch
+                batch, batch_tokens = [], 0
+            batch.append(file)
+            batch_tokens += tokens
+        if batch:
+            yield batch
+
+    def _describe_module(self, file: Path) -> str:
+        logger.debug(f"Analyzing module: {file.name}")
+        size = self.file_scanner.get_file_stat(file).st_size
+        skeleton = None
+        if self.skeleton_extractor and self.skeleton_extractor.min_chars < size <= config.MAX_FILE_SIZE:
+            # Possibly over the token budget: a skeleton needs the whole source, and sources that fit are sent whole
+            content = self.file_scanner.get_file_content(file)
+            if count_tokens(content) > config.MAX_TOKENS_PER_FILE:
+                skeleton = self.skeleton_extractor.extract(file, content)
+        else:
+            content = self.file_scanner.get_file_tokens(file, config.MAX_TOKENS_PER_FILE, config.MODULE_SAMPLE)
+        if self.stream_output:
+            stream = self.output_writer.open_module_stream(file, self.file_scanner.file_hashes.get(file))
+            return self._streamed_call(file, stream,
+                                       lambda sink: self.llm_describer.describe_module(file, content, skeleton, sink))
+        return self.llm_describer.describe_module(file, content, skeleton)
+
+    def _describe_module_batch(self, files: List[Path]) -> List[Tuple[Path, Optional[str], Optional[BaseException]]]:
+        if len(files) == 1:
+            return [(files[0], self._describe_module(files[0]), None)]
+        logger.debug(f"Analyzing batch of {len(files)} modules")
+        modules = {self._rel_path(file): self.file_scanner.get_file_tokens(file, config.MAX_TOKENS_PER_FILE)
+                   for file in files}
+        try:
+            descriptions = self.llm_describer.describe_modules_batch(modules)
+        except BudgetExhausted as e:
+            return [(file, None, e) for file in files]
+        except Exception as e:
+            logger.warning(f"Batched description of {len(files)} modules failed, describing them one by one: {e}")
+            descriptions = {}
+        results = []
+        for file in files:
+            description = descriptions.get(self._rel_path(file))
+            if description:
+                results.append((file, description, None))
+                continue
+            # Missing or malformed in the batched answer: retry this module on its own
+            logger.debug(f"Batched answer had no description for {file.name}, retrying individually")
+            try:
+                results.append((file, self._describe_module(file), None))
+            except Exception as e:
+                results.append((file, None, e))
+        return results
+
+    def describe_modules(self, python_files: Iterable[Path]) -> None:
+        # Generate and write module descriptions
+        logger.info(f"Generating module descriptions with {self.worker_pool.max_workers} workers...")
+        jobs = self._batched(self._module_jobs(python_files))
+        for files, results, error in self.worker_pool.run(self._describe_module_batch, jobs):
+            for file, module_description, module_error in results or [(file, None, error) for file in files]:
+                self._write_module(file, module_description, module_error)
+
+    def _write_module(self, file: Path, module_description: Optional[str], error: Optional[BaseException]) -> None:
+        # Byte-identical copies share the outcome of the one module that was sent to the LLM
+        digest = self._content_hashes.get(file)
+        duplicates = self._duplicates_waiting.pop(digest, []) if digest else []
+        if digest and error is None:
+            self._content_descriptions[digest] = module_description
+        for duplicate in duplicates:
+            self._write_module(duplicate, module_description, error)
+        try:
+            if error is not None:
+                raise error
+            if file not in self._streamed:
+                self.output_writer.write_module_description(file, module_description,
+                                                            self.file_scanner.file_hashes.get(file))
+            self.module_descriptions[file] = module_description
+            if is_truncated(module_description):
+                self.truncated.add(file)
+                return
+            self.manifest.modules[self._rel_path(file)] = {
+                "output": self._output_rel_path(self.output_writer.module_output_path(file)),
+                "context": self.llm_describer.context_fingerprint()
+            }
+        except BudgetExhausted:
+            self._write_local_module(file)
+        except api_errors() as e:
+            logger.error(f"Error analyzing module {file.name}:")
+            logger.error(handle_groq_error(e))
+            # Continue with the next module
+        except Exception as e:
+            logger.exception(f"Unexpected error analyzing module {file.name}")
+            # Continue with the next module
+
+    def _write_local_module(self, file: Path) -> None:
+        # Written but left out of the manifest, so the next run describes the module properly
+        try:
+            size = self.file_scanner.get_file_stat(file).st_size
+        except OSError:
+            size = 0
+        content = self.file_scanner.get_file_content(file, None if size <= config.MAX_FILE_SIZE else config.MAX_FILE_SIZE)
+        description = summarize_module_locally(file, content, self._fan_in[file])
+        self.output_writer.write_module_description(file, description)
+        self.module_descriptions[file] = description
+        self.local_fallbacks.add(file)
+
+    def _directory_jobs(self) -> List[Tuple[Path, List[Path]]]:
+        directory_jobs = []
+        context = self.llm_describer.context_fingerprint()
+        for directory in self.file_scanner.directories:
+             # Ensure directory is not in ignored list before processing
+            if directory.name in config.IGNORED_DIRECTORIES or directory == self.project_path:
+                 continue
+            dir_contents = self.file_scanner.get_directory_files(directory, 'python')
+            if not dir_contents:
+                continue
+            dir_rel_path = self._rel_path(directory)
+            members = sorted(f.name for f in dir_contents)
+            output_path = self.output_writer.directory_output_path(directory)
+            if (self.manifest.directory_unchanged(dir_rel_path, members, self.previous_manifest, context)
+                    and self._carry_over(self.previous_manifest.directories[dir_rel_path]["output"], output_path)):
+                self.manifest.directories[dir_rel_path] = {
+                    "members": members,
+                    "output": self._output_rel_path(output_path),
+                    "context": context
+                }
+            else:
+                directory_jobs.append((directory, dir_contents))
+        return directory_jobs
+
+    def describe_directories(self) -> None:
+        # Generate and write directory descriptions
+        logger.info("Generating directory descriptions...")
+
+        def describe_directory(job: Tuple[Path, List[Path]]) -> str:
+            directory, dir_contents = job
+            logger.debug(f"Analyzing directory: {directory.name}")
+            if self.stream_output:
+                return self._streamed_call(
+                    directory, self.output_writer.open_directory_stream(directory),
+                    lambda sink: self.llm_describer.describe_directory(directory, dir_contents, sink)
+                )
+            return self.llm_describer.describe_directory(directory, dir_contents)
+
+        for (directory, dir_contents), dir_description, error in self.worker_pool.run(describe_directory, self._directory_jobs()):
+            try:
+                if error is not None:
+                    raise error
+                if directory not in self._streamed:
+                    self.output_writer.write_directory_description(directory, dir_description)
+                if is_truncated(dir_description):
+                    self.truncated.add(directory)
+                    continue
+                self.manifest.directories[self._rel_path(directory)] = {
+                    "members": sorted(f.name for f in dir_contents),
+                    "output": self._output_rel_path(self.output_writer.directory_output_path(directory)),
+                    "context": self.llm_describer.context_fingerprint()
+                }
+            except BudgetExhausted:
+                self.output_writer.write_directory_description(
+                    directory, summarize_directory_locally(directory, [f.name for f in dir_contents])
+                )
+                self.local_fallbacks.add(directory)
+            except api_errors() as e:
+                logger.error(f"Error analyzing directory {directory.name}:")
+                logger.error(handle_groq_error(e))
+                # Continue with the next directory
+            except Exception as e:
+                logger.exception(f"Unexpected error analyzing directory {directory.name}")
+                # Continue with the next directory
+
+    def reduce_directories(self) -> Optional[str]:
+        """Map-reduce mode: summarize directories bottom-up from module descriptions.
+
+        Unchanged subtrees produce byte-identical reduce prompts, so the response
+        cache answers them and only the ancestors of a changed module are re-reduced.
+        Returns the root summary used for the project description.
+        """
+        logger.info("Reducing module descriptions into directory summaries...")
+        # Only directories with Python files somewhere below them take part
+        has_python: Dict[Path, bool] = {}
+        for directory in sorted(self.file_scanner.directories, key=lambda d: len(d.parts), reverse=True):
+            has_python[directory] = bool(self.file_scanner.get_directory_files(directory, 'python')) or any(
+                has_python.get(child) for child in self.file_scanner.subdirectories.get(directory, [])
+            )
+        children = {
+            directory: [child for child in self.file_scanner.subdirectories.get(directory, []) if has_python.get(child)]
+            for directory in self.file_scanner.directories if has_python.get(directory)
+        }
+        if not has_python.get(self.project_path):
+            return None
+
+        def reduce_directory(directory: Path, child_summaries: Dict[Path, str]) -> Optional[str]:
+            module_summaries = {
+                file.name: self.module_descriptions[file]
+                for file in self.file_scanner.get_directory_files(directory, 'python')
+                if file in self.module_descriptions
+            }
+            subdirectory_summaries = {child.name: summary for child, summary in child_summaries.items()}
+            if not module_summaries and not subdirectory_summaries:
+                return None
+            writes_file = directory != self.project_path and directory.name not in config.IGNORED_DIRECTORIES
+            recorded = True
+            try:
+                if self.stream_output and writes_file:
+                    summary = self._streamed_call(
+                        directory, self.output_writer.open_directory_stream(directory),
+                        lambda sink: self.llm_describer.reduce_directory(directory, module_summaries,
+                                                                         subdirectory_summaries, sink)
+                    )
+                else:
+                    summary = self.llm_describer.reduce_directory(directory, module_summaries, subdirectory_summaries)
+            except BudgetExhausted:
+                summary = summarize_directory_locally(directory, list(module_summaries), list(subdirectory_summaries))
+                self.local_fallbacks.add(directory)
+                recorded = False
+            except api_errors() as e:
+                logger.error(f"Error analyzing directory {directory.name}:")
+                logger.error(handle_groq_error(e))
+                return None
+            except Exception as e:
+                logger.exception(f"Unexpected error analyzing directory {directory.name}")
+                return None
+            if is_truncated(summary):
+                self.truncated.add(directory)
+                recorded = False
+            if writes_file:
+                if directory not in self._streamed:
+                    self.output_writer.write_directory_description(directory, summary)
+                if recorded:
+                    self.manifest.directories[self._rel_path(directory)] = {
+                        "members": sorted(f.name for f in self.file_scanner.get_directory_files(directory, 'python')),
+                        "output": self._output_rel_path(self.output_writer.directory_output_path(directory)),
+                        "context": self.llm_describer.context_fingerprint()
+                    }
+            return summary
+
+        results = TreeReducer(children, self.worker_pool.max_workers).run(self.project_path, reduce_directory)
+        return results.get(self.project_path)
@@ -0,0 +1,81 @@
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, Optional
+import time
+from tracing import span
+import logging
+
+logger = logging.getLogger(__name__)
+
+class StageScheduler:
+    """Runs named stages as a dependency DAG, starting each one as soon as its dependencies finish.
+
+    Every stage function receives a dict with the results of the stages it
+    depends on. If a stage raises, no new stages are started and the first
+    error is re-raised once the running ones have finished.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers
+        self._stages: Dict[str, Callable[[Dict[str, Any]], Any]] = {}
+        self._dependencies: Dict[str, tuple] = {}
+
+    def add(self, name: str, func: Callable[[Dict[str, Any]], Any], depends_on: Iterable[str] = ()) -> None:
+        if name in self._stages:
+            raise ValueError(f"Stage already defined: {name}")
+        self._stages[name] = func
+        self._dependencies[name] = tuple(depends_on)
+
+    def _check(self) -> None:
+        for name, dependencies in self._dependencies.items():
+            for dependency in dependencies:
+                if dependency not in self._stages:
+                    raise ValueError(f"Stage {name} depends on unknown stage {dependency}")
+        # Kahn's algorithm, only to reject cycles before anything runs
+        remaining = {name: set(dependencies) for name, dependencies in self._dependencies.items()}
+        while remaining:
+            ready = [name for name, dependencies in remaining.items() if not dependencies]
+            if not ready:
+                raise ValueError(f"Stage dependency cycle between: {', '.join(sorted(remaining))}")
+            for name in ready:
+                del remaining[name]
+            for dependencies in remaining.values():
+                dependencies.difference_update(ready)
+
+    def _run_stage(self, name: str, inputs: Dict[str, Any]) -> Any:
+        with span(f"stage.{name}", "stage"):
+            return self._stages[name](inputs)
+
+    def run(self) -> Dict[str, Any]:
+        self._check()
+        results: Dict[str, Any] = {}
+        started: Dict[Future, str] = {}
+        start_times: Dict[str, float] = {}
+        waiting = dict(self._dependencies)
+        first_error: Optional[BaseException] = None
+        max_workers = self.max_workers or max(1, len(self._stages))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="stage") as executor:
+            while waiting or started:
+                if first_error is None:
+                    for name in [name for name, deps in waiting.items() if all(dep in results for dep in deps)]:
+                        del waiting[name]
+                        inputs = {dep: results[dep] for dep in self._dependencies[name]}
+                        start_times[name] = time.monotonic()
+                        logger.debug(f"Starting stage: {name}")
+                        started[executor.submit(self._run_stage, name, inputs)] = name
+                elif not started:
+                    break
+                if not started:
+                    break
+                done, _ = wait(started, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = started.pop(future)
+                    error = future.exception()
+                    if error is not None:
+                        logger.debug(f"Stage {name} failed: {error}")
+                        first_error = first_error or error
+                        continue
+                    results[name] = future.result()
+                    logger.info(f"Finished stage {name} in {time.monotonic() - start_times[name]:.2f}s")
+        if first_error is not None:
+            raise first_error
+        return results
@@ -0,0 +1,59 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TreeReducer:
+    """Bottom-up reduction over a tree, running each node as soon as all of its children are done.
+
+    Siblings reduce in parallel. A node whose reduction fails yields None and
+    its parent is reduced from the remaining children.
+    """
+
+    def __init__(self, children: Dict[Hashable, List[Hashable]], max_workers: int = 1):
+        self.children = children
+        self.max_workers = max(1, max_workers)
+
+    def run(self, root: Hashable, reduce_fn: Callable[[Hashable, Dict[Hashable, Any]], Any]) -> Dict[Hashable, Optional[Any]]:
+        parents: Dict[Hashable, Hashable] = {}
+        nodes = [root]
+        for node in nodes:  # Grows while iterating: breadth-first collection of the subtree
+            for child in self.children.get(node, []):
+                parents[child] = node
+                nodes.append(child)
+
+        results: Dict[Hashable, Optional[Any]] = {}
+        remaining = {node: len(self.children.get(node, [])) for node in nodes}
+        lock = threading.Lock()
+        all_done = threading.Event()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="reducer") as executor:
+            def reduce_node(node: Hashable) -> None:
+                child_results = {
+                    child: results[child] for child in self.children.get(node, [])
+                    if results.get(child) is not None
+                }
+                try:
+                    result = reduce_fn(node, child_results)
+                except Exception:
+                    logger.exception(f"Unexpected error reducing {node}")
+                    result = None
+                with lock:
+                    results[node] = result
+                    parent = parents.get(node)
+                    parent_ready = False
+                    if parent is not None:
+                        remaining[parent] -= 1
+                        parent_ready = remaining[parent] == 0
+                    if len(results) == len(nodes):
+                        all_done.set()
+                if parent_ready:
+                    executor.submit(reduce_node, parent)
+
+            for node in nodes:
+                if remaining[node] == 0:
+                    executor.submit(reduce_node, node)
+            all_done.wait()
+        return results
@@ -0,0 +1,52 @@
+from pathlib import Path
+from typing import Callable, Iterable, Set
+import threading
+import time
+from scanner.file_scanner import FileScanner
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ProjectWatcher:
+    """Polls a project for changes and hands each settled burst of them to a callback.
+
+    Every `poll_interval` seconds the scanner index is refreshed in place. Changes
+    are collected until no new ones arrive for `debounce` seconds, so saving many
+    files at once (a checkout, a formatter run) triggers a single update.
+    Paths below `ignore_paths`, such as the tool's own output, are not changes.
+    """
+
+    def __init__(self, file_scanner: FileScanner, on_change: Callable[[Set[Path]], None],
+                 poll_interval: float = 2.0, debounce: float = 1.0, ignore_paths: Iterable[Path] = ()):
+        self.file_scanner = file_scanner
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.ignore_paths = [Path(path).resolve() for path in ignore_paths]
+        self._stop = threading.Event()
+
+    def _ignored(self, path: Path) -> bool:
+        resolved = path.resolve()
+        return any(resolved == ignored or ignored in resolved.parents for ignored in self.ignore_paths)
+
+    def poll(self) -> Set[Path]:
+        return {path for path in self.file_scanner.rescan() if not self._ignored(path)}
+
+    def run(self) -> None:
+        logger.info(f"Watching {self.file_scanner.project_path} for changes (Ctrl+C to stop)")
+        pending: Set[Path] = set()
+        last_change = 0.0
+        while not self._stop.wait(self.poll_interval):
+            changed = self.poll()
+            if changed:
+                pending |= changed
+                last_change = time.monotonic()
+                logger.debug(f"{len(changed)} changed files, waiting for changes to settle")
+                continue
+            if pending and time.monotonic() - last_change >= self.debounce:
+                logger.info(f"{len(pending)} files changed, updating descriptions")
+                batch, pending = pending, set()
+                self.on_change(batch)
+
+    def stop(self) -> None:
+        self._stop.set()
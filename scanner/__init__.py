@@ -1,3 +1,5 @@
 from .file_scanner import FileScanner
+from .path_filter import IgnoreRules, PathFilter, compile_pattern
+from .file_sniffer import sniff_skip_reason
 
-__all__ = ['FileScanner'] 
\ No newline at end of file
+__all__ = ['FileScanner', 'IgnoreRules', 'PathFilter', 'compile_pattern', 'sniff_skip_reason']
@@ -0,0 +1,102 @@
+import codecs
+import mmap
+from pathlib import Path
+from typing import Optional, Tuple
+import config
+
+SNIFF_BYTES = 8192
+MAX_BYTES_PER_CHAR = 4  # UTF-8 worst case, so a byte budget never yields fewer characters than asked for
+
+# Longest BOMs first: the UTF-32 LE BOM starts with the UTF-16 LE one
+_BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+class BinaryFileError(ValueError):
+    """Raised for files whose first bytes look like binary data."""
+
+def sniff_encoding(sample: bytes) -> Tuple[Optional[str], int]:
+    """Guess the encoding from the first bytes of a file.
+
+    Returns (encoding, BOM length), or (None, 0) for binary content. Files
+    without a BOM are UTF-8 when the sample decodes as such, Latin-1 otherwise.
+    """
+    for bom, encoding in _BOMS:
+        if sample.startswith(bom):
+            return encoding, len(bom)
+    if b"\0" in sample:
+        return None, 0
+    try:
+        # Incremental decoding tolerates a character cut off at the end of the sample
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return 'utf-8', 0
+    except UnicodeDecodeError:
+        return 'latin-1', 0
+
+def _normalize(text: str) -> str:
+    # Same newline handling as reading the file in text mode
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def _decode_head(data: bytes, encoding: str) -> str:
+    return codecs.getincrementaldecoder(encoding)(errors='replace').decode(data, final=False)
+
+def _decode_tail(data: bytes, encoding: str) -> str:
+    if encoding == 'utf-8':
+        # Drop continuation bytes of a character the slice cut in half
+        start = 0
+        while start < min(len(data), 3) and data[start] & 0xC0 == 0x80:
+            start += 1
+        data = data[start:]
+    else:
+        width = {'utf-16-le': 2, 'utf-16-be': 2, 'utf-32-le': 4, 'utf-32-be': 4}.get(encoding, 1)
+        data = data[len(data) % width:]
+    return data.decode(encoding, errors='replace')
+
+def read_text(path: Path, size: int, max_chars: Optional[int] = None, sample: str = "prefix") -> str:
+    """Read a text file, or only as much of it as `max_chars` characters need.
+
+    With a budget only the bytes that can end up in the result are read: the
+    start of the file for sample="prefix", or its start and end for
+    sample="head_tail". Files of config.READ_MMAP_MIN_BYTES and more are
+    memory-mapped so sampling them never loads the rest. Raises
+    BinaryFileError for binary content.
+    """
+    with open(path, 'rb') as f:
+        view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size >= config.READ_MMAP_MIN_BYTES else None
+        try:
+            def read_range(start: int, end: int) -> bytes:
+                if view is not None:
+                    return view[start:end]
+                f.seek(start)
+                return f.read(end - start)
+
+            encoding, offset = sniff_encoding(read_range(0, min(size, SNIFF_BYTES)))
+            if encoding is None:
+                raise BinaryFileError(f"Binary content in {path}")
+            byte_budget = max_chars * MAX_BYTES_PER_CHAR if max_chars is not None else None
+            if byte_budget is None or size - offset <= byte_budget:
+                text = _normalize(read_range(offset, size).decode(encoding, errors='replace'))
+                if max_chars is None or len(text) <= max_chars:
+                    return text
+                if sample != "head_tail":
+                    return text[:max_chars]
+                head = text[:max_chars * 2 // 3]
+                tail = text[len(text) - (max_chars - len(head)):]
+                return f"{head}\n...\n[{len(text) - len(head) - len(tail)} karakter dilewati]\n...\n{tail}"
+            if sample != "head_tail":
+                return _normalize(_decode_head(read_range(offset, offset + byte_budget), encoding))[:max_chars]
+            head_chars = max_chars * 2 // 3
+            tail_chars = max_chars - head_chars
+            head_end = offset + head_chars * MAX_BYTES_PER_CHAR
+            tail_start = max(head_end, size - tail_chars * MAX_BYTES_PER_CHAR)
+            head = _normalize(_decode_head(read_range(offset, head_end), encoding))[:head_chars]
+            tail = _normalize(_decode_tail(read_range(tail_start, size), encoding))[-tail_chars:]
+            skipped = size - offset - len(head.encode(encoding, errors='replace')) - len(tail.encode(encoding, errors='replace'))
+            return f"{head}\n...\n[sekitar {max(0, skipped)} byte dilewati]\n...\n{tail}"
+        finally:
+            if view is not None:
+                view.close()
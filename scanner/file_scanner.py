@@ -1,48 +1,307 @@
 import os
-from typing import Dict, List, Set, Tuple
+import hashlib
+import queue
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from pathlib import Path
 import config
+from scanner.file_reader import MAX_BYTES_PER_CHAR, BinaryFileError, read_text
+from scanner.file_sniffer import sniff_skip_reason
+from scanner.path_filter import PathFilter
+from budget.token_counter import count_tokens, fit_tokens
+from tracing import span
+import logging
+
+logger = logging.getLogger(__name__)
+
+FILE_TYPES = ("python", "documentation", "config", "other")
+# File types that are read later and therefore sniffed during the scan
+SNIFFED_FILE_TYPES = ("python", "documentation", "config")
 
 class FileScanner:
-    def __init__(self, project_path: str):
+    def __init__(self, project_path: str, include: Iterable[str] = (), exclude: Iterable[str] = ()):
         self.project_path = Path(project_path)
+        self.path_filter = PathFilter(self.project_path, include, exclude)
         self.project_name = self.project_path.name
-        self.files: Dict[str, List[Path]] = {
-            "python": [],
-            "documentation": [],
-            "config": [],
-            "other": []
-        }
+        self.files: Dict[str, List[Path]] = {file_type: [] for file_type in FILE_TYPES}
         self.directories: Set[Path] = set()
+        self.file_hashes: Dict[Path, str] = {}
+        # Index built during the walk: directory -> file type -> files, and directory -> subdirectories
+        self.directory_files: Dict[Path, Dict[str, List[Path]]] = {}
+        self.subdirectories: Dict[Path, List[Path]] = {}
+        self.file_stats: Dict[Path, os.stat_result] = {}
+        # Files dropped by header sniffing, per reason; verdicts are kept while a file's size and mtime don't change
+        self.skipped_files: Counter = Counter()
+        self._sniffed: Dict[Path, Tuple[int, int, Optional[str]]] = {}
+        self._scanned = False
+        self._index_lock = threading.Lock()
 
     def scan(self) -> Tuple[Dict[str, List[Path]], Set[Path]]:
-        for root, dirs, files in os.walk(self.project_path):
-            root_path = Path(root)
-            dirs[:] = [d for d in dirs if d not in config.IGNORED_DIRECTORIES]
-            self.directories.add(root_path)
-            for file in files:
-                if file in config.IGNORED_FILES:
-                    continue
-                file_path = root_path / file
-                ext = file_path.suffix.lower()
-                if ext in config.PYTHON_EXTENSIONS:
-                    self.files["python"].append(file_path)
-                elif ext in config.DOCUMENTATION_EXTENSIONS:
-                    self.files["documentation"].append(file_path)
-                elif ext in config.CONFIG_EXTENSIONS:
-                    self.files["config"].append(file_path)
-                else:
-                    self.files["other"].append(file_path)
+        """Walk the project once; later calls return the memoized result."""
+        if self._scanned:
+            return self.files, self.directories
+        with span("scanner.scan", "scanner") as scan_span:
+            # Depth-first in listing order, matching os.walk's top-down traversal
+            stack = [self.project_path]
+            while stack:
+                _, subdirs = self._scan_directory(stack.pop())
+                stack.extend(reversed(subdirs))
+            self._rebuild_file_lists()
+            self._scanned = True
+            scan_span.set(files=sum(len(files) for files in self.files.values()), directories=len(self.directories),
+                          skipped=sum(self.skipped_files.values()))
+        self._log_skipped()
         return self.files, self.directories
 
-    def get_file_content(self, file_path: Path) -> str:
+    def _log_skipped(self) -> None:
+        if self.skipped_files:
+            logger.info("Skipped " + ", ".join(f"{count} {reason}" for reason, count in sorted(self.skipped_files.items()))
+                        + " files")
+
+    def rescan(self) -> Set[Path]:
+        """Walk the project again and return the files added, removed or modified since the last scan.
+
+        Hashes of changed files are dropped so they are recomputed on demand.
+        """
+        old_stats = {file: (stat.st_mtime_ns, stat.st_size) for file, stat in self.file_stats.items()}
+        with self._index_lock:
+            self.directories = set()
+            self.directory_files = {}
+            self.subdirectories = {}
+            self.file_stats = {}
+            self.skipped_files = Counter()
+            self._scanned = False
+        # Ignore files may have changed as well
+        self.path_filter.reset()
+        self.scan()
+        new_stats = {file: (stat.st_mtime_ns, stat.st_size) for file, stat in self.file_stats.items()}
+        changed = {file for file in old_stats.keys() | new_stats.keys() if old_stats.get(file) != new_stats.get(file)}
+        for file in changed:
+            self.file_hashes.pop(file, None)
+        return changed
+
+    def iter_scan(self, workers: int = 1, queue_size: Optional[int] = None,
+                  index: bool = True) -> Iterator[Tuple[str, Path]]:
+        """Yield (file_type, path) pairs while the walk is still running.
+
+        Directories are scanned by `workers` threads feeding a bounded queue, so
+        consumers can start right away and the walk never runs far ahead of them.
+        Once the generator is exhausted the index is complete and scan() returns
+        it without walking again. With `index=False` nothing is retained and
+        memory stays bounded by the queue size regardless of tree size.
+        """
+        if self._scanned:
+            for file_type in FILE_TYPES:
+                for file in self.files[file_type]:
+                    yield file_type, file
+            return
+
+        queue_size = config.SCAN_QUEUE_SIZE if queue_size is None else queue_size
+        results: queue.Queue = queue.Queue(maxsize=max(1, queue_size))
+        pending_dirs: queue.Queue = queue.Queue()
+        stop = threading.Event()
+        done = object()
+        pending = [1]
+        pending_lock = threading.Lock()
+        workers = max(1, workers)
+        pending_dirs.put(self.project_path)
+
+        def put_result(item) -> bool:
+            while not stop.is_set():
+                try:
+                    results.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def walk() -> None:
+            while not stop.is_set():
+                try:
+                    directory = pending_dirs.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if directory is None:
+                    return
+                try:
+                    by_type, subdirs = self._scan_directory(directory, record=index)
+                except Exception:
+                    logger.exception(f"Unexpected error scanning {directory}")
+                    by_type, subdirs = {}, []
+                with pending_lock:
+                    pending[0] += len(subdirs)
+                for subdir in subdirs:
+                    pending_dirs.put(subdir)
+                for file_type, files in by_type.items():
+                    for file in files:
+                        if not put_result((file_type, file)):
+                            return
+                with pending_lock:
+                    pending[0] -= 1
+                    finished = pending[0] == 0
+                if finished:
+                    for _ in range(workers):
+                        pending_dirs.put(None)
+                    put_result(done)
+
+        threads = [threading.Thread(target=walk, name=f"scanner-{i}", daemon=True) for i in range(workers)]
+        for thread in threads:
+            thread.start()
+        completed = False
         try:
-            if file_path.stat().st_size > config.MAX_FILE_SIZE:
-                return f"[File too large to analyze: {file_path.stat().st_size} bytes]"
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return f.read()
-        except Exception as e:
-            return f"[Error reading file: {str(e)}]"
+            while True:
+                item = results.get()
+                if item is done:
+                    completed = True
+                    break
+                yield item
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        if completed and index:
+            self._rebuild_file_lists()
+            self._scanned = True
+            self._log_skipped()
+
+    def _scan_directory(self, root_path: Path, record: bool = True) -> Tuple[Dict[str, List[Path]], List[Path]]:
+        by_type: Dict[str, List[Path]] = {file_type: [] for file_type in FILE_TYPES}
+        subdirs: List[Path] = []
+        stats: Dict[Path, os.stat_result] = {}
+        skipped: Counter = Counter()
+        try:
+            with os.scandir(root_path) as entries:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        continue
+                    if is_dir:
+                        # Like os.walk, symlinked directories are not descended into; ignored subtrees are pruned
+                        if (entry.name not in config.IGNORED_DIRECTORIES and not entry.is_symlink()
+                                and not self.path_filter.ignored(root_path / entry.name, True)):
+                            subdirs.append(root_path / entry.name)
+                        continue
+                    if entry.name in config.IGNORED_FILES:
+                        continue
+                    file_path = root_path / entry.name
+                    if self.path_filter.ignored(file_path, False):
+                        continue
+                    file_type = self._classify(file_path)
+                    stat = None
+                    if record or file_type in SNIFFED_FILE_TYPES:
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            pass
+                    if file_type in SNIFFED_FILE_TYPES and stat is not None:
+                        reason = self._sniff(file_path, file_type, stat, record)
+                        if reason:
+                            skipped[reason] += 1
+                            continue
+                    if record and stat is not None:
+                        stats[file_path] = stat
+                    by_type[file_type].append(file_path)
+        except OSError as e:
+            logger.debug(f"Could not scan {root_path}: {e}")
+        if record:
+            with self._index_lock:
+                self.skipped_files.update(skipped)
+                self.directories.add(root_path)
+                self.directory_files[root_path] = by_type
+                self.subdirectories[root_path] = subdirs
+                self.file_stats.update(stats)
+        return by_type, subdirs
+
+    def _sniff(self, file_path: Path, file_type: str, stat: os.stat_result, record: bool) -> Optional[str]:
+        cached = self._sniffed.get(file_path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        reason = sniff_skip_reason(file_path, file_type, stat.st_size)
+        if record:
+            # Rescans in watch mode only sniff files that changed
+            self._sniffed[file_path] = (stat.st_mtime_ns, stat.st_size, reason)
+        return reason
+
+    def _rebuild_file_lists(self) -> None:
+        # Derive the flat per-type lists from the index in deterministic top-down order
+        self.files = {file_type: [] for file_type in FILE_TYPES}
+        stack = [self.project_path]
+        while stack:
+            directory = stack.pop()
+            for file_type, files in self.directory_files.get(directory, {}).items():
+                self.files[file_type].extend(files)
+            stack.extend(reversed(self.subdirectories.get(directory, [])))
+
+    def _classify(self, file_path: Path) -> str:
+        ext = file_path.suffix.lower()
+        if ext in config.PYTHON_EXTENSIONS:
+            return "python"
+        elif ext in config.DOCUMENTATION_EXTENSIONS:
+            return "documentation"
+        elif ext in config.CONFIG_EXTENSIONS:
+            return "config"
+        return "other"
+
+    def get_directory_files(self, directory: Path, file_type: Optional[str] = None) -> List[Path]:
+        """Files directly inside `directory`, optionally limited to one file type."""
+        by_type = self.directory_files.get(directory, {})
+        if file_type:
+            return by_type.get(file_type, [])
+        return [file for files in by_type.values() for file in files]
+
+    def get_file_stat(self, file_path: Path) -> os.stat_result:
+        stat = self.file_stats.get(file_path)
+        if stat is None:
+            stat = self.file_stats[file_path] = file_path.stat()
+        return stat
+
+    def get_file_content(self, file_path: Path, max_chars: Optional[int] = None, sample: str = "prefix") -> str:
+        """Return the file's text, or at most `max_chars` characters of it.
+
+        A budgeted read only touches the bytes it returns (see
+        scanner.file_reader.read_text), so it also samples files above
+        MAX_FILE_SIZE instead of skipping them.
+        """
+        with span("scanner.read_file", "io") as read_span:
+            try:
+                size = self.get_file_stat(file_path).st_size
+                if max_chars is None and size > config.MAX_FILE_SIZE:
+                    return f"[File too large to analyze: {size} bytes]"
+                content = read_text(file_path, size, max_chars, sample)
+                read_span.set(bytes=size if max_chars is None else min(size, max_chars * MAX_BYTES_PER_CHAR))
+                return content
+            except BinaryFileError:
+                return f"[Binary file skipped: {size} bytes]"
+            except Exception as e:
+                return f"[Error reading file: {str(e)}]"
+
+    def get_file_tokens(self, file_path: Path, max_tokens: int, sample: str = "prefix") -> str:
+        """Return at most `max_tokens` tokens of the file's text, reading only a bounded prefix (or head and tail)."""
+        content = self.get_file_content(file_path, max_tokens * config.READ_CHARS_PER_TOKEN, sample)
+        return fit_tokens(content, max_tokens, sample)
+
+    def read_budgeted(self, files: List[Path], max_tokens: int) -> str:
+        """Concatenate the files' text until `max_tokens` tokens are collected, reading no further."""
+        parts = []
+        remaining = max_tokens
+        for file in files:
+            if remaining <= 0:
+                break
+            content = self.get_file_tokens(file, remaining)
+            parts.append(content)
+            remaining -= count_tokens(content)
+        return "".join(parts)
+
+    def get_file_hash(self, file_path: Path) -> str:
+        if file_path not in self.file_hashes:
+            digest = hashlib.sha256()
+            with open(file_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    digest.update(chunk)
+            self.file_hashes[file_path] = digest.hexdigest()
+        return self.file_hashes[file_path]
 
     def get_project_structure(self) -> str:
         structure = []
@@ -52,8 +311,6 @@ class FileScanner:
                 continue
             indent = '  ' * (len(rel_path.parts) - 1)
             structure.append(f"{indent}- {rel_path.name}/")
-            for file_type, files in self.files.items():
-                for file in files:
-                    if file.parent == directory:
-                        structure.append(f"{indent}  - {file.name}")
-        return "\n".join(structure) 
\ No newline at end of file
+            for file in self.get_directory_files(directory):
+                structure.append(f"{indent}  - {file.name}")
+        return "\n".join(structure)
@@ -0,0 +1,43 @@
+import re
+from pathlib import Path
+from typing import Optional
+import config
+from scanner.file_reader import SNIFF_BYTES, sniff_encoding
+
+# Explicit markers code generators put in a comment in the first lines of their output. Docstrings and
+# looser wording ("generated by ...") are not enough: hand-written code describes what it processes that way.
+# Only python and config headers are checked; documentation mentions the markers too often
+_GENERATED_MARKERS = {
+    file_type: re.compile(rb'^[ \t]*(?:' + comment + rb').*?(?:@generated|do not edit)', re.IGNORECASE | re.MULTILINE)
+    for file_type, comment in (("python", rb'#'), ("config", rb'#|//|/\*|\*|;'))
+}
+# File types checked for overlong lines; documentation legitimately has them (badge rows, unwrapped paragraphs)
+MINIFIED_FILE_TYPES = ("python", "config")
+
+def sniff_skip_reason(path: Path, file_type: str, size: int) -> Optional[str]:
+    """Return "binary", "minified" or "generated" when the file's first bytes show it is not worth reading.
+
+    Only the first SNIFF_BYTES are read, so this is cheap enough to run for
+    every text file during the scan.
+    """
+    if ".min." in path.name:
+        return "minified"
+    if size == 0:
+        return None
+    try:
+        with open(path, 'rb') as f:
+            header = f.read(SNIFF_BYTES)
+    except OSError:
+        return None
+    encoding, _ = sniff_encoding(header)
+    if encoding is None:
+        return "binary"
+    lines = header.split(b"\n")
+    # The last line may be cut off by the sample; it only counts when it fills the whole sample
+    complete = lines[:-1] if len(lines) > 1 else lines
+    if file_type in MINIFIED_FILE_TYPES and any(len(line) > config.MINIFIED_LINE_CHARS for line in complete):
+        return "minified"
+    marker = _GENERATED_MARKERS.get(file_type)
+    if marker and marker.search(b"\n".join(lines[:config.GENERATED_HEADER_LINES])):
+        return "generated"
+    return None
@@ -0,0 +1,163 @@
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+def _translate_segment(segment: str) -> str:
+    regex = []
+    i = 0
+    while i < len(segment):
+        char = segment[i]
+        if char == "*":
+            regex.append("[^/]*")
+        elif char == "?":
+            regex.append("[^/]")
+        elif char == "\\" and i + 1 < len(segment):
+            i += 1
+            regex.append(re.escape(segment[i]))
+        elif char == "[":
+            end = segment.find("]", i + 2 if segment[i + 1:i + 2] in ("!", "^") else i + 1)
+            if end == -1:
+                regex.append(re.escape(char))
+            else:
+                body = segment[i + 1:end]
+                if body[:1] in ("!", "^"):
+                    body = "^" + body[1:]
+                regex.append("[" + body.replace("\\", "\\\\") + "]")
+                i = end
+        else:
+            regex.append(re.escape(char))
+        i += 1
+    return "".join(regex)
+
+def compile_pattern(line: str) -> Optional[Tuple[Pattern, bool, bool]]:
+    """Compile one gitignore line into (regex, negated, directory_only); None for blanks and comments.
+
+    The regex matches paths relative to the directory holding the rule, in
+    POSIX form. Patterns without an inner slash match at any depth.
+    """
+    line = line.rstrip("\r\n")
+    # Trailing spaces are ignored unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith(("\\!", "\\#")):
+        line = line[1:]
+    directory_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    anchored = "/" in line
+    segments = line.lstrip("/").split("/")
+    parts = []
+    for index, segment in enumerate(segments):
+        last = index == len(segments) - 1
+        if segment == "**":
+            parts.append(".*" if last else "(?:.*/)?")
+        else:
+            parts.append(_translate_segment(segment) + ("" if last else "/"))
+    prefix = "" if anchored else "(?:.*/)?"
+    return re.compile(prefix + "".join(parts), re.DOTALL), negated, directory_only
+
+class IgnoreRules:
+    """The rules of one ignore file (or one list of user globs), compiled once.
+
+    The last matching rule decides, as in git; a combined regex rejects paths
+    no rule matches without trying the rules one by one.
+    """
+
+    def __init__(self, patterns: Iterable[str], base: str = ""):
+        self.base = base  # POSIX path of the rules' directory relative to the project, "" for the root
+        self.rules: List[Tuple[Pattern, bool, bool]] = [rule for rule in map(compile_pattern, patterns) if rule]
+        self._any = re.compile("|".join(f"(?:{rule[0].pattern})" for rule in self.rules), re.DOTALL)
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    @classmethod
+    def load(cls, files: Iterable[Path], base: str) -> Optional["IgnoreRules"]:
+        patterns: List[str] = []
+        for file in files:
+            try:
+                patterns += file.read_text(encoding='utf-8', errors='replace').splitlines()
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                logger.debug(f"Could not read {file}: {e}")
+        rules = cls(patterns, base)
+        return rules or None
+
+    def match(self, rel_path: str, is_dir: bool) -> Optional[bool]:
+        """True when the path is ignored, False when a negated rule re-includes it, None when no rule applies."""
+        if not self._any.fullmatch(rel_path):
+            return None
+        for regex, negated, directory_only in reversed(self.rules):
+            if directory_only and not is_dir:
+                continue
+            if regex.fullmatch(rel_path):
+                return not negated
+        return None
+
+class PathFilter:
+    """Decides which directories the scanner prunes and which files it lists.
+
+    `.gitignore`/`.ignore` files are honored hierarchically: each directory's
+    rules are compiled once when the walk first reaches it and deeper files
+    override shallower ones. User `exclude` globs prune files and whole
+    subtrees; with `include` globs only matching files are listed, while
+    directories are still descended into.
+    """
+
+    def __init__(self, project_path: Path, include: Iterable[str] = (), exclude: Iterable[str] = (),
+                 ignore_files: Optional[Iterable[str]] = None):
+        self.project_path = Path(project_path)
+        self.include = IgnoreRules(include)
+        self.exclude = IgnoreRules(exclude)
+        self.ignore_files = tuple(config.IGNORE_FILE_NAMES if ignore_files is None else ignore_files)
+        self._chains: Dict[Path, Tuple[IgnoreRules, ...]] = {}
+
+    def reset(self) -> None:
+        """Forget the compiled ignore files, e.g. before a rescan in watch mode."""
+        self._chains = {}
+
+    def _rel_path(self, path: Path) -> str:
+        return "" if path == self.project_path else path.relative_to(self.project_path).as_posix()
+
+    def _chain(self, directory: Path) -> Tuple[IgnoreRules, ...]:
+        chain = self._chains.get(directory)
+        if chain is None:
+            # The walk is top-down, so the parent's chain is normally cached already
+            if directory == self.project_path:
+                chain = ()
+                files = [directory / ".git" / "info" / "exclude"]
+            else:
+                chain = self._chain(directory.parent)
+                files = []
+            rel_path = self._rel_path(directory)
+            own = IgnoreRules.load(files + [directory / name for name in self.ignore_files],
+                                   rel_path + "/" if rel_path else "")
+            if own:
+                chain = chain + (own,)
+            self._chains[directory] = chain
+        return chain
+
+    def ignored(self, path: Path, is_dir: bool) -> bool:
+        rel_path = self._rel_path(path)
+        if self.exclude and self.exclude.match(rel_path, is_dir):
+            return True
+        if self.include and not is_dir and not self.include.match(rel_path, is_dir):
+            return True
+        for rules in reversed(self._chain(path.parent)):
+            verdict = rules.match(rel_path[len(rules.base):], is_dir)
+            if verdict is not None:
+                return verdict
+        return False
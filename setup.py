@@ -3,7 +3,7 @@ from setuptools import setup, find_packages
 setup(
     name="project-analyzer",
     version="0.1.0",
-    packages=find_packages(),
+    packages=find_packages(exclude=["benchmarks", "tests"]),
     install_requires=[
         "openai>=1.12.0",
         "python-dotenv>=1.0.0",
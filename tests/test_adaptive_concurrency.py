@@ -0,0 +1,74 @@
+import threading
+import time
+from transport.llm_transport import AdaptiveConcurrency
+
+def _wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+def test_throttling_halves_the_limit_down_to_one():
+    concurrency = AdaptiveConcurrency(8)
+    limits = []
+    for _ in range(5):
+        concurrency.acquire()
+        concurrency.release(throttled=True)
+        limits.append(concurrency.limit)
+    assert limits == [4, 2, 1, 1, 1]
+
+def test_successes_grow_the_limit_by_one_up_to_the_maximum():
+    concurrency = AdaptiveConcurrency(2)
+    concurrency.acquire()
+    concurrency.release(throttled=True)
+    assert concurrency.limit == 1
+    for _ in range(AdaptiveConcurrency.SUCCESSES_PER_INCREASE - 1):
+        concurrency.acquire()
+        concurrency.release()
+    assert concurrency.limit == 1
+    concurrency.acquire()
+    concurrency.release()
+    assert concurrency.limit == 2
+    for _ in range(AdaptiveConcurrency.SUCCESSES_PER_INCREASE * 3):
+        concurrency.acquire()
+        concurrency.release()
+    assert concurrency.limit == 2
+
+def test_acquire_blocks_at_the_limit_until_a_release():
+    concurrency = AdaptiveConcurrency(2)
+    concurrency.acquire()
+    concurrency.acquire()
+    acquired = threading.Event()
+
+    def third():
+        concurrency.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=third)
+    thread.start()
+    assert not acquired.wait(0.1)
+    concurrency.release()
+    assert acquired.wait(5)
+    thread.join()
+
+def test_free_slots_rotate_between_tenants():
+    concurrency = AdaptiveConcurrency(1)
+    concurrency.acquire("a")
+    order = []
+
+    def waiter(tenant, name):
+        concurrency.acquire(tenant)
+        order.append(name)
+        concurrency.release()
+
+    threads = []
+    # Tenant a queues two requests before tenant b queues one
+    for tenant, name, queued in (("a", "a1", 1), ("a", "a2", 2), ("b", "b1", 1)):
+        thread = threading.Thread(target=waiter, args=(tenant, name))
+        thread.start()
+        threads.append(thread)
+        _wait_until(lambda: len(concurrency._waiting.get(tenant, ())) == queued)
+    concurrency.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ["a1", "b1", "a2"]
@@ -0,0 +1,78 @@
+import pytest
+from writer.description_store import DescriptionStore
+from writer.store_export import export_markdown, export_text
+
+@pytest.fixture
+def store(tmp_path):
+    store = DescriptionStore(tmp_path / DescriptionStore.FILE_NAME, batch_size=3)
+    yield store
+    store.close()
+
+def test_put_and_get(store):
+    store.put("modul/pkg/a_deskripsi.txt", "Modul", "pkg/a.py", "Deskripsi a.", source_hash="hash-a", model="model-a")
+    record = store.get_record("modul/pkg/a_deskripsi.txt")
+    assert record["description"] == "Deskripsi a."
+    assert (record["kind"], record["path"], record["source_hash"], record["model"]) == \
+        ("Modul", "pkg/a.py", "hash-a", "model-a")
+    assert record["tokens"] > 0
+    assert store.get("modul/tidak_ada.txt") is None
+
+def test_update_keeps_the_creation_time(store):
+    store.put("modul/a_deskripsi.txt", "Modul", "a.py", "Versi 1", created=100.0)
+    store.put("modul/a_deskripsi.txt", "Modul", "a.py", "Versi 2", created=200.0)
+    record = store.get_record("modul/a_deskripsi.txt")
+    assert record["description"] == "Versi 2"
+    assert record["created"] == 100.0
+    assert record["updated"] > record["created"]
+
+def test_delete(store):
+    store.put("modul/a_deskripsi.txt", "Modul", "a.py", "Deskripsi")
+    store.delete("modul/a_deskripsi.txt")
+    assert store.get("modul/a_deskripsi.txt") is None
+
+def test_writes_are_committed_in_batches(store):
+    for index in range(10):
+        store.put(f"modul/m{index}_deskripsi.txt", "Modul", f"m{index}.py", f"Deskripsi {index}")
+    store.flush()
+    assert store.written == 10
+    assert store.failed == 0
+    assert len(list(store.records("Modul"))) == 10
+
+def test_records_filter_by_kind_in_path_order(store):
+    store.put("modul/b_deskripsi.txt", "Modul", "b.py", "B")
+    store.put("direktori/pkg_deskripsi.txt", "Direktori", "pkg", "Pkg")
+    store.put("modul/a_deskripsi.txt", "Modul", "a.py", "A")
+    assert [record["path"] for record in store.records("Modul")] == ["a.py", "b.py"]
+    assert [record["kind"] for record in store.records()] == ["Direktori", "Modul", "Modul"]
+
+def test_read_only_store_sees_committed_descriptions(tmp_path):
+    db_path = tmp_path / DescriptionStore.FILE_NAME
+    writer = DescriptionStore(db_path)
+    writer.put("modul/a_deskripsi.txt", "Modul", "a.py", "Deskripsi")
+    writer.close()
+    reader = DescriptionStore(db_path, read_only=True)
+    try:
+        assert reader.get("modul/a_deskripsi.txt") == "Deskripsi"
+    finally:
+        reader.close()
+
+def test_export_text_writes_one_file_per_description(store, tmp_path):
+    store.put("modul/pkg/a_deskripsi.txt", "Modul", "pkg/a.py", "Deskripsi a.")
+    store.put("direktori/pkg_deskripsi.txt", "Direktori", "pkg", "Deskripsi pkg.")
+    store.put("analisis_proyek.txt", "Proyek", "proyek", "Analisis.")
+    target = tmp_path / "ekspor"
+    assert export_text(store, target) == 2
+    module_text = (target / "modul" / "pkg" / "a_deskripsi.txt").read_text(encoding="utf-8")
+    assert "Modul: a.py" in module_text and "Path: pkg/a.py" in module_text and "Deskripsi a." in module_text
+    assert (target / "direktori" / "pkg_deskripsi.txt").is_file()
+    assert not (target / "analisis_proyek.txt").exists()
+
+def test_export_markdown_orders_project_directories_then_modules(store, tmp_path):
+    store.put("modul/a_deskripsi.txt", "Modul", "a.py", "Deskripsi a.")
+    store.put("direktori/pkg_deskripsi.txt", "Direktori", "pkg", "Deskripsi pkg.")
+    store.put("analisis_proyek.txt", "Proyek", "proyek", "Analisis.")
+    target = tmp_path / "deskripsi.md"
+    assert export_markdown(store, target) == 3
+    text = target.read_text(encoding="utf-8")
+    assert text.index("# Analisis proyek proyek") < text.index("## Direktori") < text.index("### `pkg`") \
+        < text.index("## Modul") < text.index("### `a.py`")
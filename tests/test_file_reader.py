@@ -0,0 +1,54 @@
+import codecs
+import pytest
+import config
+from scanner.file_reader import BinaryFileError, read_text
+
+def _write(tmp_path, data):
+    path = tmp_path / "berkas.txt"
+    path.write_bytes(data)
+    return path, len(data)
+
+@pytest.fixture(params=[False, True], ids=["read", "mmap"])
+def mmap_reads(request, monkeypatch):
+    # The same samples must come out whether the file is read or memory-mapped
+    if request.param:
+        monkeypatch.setattr(config, "READ_MMAP_MIN_BYTES", 1)
+    return request.param
+
+def test_whole_file_without_budget(tmp_path, mmap_reads):
+    path, size = _write(tmp_path, b"baris 1\r\nbaris 2\rbaris 3\n")
+    assert read_text(path, size) == "baris 1\nbaris 2\nbaris 3\n"
+
+def test_prefix_sample(tmp_path, mmap_reads):
+    path, size = _write(tmp_path, b"0123456789" * 1000)
+    assert read_text(path, size, 25) == "0123456789" * 2 + "01234"
+
+def test_head_tail_of_a_file_within_the_byte_budget(tmp_path, mmap_reads):
+    path, size = _write(tmp_path, b"A" * 40 + b"Z" * 20)
+    assert read_text(path, size, 30, "head_tail") == "A" * 20 + "\n...\n[30 karakter dilewati]\n...\n" + "Z" * 10
+
+def test_head_tail_of_a_large_file_reads_only_both_ends(tmp_path, mmap_reads):
+    path, size = _write(tmp_path, b"A" * 5000 + b"Z" * 5000)
+    assert read_text(path, size, 300, "head_tail") == \
+        "A" * 200 + "\n...\n[sekitar 9700 byte dilewati]\n...\n" + "Z" * 100
+
+def test_head_tail_never_splits_a_multibyte_character(tmp_path, mmap_reads):
+    path, size = _write(tmp_path, ("é" * 3001).encode("utf-8"))
+    text = read_text(path, size, 300, "head_tail")
+    head, tail = text.split("\n...\n")[0], text.split("\n...\n")[-1]
+    assert head == "é" * 200 and tail == "é" * 100
+    assert "�" not in text
+
+def test_small_files_are_returned_whole_with_head_tail(tmp_path):
+    path, size = _write(tmp_path, b"pendek")
+    assert read_text(path, size, 300, "head_tail") == "pendek"
+
+def test_byte_order_mark_selects_the_encoding(tmp_path):
+    path, size = _write(tmp_path, codecs.BOM_UTF16_LE + "halo dunia".encode("utf-16-le"))
+    assert read_text(path, size) == "halo dunia"
+    assert read_text(path, size, 4) == "halo"
+
+def test_binary_content_is_rejected(tmp_path):
+    path, size = _write(tmp_path, b"\x89PNG\r\n\x1a\n\0\0\0")
+    with pytest.raises(BinaryFileError):
+        read_text(path, size)
@@ -0,0 +1,97 @@
+import json
+import pytest
+import config
+from analyzer.project_analyzer import ProjectAnalyzer
+from describer.llm_describer import LLMDescriber, batched_module_paths, parse_json_object
+from pipeline.project_pipeline import ProjectPipeline
+from pipeline.worker_pool import WorkerPool
+from scanner.file_scanner import FileScanner
+from writer.output_writer import OutputWriter
+
+class FakeTransport:
+    """Answers batched prompts with a JSON object keyed by the module paths in the prompt, or with `batch_answer`."""
+
+    def __init__(self, batch_answer=None):
+        self.batch_answer = batch_answer
+        self.calls = []
+
+    def complete(self, prompt, sink=None, tenant=None, stage=None, item=None, system=None):
+        self.calls.append((prompt, stage, system))
+        if stage != "module_batch":
+            return f"Deskripsi tunggal ({stage})"
+        if self.batch_answer is not None:
+            return self.batch_answer
+        return json.dumps({path: f"Deskripsi {path}" for path in batched_module_paths(prompt)})
+
+def test_parse_json_object_skips_reasoning_and_fences():
+    answer = '<think>{"bukan": "ini"}</think>\n```json\n{"a.py": " Deskripsi a. ", "b.py": "Deskripsi b."}\n```'
+    assert parse_json_object(answer) == {"a.py": "Deskripsi a.", "b.py": "Deskripsi b."}
+
+def test_parse_json_object_drops_empty_and_non_string_values():
+    assert parse_json_object('{"a.py": "", "b.py": 3, "c.py": ["x"], "d.py": "Deskripsi d."}') == {"d.py": "Deskripsi d."}
+
+@pytest.mark.parametrize("answer", ["Tidak ada JSON", "[1, 2]", "} terbalik {"])
+def test_parse_json_object_rejects_answers_without_an_object(answer):
+    with pytest.raises(ValueError):
+        parse_json_object(answer)
+
+def test_batched_answer_is_split_per_module():
+    transport = FakeTransport()
+    describer = LLMDescriber(transport)
+    modules = {"pkg/a.py": "x = 1\n", "pkg/b.py": "y = 2\n"}
+    assert describer.describe_modules_batch(modules) == {"pkg/a.py": "Deskripsi pkg/a.py",
+                                                         "pkg/b.py": "Deskripsi pkg/b.py"}
+    prompt, stage, system = transport.calls[0]
+    assert batched_module_paths(prompt) == ["pkg/a.py", "pkg/b.py"]
+    assert stage == "module_batch" and system == describer.system_message
+
+def test_unparseable_batched_answer_yields_no_descriptions():
+    describer = LLMDescriber(FakeTransport(batch_answer="Maaf, tidak bisa."))
+    assert describer.describe_modules_batch({"a.py": "x = 1\n"}) == {}
+
+@pytest.fixture
+def pipeline(tmp_path):
+    project = tmp_path / "proyek"
+    project.mkdir()
+    transport = FakeTransport()
+    file_scanner = FileScanner(project)
+    output_writer = OutputWriter(None, tmp_path / "output", project)
+    return ProjectPipeline(file_scanner, ProjectAnalyzer(file_scanner, transport), LLMDescriber(transport),
+                           output_writer, WorkerPool(1), batch_modules=True)
+
+def _module(pipeline, name, size):
+    path = pipeline.project_path / name
+    path.write_text("#" * size, encoding="utf-8")
+    return path
+
+def test_small_modules_are_batched_up_to_the_module_limit(pipeline, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_MODULES", 2)
+    files = [_module(pipeline, f"m{index}.py", 100) for index in range(5)]
+    assert list(pipeline._batched(files)) == [files[0:2], files[2:4], files[4:5]]
+
+def test_batches_stay_within_the_token_budget(pipeline, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_TOKEN_BUDGET", 100)
+    monkeypatch.setattr(config, "CHARS_PER_TOKEN", 4)
+    files = [_module(pipeline, f"m{index}.py", 160) for index in range(5)]  # 40 tokens each
+    assert list(pipeline._batched(files)) == [files[0:2], files[2:4], files[4:5]]
+
+def test_large_modules_are_sent_on_their_own(pipeline, monkeypatch):
+    monkeypatch.setattr(config, "BATCH_MAX_MODULE_CHARS", 500)
+    small_a = _module(pipeline, "a.py", 100)
+    large = _module(pipeline, "besar.py", 501)
+    small_b = _module(pipeline, "b.py", 100)
+    assert list(pipeline._batched([small_a, large, small_b])) == [[large], [small_a, small_b]]
+
+def test_batching_disabled_sends_every_module_on_its_own(pipeline):
+    pipeline.batch_modules = False
+    files = [_module(pipeline, f"m{index}.py", 100) for index in range(3)]
+    assert list(pipeline._batched(files)) == [[file] for file in files]
+
+def test_modules_missing_from_the_batched_answer_are_described_one_by_one(pipeline):
+    files = [_module(pipeline, name, 100) for name in ("a.py", "b.py")]
+    pipeline.llm_describer.transport = FakeTransport(batch_answer='{"a.py": "Deskripsi a."}')
+    results = pipeline._describe_module_batch(files)
+    assert [(file.name, description, error) for file, description, error in results] == [
+        ("a.py", "Deskripsi a.", None),
+        ("b.py", "Deskripsi tunggal (module)", None),
+    ]
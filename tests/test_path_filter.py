@@ -0,0 +1,83 @@
+import pytest
+from scanner.path_filter import IgnoreRules, PathFilter, compile_pattern
+
+def _matches(pattern, path):
+    regex, _, _ = compile_pattern(pattern)
+    return bool(regex.fullmatch(path))
+
+@pytest.mark.parametrize("line", ["", "   ", "# komentar", "/"])
+def test_blank_lines_and_comments_compile_to_none(line):
+    assert compile_pattern(line) is None
+
+def test_pattern_without_slash_matches_at_any_depth():
+    assert _matches("*.log", "a.log")
+    assert _matches("*.log", "src/deep/a.log")
+    assert not _matches("*.log", "a.logs")
+
+def test_pattern_with_slash_is_anchored():
+    assert _matches("/build", "build")
+    assert not _matches("/build", "src/build")
+    assert _matches("doc/frotz", "doc/frotz")
+    assert not _matches("doc/frotz", "a/doc/frotz")
+
+def test_wildcards_do_not_cross_slashes():
+    assert _matches("src/*.py", "src/a.py")
+    assert not _matches("src/*.py", "src/pkg/a.py")
+    assert _matches("file?.txt", "file1.txt")
+    assert not _matches("file?.txt", "file/.txt")
+
+def test_double_star():
+    assert _matches("**/foo", "foo")
+    assert _matches("**/foo", "a/b/foo")
+    assert _matches("a/**/b", "a/b")
+    assert _matches("a/**/b", "a/x/y/b")
+    assert _matches("abc/**", "abc/x/y")
+    assert not _matches("abc/**", "abc")
+
+def test_flags():
+    assert compile_pattern("build/")[1:] == (False, True)
+    assert compile_pattern("!keep.log")[1:] == (True, False)
+    # An escaped "!" is a literal file name, not a negation
+    regex, negated, _ = compile_pattern("\\!penting")
+    assert not negated and regex.fullmatch("!penting")
+
+def test_trailing_spaces_unless_escaped():
+    assert _matches("foo   ", "foo")
+    assert _matches("foo\\ ", "foo ")
+
+def test_last_matching_rule_decides():
+    rules = IgnoreRules(["*.log", "!keep.log"])
+    assert rules.match("a.log", False) is True
+    assert rules.match("keep.log", False) is False
+    assert rules.match("a.txt", False) is None
+
+def test_directory_only_rules_skip_files():
+    rules = IgnoreRules(["build/"])
+    assert rules.match("build", True) is True
+    assert rules.match("build", False) is None
+
+def test_nested_ignore_files_override_shallower_ones(tmp_path):
+    (tmp_path / ".gitignore").write_text("*.log\n!keep.log\n/build/\n", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / ".gitignore").write_text("!debug.log\n", encoding="utf-8")
+    path_filter = PathFilter(tmp_path, ignore_files=(".gitignore",))
+    assert path_filter.ignored(tmp_path / "a.log", False)
+    assert not path_filter.ignored(tmp_path / "keep.log", False)
+    assert path_filter.ignored(tmp_path / "build", True)
+    assert not path_filter.ignored(tmp_path / "sub" / "build", True)
+    assert not path_filter.ignored(tmp_path / "sub" / "debug.log", False)
+    assert path_filter.ignored(tmp_path / "sub" / "other.log", False)
+
+def test_git_info_exclude_is_honored(tmp_path):
+    (tmp_path / ".git" / "info").mkdir(parents=True)
+    (tmp_path / ".git" / "info" / "exclude").write_text("rahasia.txt\n", encoding="utf-8")
+    path_filter = PathFilter(tmp_path, ignore_files=())
+    assert path_filter.ignored(tmp_path / "rahasia.txt", False)
+    assert not path_filter.ignored(tmp_path / "biasa.txt", False)
+
+def test_user_include_and_exclude_globs(tmp_path):
+    path_filter = PathFilter(tmp_path, include=["*.py"], exclude=["vendor/"], ignore_files=())
+    assert path_filter.ignored(tmp_path / "vendor", True)
+    assert path_filter.ignored(tmp_path / "README.md", False)
+    assert not path_filter.ignored(tmp_path / "pkg", True)
+    assert not path_filter.ignored(tmp_path / "pkg" / "modul.py", False)
@@ -0,0 +1,66 @@
+from types import SimpleNamespace
+import pytest
+from transport import rate_limiter
+from transport.rate_limiter import RateLimiter
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter, "time", SimpleNamespace(monotonic=clock.monotonic, sleep=clock.sleep))
+    return clock
+
+def test_disabled_limiter_never_waits(clock):
+    limiter = RateLimiter(0, 0)
+    assert not limiter.enabled
+    for _ in range(100):
+        limiter.acquire(10_000)
+    assert clock.sleeps == []
+
+def test_request_limit_waits_for_the_oldest_request_to_leave_the_window(clock):
+    limiter = RateLimiter(requests_per_minute=2)
+    limiter.acquire()
+    clock.now += 10
+    limiter.acquire()
+    limiter.acquire()
+    assert clock.sleeps == [50.0]
+
+def test_window_slides(clock):
+    limiter = RateLimiter(requests_per_minute=2)
+    limiter.acquire()
+    clock.now += 30
+    limiter.acquire()
+    clock.now += 31
+    # The first request is more than a minute old, so only one counts
+    limiter.acquire()
+    assert clock.sleeps == []
+    limiter.acquire()
+    assert clock.sleeps == [29.0]
+
+def test_token_limit_waits_until_enough_tokens_expire(clock):
+    limiter = RateLimiter(tokens_per_minute=100)
+    limiter.acquire(40)
+    clock.now += 5
+    limiter.acquire(40)
+    clock.now += 5
+    # 80 tokens in the window; 50 more only fit once the first 40 have expired
+    limiter.acquire(50)
+    assert clock.sleeps == [50.0]
+
+def test_request_larger_than_the_token_limit_passes_on_an_empty_window(clock):
+    limiter = RateLimiter(tokens_per_minute=100)
+    limiter.acquire(500)
+    assert clock.sleeps == []
+    limiter.acquire(1)
+    assert clock.sleeps == [60.0]
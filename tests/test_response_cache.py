@@ -0,0 +1,58 @@
+import time
+from cache.response_cache import ResponseCache
+
+def _stored(cache):
+    return cache._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+
+def test_get_returns_what_put_stored(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"))
+    key = ResponseCache.make_key("model", "http://api", "prompt", "system")
+    assert cache.get(key) is None
+    cache.put(key, "jawaban")
+    assert cache.get(key) == "jawaban"
+    assert (cache.hits, cache.misses, cache.writes) == (1, 1, 1)
+    cache.close()
+
+def test_system_message_is_part_of_the_key():
+    assert ResponseCache.make_key("m", "u", "p", "s1") != ResponseCache.make_key("m", "u", "p", "s2")
+    assert ResponseCache.make_key("m", "u", "p") == ResponseCache.make_key("m", "u", "p", None)
+
+def test_size_limit_is_enforced_while_writing(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=1000, evict_every=0)
+    for index in range(50):
+        cache.put(f"kunci-{index}", "x" * 100)
+        assert _stored(cache)[1] <= 1000
+    # The least recently used entries went first
+    assert cache.get("kunci-0") is None
+    assert cache.get("kunci-49") == "x" * 100
+    cache.close()
+
+def test_recently_read_entries_survive_size_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_bytes=1000, evict_every=0)
+    for index in range(10):
+        cache.put(f"kunci-{index}", "x" * 100)
+    time.sleep(0.01)
+    cache.get("kunci-0")
+    cache.put("kunci-baru", "x" * 100)
+    assert cache.get("kunci-0") is not None
+    assert cache.get("kunci-1") is None
+    cache.close()
+
+def test_expired_entries_are_dropped_every_few_writes(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), max_age_days=1, evict_every=5)
+    cache.put("lama", "jawaban lama")
+    cache._conn.execute("UPDATE responses SET created = ?", (time.time() - 2 * 86400,))
+    cache._conn.commit()
+    for index in range(3):
+        cache.put(f"kunci-{index}", "jawaban")
+    assert _stored(cache)[0] == 4
+    cache.put("kunci-3", "jawaban")
+    assert _stored(cache)[0] == 4
+    cache.close()
+
+def test_refresh_misses_but_still_stores(tmp_path):
+    cache = ResponseCache(str(tmp_path / "cache.db"), refresh=True)
+    cache.put("kunci", "jawaban")
+    assert cache.get("kunci") is None
+    assert _stored(cache)[0] == 1
+    cache.close()
@@ -0,0 +1,79 @@
+import json
+import pytest
+from scanner.file_scanner import FileScanner
+from writer.run_manifest import RunManifest
+
+def _manifest(output_dir, file_hash="hash-a", context="context-a", model="model-a"):
+    manifest = RunManifest(output_dir)
+    manifest.model = model
+    manifest.files = {"pkg/modul.py": {"hash": file_hash, "size": 10, "mtime_ns": 1}}
+    manifest.modules = {"pkg/modul.py": {"output": "modul/pkg/modul_deskripsi.txt", "context": context}}
+    manifest.directories = {"pkg": {"members": ["modul.py"], "output": "direktori/pkg_deskripsi.txt",
+                                    "context": context}}
+    return manifest
+
+def test_unchanged_module_is_carried_over(tmp_path):
+    previous = _manifest(tmp_path / "lama")
+    current = _manifest(tmp_path / "baru")
+    assert current.module_unchanged("pkg/modul.py", previous, "context-a")
+    assert current.directory_unchanged("pkg", ["modul.py"], previous, "context-a")
+
+def test_changed_source_is_described_again(tmp_path):
+    previous = _manifest(tmp_path / "lama")
+    current = _manifest(tmp_path / "baru", file_hash="hash-b")
+    assert not current.module_unchanged("pkg/modul.py", previous, "context-a")
+
+def test_changed_project_context_is_described_again(tmp_path):
+    previous = _manifest(tmp_path / "lama")
+    current = _manifest(tmp_path / "baru", context="context-b")
+    assert not current.module_unchanged("pkg/modul.py", previous, "context-b")
+    assert not current.directory_unchanged("pkg", ["modul.py"], previous, "context-b")
+
+def test_changed_model_or_membership_is_described_again(tmp_path):
+    previous = _manifest(tmp_path / "lama")
+    current = _manifest(tmp_path / "baru", model="model-b")
+    assert not current.module_unchanged("pkg/modul.py", previous, "context-a")
+    assert not current.directory_unchanged("pkg", ["modul.py"], previous, "context-a")
+    current = _manifest(tmp_path / "baru")
+    assert not current.directory_unchanged("pkg", ["modul.py", "baru.py"], previous, "context-a")
+
+def test_nothing_is_carried_over_without_a_previous_record(tmp_path):
+    current = _manifest(tmp_path / "baru")
+    assert not current.module_unchanged("pkg/modul.py", None, "context-a")
+    assert not current.module_unchanged("pkg/lain.py", _manifest(tmp_path / "lama"), "context-a")
+
+def test_save_and_load_round_trip(tmp_path):
+    (tmp_path / "lama").mkdir()
+    _manifest(tmp_path / "lama").save()
+    previous = RunManifest.load(tmp_path / "lama")
+    assert previous.modules["pkg/modul.py"] == {"output": "modul/pkg/modul_deskripsi.txt", "context": "context-a"}
+    assert _manifest(tmp_path / "baru").module_unchanged("pkg/modul.py", previous, "context-a")
+
+def test_version_1_manifest_loads_but_is_not_carried_over(tmp_path):
+    data = {"version": 1, "model": "model-a", "files": {"pkg/modul.py": {"hash": "hash-a", "size": 10, "mtime_ns": 1}},
+            "modules": {"pkg/modul.py": "modul/pkg/modul_deskripsi.txt"},
+            "directories": {"pkg": {"members": ["modul.py"], "output": "direktori/pkg_deskripsi.txt"}}, "stages": {}}
+    (tmp_path / RunManifest.FILE_NAME).write_text(json.dumps(data), encoding="utf-8")
+    previous = RunManifest.load(tmp_path)
+    assert previous.modules["pkg/modul.py"]["output"] == "modul/pkg/modul_deskripsi.txt"
+    assert not _manifest(tmp_path / "baru").module_unchanged("pkg/modul.py", previous, "context-a")
+
+def test_unknown_version_is_rejected(tmp_path):
+    (tmp_path / RunManifest.FILE_NAME).write_text(json.dumps({"version": 99}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        RunManifest.load(tmp_path)
+
+def test_hash_is_reused_when_size_and_mtime_are_unchanged(tmp_path):
+    (tmp_path / "modul.py").write_text("x = 1\n", encoding="utf-8")
+    file_scanner = FileScanner(tmp_path)
+    stat = (tmp_path / "modul.py").stat()
+    previous = RunManifest(tmp_path / "lama")
+    previous.files = {"modul.py": {"hash": "hash-lama", "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}}
+    current = RunManifest(tmp_path / "baru")
+    current.record_file(file_scanner, tmp_path / "modul.py", previous)
+    assert current.files["modul.py"]["hash"] == "hash-lama"
+
+    previous.files["modul.py"]["mtime_ns"] -= 1
+    current = RunManifest(tmp_path / "baru")
+    current.record_file(FileScanner(tmp_path), tmp_path / "modul.py", previous)
+    assert current.files["modul.py"]["hash"] != "hash-lama"
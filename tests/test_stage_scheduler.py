@@ -0,0 +1,71 @@
+import threading
+import pytest
+from pipeline.stage_scheduler import StageScheduler
+
+def test_stages_receive_their_dependencies_results():
+    scheduler = StageScheduler()
+    scheduler.add("scan", lambda inputs: ["a.py", "b.py"])
+    scheduler.add("context", lambda inputs: f"{len(inputs['scan'])} files", depends_on=["scan"])
+    scheduler.add("modules", lambda inputs: (inputs["scan"], inputs["context"]), depends_on=["scan", "context"])
+    results = scheduler.run()
+    assert results["modules"] == (["a.py", "b.py"], "2 files")
+
+def test_dependencies_finish_before_dependents_start():
+    order = []
+    lock = threading.Lock()
+
+    def stage(name):
+        def run(inputs):
+            with lock:
+                order.append(name)
+            return name
+        return run
+
+    scheduler = StageScheduler()
+    scheduler.add("summary", stage("summary"), depends_on=["context", "analysis"])
+    scheduler.add("modules", stage("modules"), depends_on=["context"])
+    scheduler.add("context", stage("context"), depends_on=["scan"])
+    scheduler.add("analysis", stage("analysis"), depends_on=["scan"])
+    scheduler.add("scan", stage("scan"))
+    scheduler.run()
+    assert order[0] == "scan"
+    assert order.index("context") < order.index("modules")
+    assert order.index("context") < order.index("summary")
+    assert order.index("analysis") < order.index("summary")
+
+def test_independent_stages_run_concurrently():
+    both_started = threading.Barrier(2, timeout=5)
+    scheduler = StageScheduler()
+    # Each stage waits for the other, so this only finishes when they run at the same time
+    scheduler.add("purpose", lambda inputs: both_started.wait())
+    scheduler.add("technologies", lambda inputs: both_started.wait())
+    assert set(scheduler.run()) == {"purpose", "technologies"}
+
+def test_failure_stops_dependents_and_is_raised():
+    ran = []
+    scheduler = StageScheduler()
+    scheduler.add("scan", lambda inputs: 1 / 0)
+    scheduler.add("modules", lambda inputs: ran.append("modules"), depends_on=["scan"])
+    with pytest.raises(ZeroDivisionError):
+        scheduler.run()
+    assert ran == []
+
+def test_duplicate_unknown_and_cyclic_stages_are_rejected():
+    scheduler = StageScheduler()
+    scheduler.add("scan", lambda inputs: None)
+    with pytest.raises(ValueError):
+        scheduler.add("scan", lambda inputs: None)
+
+    scheduler = StageScheduler()
+    scheduler.add("modules", lambda inputs: None, depends_on=["scan"])
+    with pytest.raises(ValueError, match="unknown stage scan"):
+        scheduler.run()
+
+    ran = []
+    scheduler = StageScheduler()
+    scheduler.add("a", lambda inputs: ran.append("a"), depends_on=["b"])
+    scheduler.add("b", lambda inputs: ran.append("b"), depends_on=["a"])
+    scheduler.add("c", lambda inputs: ran.append("c"))
+    with pytest.raises(ValueError, match="cycle"):
+        scheduler.run()
+    assert ran == []
@@ -0,0 +1,41 @@
+import pytest
+from transport.streaming import TRUNCATION_MARKER, ThinkFilter, is_truncated, strip_reasoning
+
+def _filtered(chunks):
+    think_filter = ThinkFilter()
+    return "".join(think_filter.feed(chunk) for chunk in chunks) + think_filter.flush()
+
+def _chunked(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+def test_think_block_in_one_chunk_is_dropped():
+    assert _filtered(["Awal <think>rencana</think>akhir"]) == "Awal akhir"
+
+@pytest.mark.parametrize("size", range(1, 10))
+def test_tags_split_across_chunks_are_dropped(size):
+    text = "Awal <think>rencana\npanjang</think>Jawaban <think>lagi</think>akhir"
+    assert _filtered(_chunked(text, size)) == "Awal Jawaban akhir"
+
+def test_possible_tag_start_is_held_back_until_decided():
+    think_filter = ThinkFilter()
+    assert think_filter.feed("Jawaban <thi") == "Jawaban "
+    assert think_filter.feed("s is not a tag") == "<this is not a tag"
+    assert think_filter.flush() == ""
+
+def test_unclosed_think_block_is_dropped():
+    assert _filtered(["Jawaban", "<think>belum selesai"]) == "Jawaban"
+
+def test_text_without_tags_passes_through():
+    assert _filtered(_chunked("Tidak ada < atau > yang aneh", 3)) == "Tidak ada < atau > yang aneh"
+
+def test_strip_reasoning_matches_streamed_filtering():
+    answer = "<think>\nlangkah 1\n</think>\n\nDeskripsi modul.\n"
+    assert strip_reasoning(answer) == "Deskripsi modul."
+    assert strip_reasoning(answer) == _filtered(_chunked(answer, 4)).strip()
+
+def test_strip_reasoning_without_reasoning():
+    assert strip_reasoning("  Deskripsi modul.  ") == "Deskripsi modul."
+
+def test_is_truncated():
+    assert is_truncated(f"Deskripsi sebagian\n{TRUNCATION_MARKER}")
+    assert not is_truncated("Deskripsi lengkap")
@@ -0,0 +1,51 @@
+import json
+import pytest
+from tracing.tracer import Tracer, _DurationStats
+
+def test_summary_aggregates_durations_and_numeric_attributes():
+    tracer = Tracer()
+    for tokens in (10, 20):
+        with tracer.span("llm.complete", "llm", prompt_tokens=tokens, cache_hit=False, model="m"):
+            pass
+    summary = tracer.summary()
+    row = next(line for line in summary.splitlines() if line.startswith("llm.complete"))
+    assert row.split()[1] == "2"
+    assert "prompt_tokens=30" in row and "cache_hit=0" in row and "model" not in row
+
+def test_failed_span_records_the_error():
+    tracer = Tracer(record_events=True)
+    with pytest.raises(KeyError):
+        with tracer.span("stage.scan", "stage"):
+            raise KeyError("x")
+    assert tracer._events[0][5] == {"error": "KeyError"}
+
+def test_duration_memory_is_bounded():
+    tracer = Tracer()
+    for index in range(_DurationStats.SAMPLE_SIZE * 3):
+        tracer._finish(type("FakeSpan", (), {"name": "io", "args": {}, "category": "io"})(), 0.0, index / 1000)
+    stats = tracer._durations["io"]
+    assert stats.count == _DurationStats.SAMPLE_SIZE * 3
+    assert len(stats.sample) == _DurationStats.SAMPLE_SIZE
+    assert stats.max == (stats.count - 1) / 1000
+    assert stats.total == pytest.approx(sum(index / 1000 for index in range(stats.count)))
+    # Durations are uniform over 0..3.071s, so the sampled p95 lands near 2.92s
+    assert stats.p95() == pytest.approx(0.95 * stats.max, rel=0.05)
+
+def test_exact_p95_below_the_sample_size():
+    stats = _DurationStats()
+    for duration in range(1, 101):
+        stats.add(duration, None)
+    assert stats.p95() == 96
+
+def test_events_are_only_kept_when_recording(tmp_path):
+    tracer = Tracer()
+    with tracer.span("writer.write_file", "io"):
+        pass
+    assert tracer._events == []
+    tracer.record_events = True
+    with tracer.span("writer.write_file", "io", chars=5):
+        pass
+    path = tmp_path / "trace.json"
+    tracer.export_chrome_trace(str(path))
+    events = [event for event in json.loads(path.read_text(encoding="utf-8"))["traceEvents"] if event["ph"] == "X"]
+    assert [(event["name"], event["args"]) for event in events] == [("writer.write_file", {"chars": 5})]
@@ -0,0 +1,3 @@
+from .tracer import Span, Tracer, get_tracer, span
+
+__all__ = ['Span', 'Tracer', 'get_tracer', 'span']
@@ -0,0 +1,143 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+import json
+import os
+import random
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class Span:
+    """A timed section of work; attributes set while it is open end up in the trace and the summary."""
+
+    __slots__ = ("name", "category", "args")
+
+    def __init__(self, name: str, category: str, args: Dict[str, Any]):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def set(self, **args: Any) -> None:
+        self.args.update(args)
+
+class _DurationStats:
+    """Running count, total and max of one span name, plus a bounded random sample for the p95."""
+
+    __slots__ = ("count", "total", "max", "sample")
+
+    SAMPLE_SIZE = 1024  # durations kept per span name; the p95 is exact up to this many calls
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.sample: List[float] = []
+
+    def add(self, duration: float, rng: random.Random) -> None:
+        self.count += 1
+        self.total += duration
+        self.max = max(self.max, duration)
+        if len(self.sample) < self.SAMPLE_SIZE:
+            self.sample.append(duration)
+        else:
+            # Reservoir sampling: every duration so far is in the sample with equal probability
+            slot = rng.randrange(self.count)
+            if slot < self.SAMPLE_SIZE:
+                self.sample[slot] = duration
+
+    def p95(self) -> float:
+        ordered = sorted(self.sample)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+
+class Tracer:
+    """Collects spans from every thread.
+
+    Durations and numeric attributes are always aggregated per span name for
+    the summary table, in memory that does not grow with the number of spans;
+    individual events are only kept when `record_events` is set, since a large
+    run produces hundreds of thousands of spans.
+    """
+
+    def __init__(self, record_events: bool = False):
+        self.record_events = record_events
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._durations: Dict[str, _DurationStats] = defaultdict(_DurationStats)
+        self._rng = random.Random(0)
+        self._totals: Dict[str, Counter] = defaultdict(Counter)
+        self._events: List[Tuple[str, str, float, float, int, Dict[str, Any]]] = []
+        self._thread_names: Dict[int, str] = {}
+
+    @contextmanager
+    def span(self, name: str, category: str = "app", **args: Any) -> Iterator[Span]:
+        span = Span(name, category, args)
+        start = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.args["error"] = e.__class__.__name__
+            raise
+        finally:
+            self._finish(span, start, time.perf_counter())
+
+    def _finish(self, span: Span, start: float, end: float) -> None:
+        thread = threading.current_thread()
+        with self._lock:
+            self._durations[span.name].add(end - start, self._rng)
+            totals = self._totals[span.name]
+            for key, value in span.args.items():
+                if isinstance(value, bool):
+                    totals[key] += int(value)
+                elif isinstance(value, (int, float)):
+                    totals[key] += value
+            if self.record_events:
+                self._thread_names.setdefault(thread.ident, thread.name)
+                self._events.append((span.name, span.category, start, end, thread.ident, dict(span.args)))
+
+    def export_chrome_trace(self, path: str) -> None:
+        """Write the recorded spans as Chrome trace events (chrome://tracing, Perfetto)."""
+        pid = os.getpid()
+        with self._lock:
+            thread_ids = {ident: number for number, ident in enumerate(self._thread_names, start=1)}
+            events = [
+                {"name": "thread_name", "ph": "M", "pid": pid, "tid": thread_ids[ident], "args": {"name": name}}
+                for ident, name in self._thread_names.items()
+            ]
+            for name, category, start, end, ident, args in self._events:
+                events.append({
+                    "name": name, "cat": category, "ph": "X", "pid": pid, "tid": thread_ids[ident],
+                    "ts": round((start - self._origin) * 1e6, 1), "dur": round((end - start) * 1e6, 1),
+                    "args": args,
+                })
+        Path(path).write_text(json.dumps({"traceEvents": events, "displayTimeUnit": "ms"}), encoding="utf-8")
+        logger.info(f"Trace with {len(events)} events written to {path}")
+
+    def summary(self) -> str:
+        """Per-span table: call count, total/mean/p95/max wall time and summed attributes."""
+        with self._lock:
+            rows = sorted(((name, stats.count, stats.total, stats.p95(), stats.max)
+                           for name, stats in self._durations.items()), key=lambda row: row[2], reverse=True)
+            totals = {name: dict(counter) for name, counter in self._totals.items()}
+        lines = [f"{'span':<28} {'count':>7} {'total s':>9} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}  totals"]
+        for name, count, total, p95, longest in rows:
+            extra = ", ".join(f"{key}={value:g}" for key, value in sorted(totals.get(name, {}).items()))
+            lines.append(f"{name:<28} {count:>7} {total:>9.2f} {total / count * 1000:>9.1f} "
+                         f"{p95 * 1000:>9.1f} {longest * 1000:>9.1f}  {extra}")
+        return "\n".join(lines)
+
+    def has_spans(self) -> bool:
+        with self._lock:
+            return bool(self._durations)
+
+_tracer = Tracer()
+
+def get_tracer() -> Tracer:
+    return _tracer
+
+def span(name: str, category: str = "app", **args: Any):
+    """Open a span on the process-wide tracer."""
+    return _tracer.span(name, category, **args)
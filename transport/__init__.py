@@ -0,0 +1,14 @@
+from .rate_limiter import RateLimiter
+from .errors import api_errors, handle_groq_error
+from .streaming import StreamSink, ThinkFilter, TRUNCATION_MARKER, is_truncated, strip_reasoning
+from .tenant_transport import TenantTransport
+
+__all__ = ['RateLimiter', 'LLMTransport', 'TenantTransport', 'api_errors', 'handle_groq_error', 'StreamSink', 'ThinkFilter',
+           'TRUNCATION_MARKER', 'is_truncated', 'strip_reasoning']
+
+def __getattr__(name):
+    # LLMTransport pulls in the OpenAI SDK; only import it when it is actually asked for
+    if name == 'LLMTransport':
+        from . import llm_transport
+        return getattr(llm_transport, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
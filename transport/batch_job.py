@@ -0,0 +1,128 @@
+import json
+import secrets
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Hashable, Optional, Tuple
+import config
+from cache.response_cache import ResponseCache
+from describer.llm_describer import batched_module_paths
+from transport.chat_request import chat_request
+from transport.streaming import StreamSink, strip_reasoning
+from transport.tenant_transport import TenantTransport
+import logging
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+
+def custom_id(prompt: str, system: Optional[str] = None) -> str:
+    # The response cache key, so imported results land exactly where a live run would look them up
+    return ResponseCache.make_key(config.GROQ_MODEL, config.GROQ_API_BASE, prompt, system)
+
+class MissingBatchAnswer(LookupError):
+    """Raised with `answers_only` set for a prompt that has no imported answer."""
+
+class BatchJobTransport:
+    """Stands in for LLMTransport when answers come from a provider's batch endpoint.
+
+    Prompts whose answer is in the response cache (where --import-batch puts
+    batch results) are answered from it. Every other prompt becomes a batch
+    request and is answered with a pending marker; prompts quoting such a
+    marker depend on an answer that does not exist yet and wait for a later
+    round. With `answers_only` set such prompts raise MissingBatchAnswer
+    instead, so no marker can reach a written output.
+    """
+
+    def __init__(self, response_cache: ResponseCache):
+        self.response_cache = response_cache
+        self.requests: Dict[str, Dict[str, Any]] = {}
+        self.answered = 0
+        self.deferred = 0
+        self.missing = 0
+        self.answers_only = False
+        self.tenant_requests: Counter = Counter()
+        # Random per run, so source code that happens to contain a marker is never mistaken for one
+        self.pending_marker = f"[batch-pending-{secrets.token_hex(4)}:"
+        self._lock = threading.Lock()
+
+    def for_tenant(self, tenant: Hashable) -> TenantTransport:
+        return TenantTransport(self, tenant)
+
+    def complete(self, prompt: str, sink: Optional[StreamSink] = None, tenant: Hashable = None,
+                 stage: Optional[str] = None, item: Optional[str] = None, system: Optional[str] = None) -> str:
+        request_id = custom_id(prompt, system)
+        answer = self.response_cache.get(request_id)
+        if answer is not None:
+            answer = strip_reasoning(answer)
+            with self._lock:
+                self.answered += 1
+        elif self.answers_only:
+            with self._lock:
+                self.missing += 1
+            raise MissingBatchAnswer(f"No batch answer for prompt {request_id}")
+        else:
+            with self._lock:
+                if self.pending_marker in prompt or (system and self.pending_marker in system):
+                    self.deferred += 1
+                elif request_id not in self.requests:
+                    self.requests[request_id] = {"custom_id": request_id, "method": "POST",
+                                                 "url": BATCH_ENDPOINT, "body": chat_request(prompt, system)}
+                    self.tenant_requests[tenant] += 1
+            answer = f"{self.pending_marker}{request_id}]"
+            if stage == "module_batch":
+                # Keep the batched answer parseable so its modules are not retried one by one
+                answer = json.dumps({path: answer for path in batched_module_paths(prompt)})
+        if sink:
+            sink.write(answer)
+        return answer
+
+    @property
+    def complete_run(self) -> bool:
+        """True when every prompt of the run was answered, so its output can be written for real."""
+        return not self.requests and not self.deferred
+
+    def write_requests(self, path: Path) -> int:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            for request_id in sorted(self.requests):
+                f.write(json.dumps(self.requests[request_id], ensure_ascii=False) + "\n")
+        return len(self.requests)
+
+    def stats(self) -> str:
+        return (f"Batch job: {self.answered} prompts answered from imported results, "
+                f"{len(self.requests)} to submit, {self.deferred} waiting for a later round")
+
+def _response_content(result: Dict[str, Any]) -> Optional[str]:
+    response = result.get("response") or {}
+    if result.get("error") or response.get("status_code", 200) != 200:
+        return None
+    choices = (response.get("body") or {}).get("choices") or []
+    if not choices:
+        return None
+    content = strip_reasoning((choices[0].get("message") or {}).get("content") or "")
+    return content or None
+
+def import_batch_results(path: Path, response_cache: ResponseCache) -> Tuple[int, int]:
+    """Store the answers of a batch result file in the response cache; returns (stored, failed)."""
+    stored = failed = 0
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                result = json.loads(line)
+                request_id = result["custom_id"]
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping malformed line {line_number} of {path}: {e}")
+                failed += 1
+                continue
+            content = _response_content(result)
+            if content is None:
+                logger.warning(f"Batch request {request_id} has no answer: {result.get('error') or 'empty response'}")
+                failed += 1
+                continue
+            response_cache.put(request_id, content)
+            stored += 1
+    return stored, failed
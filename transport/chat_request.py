@@ -0,0 +1,20 @@
+from typing import Any, Dict, List, Optional
+import config
+
+def chat_request(prompt: str, system: Optional[str] = None) -> Dict[str, Any]:
+    """Chat-completions request body for `prompt`, shared by live calls and exported batch jobs.
+
+    The system message goes first so a prefix shared by many calls can be
+    served from the provider's prompt cache.
+    """
+    messages: List[Dict[str, str]] = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": prompt})
+    body: Dict[str, Any] = {
+        "model": config.GROQ_MODEL,
+        "messages": messages,
+    }
+    if config.MAX_OUTPUT_TOKENS:
+        body["max_tokens"] = config.MAX_OUTPUT_TOKENS
+    return body
@@ -0,0 +1,59 @@
+from typing import Tuple, Type
+import sys
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+def api_errors() -> Tuple[Type[BaseException], ...]:
+    """Exception types raised by the LLM client, for use in except clauses.
+
+    The OpenAI SDK is only imported once an LLM call is actually made; before
+    that no API error can have been raised, so an empty tuple (matching
+    nothing) keeps callers from importing the SDK just to catch its errors.
+    """
+    openai = sys.modules.get("openai")
+    return (openai.OpenAIError,) if openai is not None else ()
+
+def handle_groq_error(e: Exception) -> str:
+    """Handle Groq API errors with user-friendly messages."""
+    error_message = f"Groq API error: {e}"
+    try:
+        # Try to get structured error details if available
+        error_data = e.response.json().get('error', {})
+        code = error_data.get('code')
+        message = error_data.get('message', str(e)) # Fallback to default message
+
+        if code == 'rate_limit_exceeded':
+            error_message = f"""
+Error: Groq API rate limit exceeded.
+Message: {message}
+Please check your Groq account billing and quota at: https://console.groq.com/settings/billing
+"""
+        elif code == 'model_not_found' or 'decommissioned' in message:
+             error_message = f"""
+Error: The model '{config.GROQ_MODEL}' is not available or decommissioned.
+Message: {message}
+Please check available models or modify config.py.
+"""
+        elif code == 'invalid_api_key' or e.http_status == 401:
+             error_message = f"""
+Error: Invalid Groq API key.
+Message: {message}
+Please check that your API key is correct and properly set in the environment variable.
+"""
+        else:
+             error_message = f"Groq API error (Code: {code}): {message}"
+
+    except Exception:
+        # Fallback if parsing error details fails
+        logger.debug("Could not parse structured error details from Groq API response.", exc_info=True)
+        # Use basic string checks as fallback
+        if "insufficient_quota" in str(e) or "rate_limit_exceeded" in str(e):
+            error_message = "Error: Groq API quota exceeded or rate limit reached."
+        elif "model_not_found" in str(e) or "decommissioned" in str(e):
+            error_message = f"Error: The model '{config.GROQ_MODEL}' is not available or decommissioned."
+        elif "invalid_api_key" in str(e) or getattr(e, 'http_status', None) == 401:
+            error_message = "Error: Invalid Groq API key."
+
+    return error_message
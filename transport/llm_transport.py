@@ -0,0 +1,403 @@
+import random
+import re
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Hashable, Iterator, List, Mapping, Optional, Set, Tuple
+from openai import OpenAI, OpenAIError, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+import config
+from transport.rate_limiter import RateLimiter
+from transport.streaming import TRUNCATION_MARKER, StreamSink, ThinkFilter, strip_reasoning
+from transport.tenant_transport import TenantTransport
+from transport.chat_request import chat_request
+from budget.run_budget import RunBudget, expected_output_tokens
+from budget.token_counter import count_tokens
+from cache.response_cache import ResponseCache
+from tracing import Span, span
+import logging
+
+logger = logging.getLogger(__name__)
+
+_STALLED = object()
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    """Parse rate-limit header durations such as '7.66s', '2m59.56s', '120ms' or plain seconds."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if parts:
+        units = {"h": 3600.0, "m": 60.0, "s": 1.0, "ms": 0.001}
+        return sum(float(amount) * units[unit] for amount, unit in parts)
+    try:
+        # retry-after may also be an HTTP date
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _usage_field(usage: Any, name: str) -> Any:
+    """Read a usage field from an SDK object or from the plain dict some providers' extra fields arrive as."""
+    if usage is None:
+        return None
+    if isinstance(usage, Mapping):
+        return usage.get(name)
+    return getattr(usage, name, None)
+
+class AdaptiveConcurrency:
+    """AIMD limit on in-flight requests: halved when throttled, grown by one after a run of successes.
+
+    Free slots are handed out round-robin across tenants (projects in batch
+    mode), so one project with a deep queue cannot starve the others.
+    """
+
+    SUCCESSES_PER_INCREASE = 10
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+        self._waiting: Dict[Hashable, Deque[object]] = {}
+        self._rotation: Deque[Hashable] = deque()
+        self._granted: Set[object] = set()
+
+    def acquire(self, tenant: Hashable = None) -> None:
+        with self._condition:
+            ticket = object()
+            queue = self._waiting.get(tenant)
+            if queue is None:
+                queue = self._waiting[tenant] = deque()
+                self._rotation.append(tenant)
+            queue.append(ticket)
+            self._dispatch()
+            while ticket not in self._granted:
+                self._condition.wait()
+            self._granted.discard(ticket)
+
+    def _dispatch(self) -> None:
+        # Caller holds the condition. Serve the oldest waiter of each tenant in turn.
+        granted = False
+        while self._in_flight < self.limit and self._rotation:
+            tenant = self._rotation.popleft()
+            queue = self._waiting[tenant]
+            self._granted.add(queue.popleft())
+            self._in_flight += 1
+            granted = True
+            if queue:
+                self._rotation.append(tenant)
+            else:
+                del self._waiting[tenant]
+        if granted:
+            self._condition.notify_all()
+
+    def release(self, throttled: bool = False) -> None:
+        with self._condition:
+            self._in_flight -= 1
+            if throttled:
+                new_limit = max(1, self.limit // 2)
+                if new_limit < self.limit:
+                    logger.warning(f"Throttled by the API, lowering concurrency to {new_limit}")
+                self.limit = new_limit
+                self._successes = 0
+            else:
+                self._successes += 1
+                if self._successes >= self.SUCCESSES_PER_INCREASE and self.limit < self.max_limit:
+                    self.limit += 1
+                    self._successes = 0
+            self._dispatch()
+
+class LLMTransport:
+    """Single pooled chat-completions client shared by ProjectAnalyzer and LLMDescriber.
+
+    Handles the response cache, the request/token rate limiter, retries with
+    jittered exponential backoff that honour retry-after and x-ratelimit-*
+    headers, and adaptive concurrency when the provider throttles. With a
+    RunBudget every uncached call is charged against it and raises
+    BudgetExhausted once the budget or deadline is used up.
+    """
+
+    def __init__(self, rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 concurrency: Optional[int] = None,
+                 max_retries: Optional[int] = None,
+                 budget: Optional[RunBudget] = None):
+        self.rate_limiter = rate_limiter
+        self.budget = budget
+        self.response_cache = response_cache
+        self.max_retries = config.MAX_RETRIES if max_retries is None else max_retries
+        self.concurrency = AdaptiveConcurrency(config.DEFAULT_CONCURRENCY if concurrency is None else concurrency)
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.tenant_requests: Counter = Counter()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+        try:
+            self.client = OpenAI(
+                api_key=config.GROQ_API_KEY,
+                base_url=config.GROQ_API_BASE,
+                default_headers={
+                    "Content-Type": "application/json"
+                },
+                max_retries=0,  # Retries are handled here so every caller shares the backoff state
+                timeout=config.HTTP_TIMEOUT,
+                http_client=self._build_http_client(concurrency)
+            )
+        except Exception as e:
+            logger.error(f"Failed to initialize OpenAI client: {e}", exc_info=True)
+            raise  # Re-raise the exception to be caught in main
+
+    def _build_http_client(self, concurrency: int):
+        try:
+            import httpx
+            from openai import DefaultHttpxClient
+        except ImportError:
+            logger.debug("httpx not importable, using the SDK's default connection pool")
+            return None
+        max_connections = max(concurrency, config.HTTP_MAX_CONNECTIONS)
+        return DefaultHttpxClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=config.HTTP_KEEPALIVE_EXPIRY
+            ),
+            timeout=config.HTTP_TIMEOUT
+        )
+
+    def for_tenant(self, tenant: Hashable) -> TenantTransport:
+        return TenantTransport(self, tenant)
+
+    def complete(self, prompt: str, sink: Optional[StreamSink] = None, tenant: Hashable = None,
+                 stage: Optional[str] = None, item: Optional[str] = None, system: Optional[str] = None) -> str:
+        """Return the completion for `prompt`; with a sink the answer is streamed into it as it arrives.
+
+        `system` is sent as the system message ahead of the prompt. `stage`
+        and `item` only label the call in traces.
+        """
+        with span("llm.complete", "llm", stage=stage, item=item, prompt_chars=len(prompt),
+                  system_chars=len(system or ""), streamed=sink is not None) as call_span:
+            return self._complete(prompt, system, sink, tenant, call_span)
+
+    def _complete(self, prompt: str, system: Optional[str], sink: Optional[StreamSink], tenant: Hashable,
+                  call_span: Span) -> str:
+        cache_key = None
+        if self.response_cache:
+            cache_key = ResponseCache.make_key(config.GROQ_MODEL, config.GROQ_API_BASE, prompt, system)
+            cached = self.response_cache.get(cache_key)
+            call_span.set(cache_hit=cached is not None)
+            if cached is not None:
+                # Entries written before answers were filtered may still hold reasoning blocks
+                cached = strip_reasoning(cached)
+                logger.debug(f"Cache hit for prompt: {prompt[:100]}...")
+                if sink:
+                    sink.write(cached)
+                return cached
+
+        if not self.budget:
+            return self._request(prompt, system, sink, tenant, call_span, cache_key)
+        input_tokens = count_tokens(prompt) + count_tokens(system or "")
+        reserved = input_tokens + expected_output_tokens()
+        self.budget.reserve(reserved)
+        content = ""
+        try:
+            content = self._request(prompt, system, sink, tenant, call_span, cache_key)
+            return content
+        finally:
+            self.budget.settle(reserved, input_tokens + count_tokens(content))
+
+    def _request(self, prompt: str, system: Optional[str], sink: Optional[StreamSink], tenant: Hashable,
+                 call_span: Span, cache_key: Optional[str]) -> str:
+        attempt = 0
+        while True:
+            self._wait_if_blocked()
+            # The fair slot comes first so the rate budget is also shared out in round-robin order
+            self.concurrency.acquire(tenant)
+            throttled = False
+            try:
+                if self.rate_limiter:
+                    self.rate_limiter.acquire(count_tokens(prompt) + count_tokens(system or ""))
+                logger.debug(f"Sending prompt to Groq: {prompt[:100]}...")
+                with self._lock:
+                    self.requests += 1
+                    self.tenant_requests[tenant] += 1
+                cacheable = True
+                with span("llm.request", "llm", retry=attempt > 0):
+                    if sink:
+                        sink.reset()
+                        content, cacheable = self._stream_completion(prompt, system, sink, call_span)
+                    else:
+                        raw_response = self.client.chat.completions.with_raw_response.create(
+                            **chat_request(prompt, system)
+                        )
+                        self._observe_rate_limit_headers(raw_response.headers)
+                        response = raw_response.parse()
+                        content = strip_reasoning(response.choices[0].message.content or "")
+                        self._record_usage(call_span, getattr(response, "usage", None), prompt, system, content)
+                logger.debug(f"Received response from Groq: {content[:100]}...")
+                if cache_key and cacheable:
+                    self.response_cache.put(cache_key, content)
+                return content
+            except OpenAIError as e:
+                throttled = isinstance(e, RateLimitError)
+                delay = self._retry_delay(e, attempt)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                call_span.set(retries=attempt)
+                with self._lock:
+                    self.retries += 1
+                    if throttled:
+                        self.throttled += 1
+                        self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+                logger.warning(f"Groq API call failed ({e.__class__.__name__}), retry {attempt}/{self.max_retries} in {delay:.1f}s")
+            finally:
+                self.concurrency.release(throttled)
+            time.sleep(delay)
+
+    def _record_usage(self, call_span: Span, usage: Any, prompt: str, system: Optional[str], content: str) -> None:
+        prompt_tokens = _usage_field(usage, "prompt_tokens")
+        if prompt_tokens is not None:
+            # OpenAI-style usage reports prompt-cache hits under prompt_tokens_details, some providers at the top level
+            cached_tokens = (_usage_field(_usage_field(usage, "prompt_tokens_details"), "cached_tokens")
+                             or _usage_field(usage, "prompt_cache_hit_tokens") or 0)
+            call_span.set(prompt_tokens=prompt_tokens, cached_tokens=cached_tokens,
+                          completion_tokens=_usage_field(usage, "completion_tokens") or 0)
+            with self._lock:
+                self.prompt_tokens += prompt_tokens
+                self.cached_tokens += cached_tokens
+        else:
+            # Streams usually carry no usage block: fall back to the same estimate the rate limiter uses
+            call_span.set(prompt_tokens=count_tokens(prompt) + count_tokens(system or ""),
+                          completion_tokens=count_tokens(content), usage_estimated=True)
+
+    def _stream_completion(self, prompt: str, system: Optional[str], sink: StreamSink,
+                           call_span: Span) -> Tuple[str, bool]:
+        """Stream one answer into the sink; returns the text and False when it was cut off.
+
+        The call is cut off once it has run CALL_TIMEOUT seconds, checked as
+        chunks arrive, or when the stream stalls that long: the read timeout
+        of the request is capped at CALL_TIMEOUT.
+        """
+        options = {"timeout": min(config.HTTP_TIMEOUT, config.CALL_TIMEOUT)} if config.CALL_TIMEOUT else {}
+        raw_response = self.client.chat.completions.with_raw_response.create(**chat_request(prompt, system),
+                                                                             stream=True, **options)
+        self._observe_rate_limit_headers(raw_response.headers)
+        stream = raw_response.parse()
+        think_filter = ThinkFilter()
+        parts = []
+        started = time.monotonic()
+        leading = True
+        complete = True
+        usage = None
+        try:
+            for chunk in self._chunks(stream, parts):
+                if chunk is not _STALLED:
+                    # Groq puts the usage of a stream in the x_groq block of its last chunk
+                    usage = getattr(chunk, "usage", None) or _usage_field(getattr(chunk, "x_groq", None), "usage") or usage
+                    if not chunk.choices:
+                        continue
+                    text = think_filter.feed(chunk.choices[0].delta.content or "")
+                    if leading:
+                        # Mirror the .strip() of non-streamed answers at the start of the text
+                        text = text.lstrip()
+                        leading = not text
+                    if text:
+                        sink.write(text)
+                        parts.append(text)
+                    if not config.CALL_TIMEOUT or time.monotonic() - started <= config.CALL_TIMEOUT:
+                        continue
+                reason = "stalled for" if chunk is _STALLED else "exceeded"
+                logger.warning(f"Streamed call {reason} {config.CALL_TIMEOUT}s, cutting it off")
+                marker = f"\n{TRUNCATION_MARKER}"
+                sink.write(marker)
+                parts.append(marker)
+                complete = False
+                break
+        finally:
+            stream.close()
+        remainder = think_filter.flush() if complete else ""
+        if remainder:
+            sink.write(remainder)
+            parts.append(remainder)
+        content = "".join(parts).strip()
+        self._record_usage(call_span, usage, prompt, system, content)
+        return content, complete
+
+    @staticmethod
+    def _chunks(stream: Any, parts: List[str]) -> Iterator[Any]:
+        """Chunks of `stream`; a read timeout after some text was received ends it with _STALLED instead."""
+        try:
+            yield from stream
+        except APITimeoutError:
+            if not parts:
+                raise # Nothing streamed yet: retry the call as a whole
+            yield _STALLED
+
+    def _retry_delay(self, error: OpenAIError, attempt: int) -> Optional[float]:
+        """Seconds to wait before retrying `error`, or None when it is not retryable."""
+        if isinstance(error, (APIConnectionError, APITimeoutError)):
+            headers = None
+        elif isinstance(error, APIStatusError) and (error.status_code in (408, 409, 429) or error.status_code >= 500):
+            headers = error.response.headers
+        else:
+            return None
+        # Full jitter keeps concurrent workers from retrying in lockstep
+        backoff = random.uniform(0, min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * (2 ** attempt)))
+        server_delay = self._server_delay(headers) if headers is not None else None
+        if server_delay is not None:
+            return min(config.RETRY_MAX_DELAY, server_delay) + random.uniform(0, config.RETRY_BASE_DELAY)
+        return backoff
+
+    def _server_delay(self, headers: Mapping[str, str]) -> Optional[float]:
+        retry_after_ms = headers.get("retry-after-ms")
+        if retry_after_ms:
+            try:
+                return float(retry_after_ms) / 1000
+            except ValueError:
+                pass
+        retry_after = parse_duration(headers.get("retry-after"))
+        if retry_after is not None:
+            return retry_after
+        resets = [
+            parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+            for kind in ("requests", "tokens")
+            if headers.get(f"x-ratelimit-remaining-{kind}") in ("0", None)
+        ]
+        resets = [reset for reset in resets if reset is not None]
+        return max(resets) if resets else None
+
+    def _observe_rate_limit_headers(self, headers: Mapping[str, str]) -> None:
+        # Pause everyone proactively once the provider reports an exhausted window
+        for kind in ("requests", "tokens"):
+            if headers.get(f"x-ratelimit-remaining-{kind}") == "0":
+                reset = parse_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    logger.debug(f"Rate limit window for {kind} exhausted, pausing for {reset:.2f}s")
+                    with self._lock:
+                        self._blocked_until = max(self._blocked_until, time.monotonic() + reset)
+
+    def _wait_if_blocked(self) -> None:
+        while True:
+            with self._lock:
+                wait = self._blocked_until - time.monotonic()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def stats(self) -> str:
+        cached = ""
+        if self.prompt_tokens:
+            cached = (f", {self.cached_tokens}/{self.prompt_tokens} reported prompt tokens served from the "
+                      f"provider's prompt cache ({self.cached_tokens / self.prompt_tokens:.0%})")
+        return (f"LLM transport: {self.requests} requests, {self.retries} retries, "
+                f"{self.throttled} throttled, final concurrency {self.concurrency.limit}/{self.concurrency.max_limit}"
+                f"{cached}")
@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import deque
+from typing import Deque, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RateLimiter:
+    """Sliding one-minute window limiter for requests and tokens.
+
+    A limit of 0 disables that dimension. Safe to share between threads.
+    """
+
+    WINDOW_SECONDS = 60.0
+
+    def __init__(self, requests_per_minute: int = 0, tokens_per_minute: int = 0):
+        self.requests_per_minute = max(0, requests_per_minute or 0)
+        self.tokens_per_minute = max(0, tokens_per_minute or 0)
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._tokens_in_window = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.requests_per_minute or self.tokens_per_minute)
+
+    def _purge(self, now: float) -> None:
+        while self._events and now - self._events[0][0] >= self.WINDOW_SECONDS:
+            _, tokens = self._events.popleft()
+            self._tokens_in_window -= tokens
+
+    def _wait_time(self, now: float, tokens: int) -> float:
+        if self.requests_per_minute and len(self._events) >= self.requests_per_minute:
+            return self._events[0][0] + self.WINDOW_SECONDS - now
+        if self.tokens_per_minute and self._events:
+            # A single request larger than the whole budget is let through on an empty window
+            if self._tokens_in_window + tokens > self.tokens_per_minute:
+                freed = 0
+                for timestamp, event_tokens in self._events:
+                    freed += event_tokens
+                    if self._tokens_in_window - freed + tokens <= self.tokens_per_minute:
+                        return timestamp + self.WINDOW_SECONDS - now
+                return self._events[-1][0] + self.WINDOW_SECONDS - now
+        return 0.0
+
+    def acquire(self, tokens: int = 0) -> None:
+        """Block until a request costing `tokens` fits in the current window."""
+        if not self.enabled:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._purge(now)
+                wait = self._wait_time(now, tokens)
+                if wait <= 0:
+                    self._events.append((now, tokens))
+                    self._tokens_in_window += tokens
+                    return
+            logger.debug(f"Rate limit reached, waiting {wait:.2f}s")
+            time.sleep(wait)
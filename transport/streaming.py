@@ -0,0 +1,58 @@
+from typing import Protocol
+
+# Ends a streamed answer cut off by the call timeout; such answers are neither cached nor recorded as final
+TRUNCATION_MARKER = "[Dipotong: batas waktu panggilan tercapai]"
+
+def is_truncated(text: str) -> bool:
+    return text.endswith(TRUNCATION_MARKER)
+
+class StreamSink(Protocol):
+    """Destination for streamed completion text; reset() discards partial output before a retry."""
+
+    def write(self, text: str) -> None: ...
+
+    def reset(self) -> None: ...
+
+class ThinkFilter:
+    """Drops <think>...</think> reasoning blocks from streamed text, even when tags span chunks."""
+
+    OPEN_TAG = "<think>"
+    CLOSE_TAG = "</think>"
+
+    def __init__(self):
+        self._buffer = ""
+        self._in_think = False
+
+    def feed(self, text: str) -> str:
+        self._buffer += text
+        output = []
+        while self._buffer:
+            tag = self.CLOSE_TAG if self._in_think else self.OPEN_TAG
+            index = self._buffer.find(tag)
+            if index != -1:
+                if not self._in_think:
+                    output.append(self._buffer[:index])
+                self._buffer = self._buffer[index + len(tag):]
+                self._in_think = not self._in_think
+                continue
+            # Hold back a suffix that could be the start of a tag split across chunks
+            keep = 0
+            for length in range(min(len(tag) - 1, len(self._buffer)), 0, -1):
+                if tag.startswith(self._buffer[-length:]):
+                    keep = length
+                    break
+            if not self._in_think:
+                output.append(self._buffer[:len(self._buffer) - keep])
+            self._buffer = self._buffer[len(self._buffer) - keep:] if keep else ""
+            break
+        return "".join(output)
+
+    def flush(self) -> str:
+        remainder = "" if self._in_think else self._buffer
+        self._buffer = ""
+        return remainder
+
+def strip_reasoning(text: str) -> str:
+    """Drop <think>...</think> blocks from a complete answer, exactly as a streamed answer is filtered."""
+    think_filter = ThinkFilter()
+    return (think_filter.feed(text) + think_filter.flush()).strip()
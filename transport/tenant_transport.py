@@ -0,0 +1,16 @@
+from typing import TYPE_CHECKING, Hashable, Optional
+from transport.streaming import StreamSink
+
+if TYPE_CHECKING:
+    from transport.llm_transport import LLMTransport
+
+class TenantTransport:
+    """View of a shared LLMTransport that tags every call with one tenant for fair scheduling."""
+
+    def __init__(self, transport: "LLMTransport", tenant: Hashable):
+        self.transport = transport
+        self.tenant = tenant
+
+    def complete(self, prompt: str, sink: Optional[StreamSink] = None, stage: Optional[str] = None,
+                 item: Optional[str] = None, system: Optional[str] = None) -> str:
+        return self.transport.complete(prompt, sink, tenant=self.tenant, stage=stage, item=item, system=system)
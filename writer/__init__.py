@@ -1,3 +1,7 @@
 from .output_writer import OutputWriter
+from .run_manifest import RunManifest
+from .batch_index import BatchIndex
+from .description_store import DescriptionStore
+from .store_export import export_markdown, export_text
 
-__all__ = ['OutputWriter'] 
\ No newline at end of file
+__all__ = ['OutputWriter', 'RunManifest', 'BatchIndex', 'DescriptionStore', 'export_markdown', 'export_text']
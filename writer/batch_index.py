@@ -0,0 +1,56 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import config
+import logging
+
+logger = logging.getLogger(__name__)
+
+class BatchIndex:
+    """Consolidated index of a multi-project run, written next to the per-project output directories."""
+
+    FILE_NAME = "indeks_proyek.txt"
+    JSON_FILE_NAME = "indeks_proyek.json"
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.entries: List[Dict] = []
+
+    def add(self, name: str, project_path: Path, project_output_dir: Path, succeeded: bool,
+            modules: int = 0, directories: int = 0, requests: int = 0, error: Optional[str] = None) -> None:
+        self.entries.append({
+            "name": name,
+            "path": str(project_path),
+            "output": Path(project_output_dir).relative_to(self.output_dir).as_posix(),
+            "status": "selesai" if succeeded else "gagal",
+            "modules": modules,
+            "directories": directories,
+            "requests": requests,
+            "error": error,
+        })
+
+    def write(self) -> Path:
+        entries = sorted(self.entries, key=lambda entry: entry["name"])
+        failed = sum(1 for entry in entries if entry["status"] != "selesai")
+        lines = [
+            "",
+            f"Dibuat pada: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Model Analisis: {config.GROQ_MODEL}",
+            f"Jumlah Proyek: {len(entries)} ({failed} gagal)",
+            "",
+        ]
+        for entry in entries:
+            lines += [
+                f"📁 Proyek: {entry['name']}",
+                f"Path: {entry['path']}",
+                f"Status: {entry['status']}" + (f" ({entry['error']})" if entry["error"] else ""),
+                f"Analisis: {entry['output']}/analisis_proyek.txt",
+                f"Modul: {entry['modules']}, Direktori: {entry['directories']}, Permintaan LLM: {entry['requests']}",
+                "",
+            ]
+        index_path = self.output_dir / self.FILE_NAME
+        index_path.write_text("\n".join(lines), encoding='utf-8')
+        (self.output_dir / self.JSON_FILE_NAME).write_text(json.dumps(entries, indent=2, ensure_ascii=False), encoding='utf-8')
+        logger.info(f"Batch index written to {index_path}")
+        return index_path
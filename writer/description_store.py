@@ -0,0 +1,146 @@
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+import config
+from budget.token_counter import count_tokens
+import logging
+
+logger = logging.getLogger(__name__)
+
+_CLOSE = object()
+_COLUMNS = ("output", "kind", "path", "description", "source_hash", "model", "tokens", "created", "updated")
+
+class DescriptionStore:
+    """One SQLite file holding every description of an output directory.
+
+    Rows are keyed by `output`, the relative path the description would have
+    as a text file, which is also what the run manifest records. Writes are
+    queued and committed by a background thread in batched transactions, so
+    the pipeline never waits for the disk; reads flush the queue first.
+    A `read_only` store (an earlier run's, for carry-over) has no writer thread.
+    """
+
+    FILE_NAME = "deskripsi.sqlite3"
+
+    def __init__(self, db_path: Path, read_only: bool = False, batch_size: Optional[int] = None):
+        self.db_path = Path(db_path)
+        self.read_only = read_only
+        self.batch_size = max(1, config.STORE_BATCH_SIZE if batch_size is None else batch_size)
+        self.written = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+        if read_only:
+            self._conn = sqlite3.connect(f"{self.db_path.resolve().as_uri()}?mode=ro", uri=True,
+                                         check_same_thread=False)
+            self._queue = None
+            self._thread = None
+            return
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS descriptions (
+                output TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                path TEXT NOT NULL,
+                description TEXT NOT NULL,
+                source_hash TEXT,
+                model TEXT,
+                tokens INTEGER NOT NULL,
+                created REAL NOT NULL,
+                updated REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_descriptions_kind_path ON descriptions(kind, path)")
+        self._conn.commit()
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="description-store", daemon=True)
+        self._thread.start()
+
+    def put(self, output: str, kind: str, path: str, description: str, source_hash: Optional[str] = None,
+            model: Optional[str] = None, created: Optional[float] = None) -> None:
+        now = time.time()
+        self._queue.put(("put", (output, kind, path, description, source_hash, model, count_tokens(description),
+                                 created or now, now)))
+
+    def delete(self, output: str) -> None:
+        self._queue.put(("delete", output))
+
+    def _run(self) -> None:
+        while True:
+            batch: List[Any] = [self._queue.get()]
+            # Whatever queued up while the last transaction ran goes into the next one
+            while batch[-1] is not _CLOSE and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            operations = [item for item in batch if item is not _CLOSE]
+            try:
+                if operations:
+                    self._commit(operations)
+            except sqlite3.Error:
+                logger.exception(f"Could not write {len(operations)} descriptions to {self.db_path}")
+                self.failed += len(operations)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if batch[-1] is _CLOSE:
+                return
+
+    def _commit(self, operations: List[Tuple[str, Any]]) -> None:
+        with self._lock, self._conn:
+            for operation, value in operations:
+                if operation == "put":
+                    self._conn.execute(
+                        f"INSERT INTO descriptions ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))}) "
+                        "ON CONFLICT(output) DO UPDATE SET kind = excluded.kind, path = excluded.path, "
+                        "description = excluded.description, source_hash = excluded.source_hash, "
+                        "model = excluded.model, tokens = excluded.tokens, updated = excluded.updated",
+                        value
+                    )
+                else:
+                    self._conn.execute("DELETE FROM descriptions WHERE output = ?", (value,))
+        self.written += len(operations)
+
+    def flush(self) -> None:
+        """Wait until every queued write is committed."""
+        if self._queue is not None:
+            self._queue.join()
+
+    def get_record(self, output: str) -> Optional[Dict[str, Any]]:
+        self.flush()
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(_COLUMNS)} FROM descriptions WHERE output = ?",
+                                     (output,)).fetchone()
+        return dict(zip(_COLUMNS, row)) if row else None
+
+    def get(self, output: str) -> Optional[str]:
+        record = self.get_record(output)
+        return record["description"] if record else None
+
+    def records(self, kind: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+        """Every description in path order, optionally of one kind only ("Modul", "Direktori" or "Proyek")."""
+        self.flush()
+        query = f"SELECT {', '.join(_COLUMNS)} FROM descriptions"
+        parameters: Tuple = ()
+        if kind:
+            query += " WHERE kind = ?"
+            parameters = (kind,)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY kind, path", parameters).fetchall()
+        for row in rows:
+            yield dict(zip(_COLUMNS, row))
+
+    def close(self) -> None:
+        if self._thread is not None:
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            self._conn.close()
+
+    def stats(self) -> str:
+        return f"Description store: {self.written} writes to {self.db_path}, {self.failed} failed"
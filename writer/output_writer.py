@@ -1,15 +1,77 @@
-from typing import Dict
+from typing import Any, Dict, Iterator, Optional
 from pathlib import Path
+from contextlib import contextmanager
 import config
+from tracing import span
+from writer.description_store import DescriptionStore
 from datetime import datetime
+import io
 import os
+import shutil
+import tempfile
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Read once at import: os.umask can only be queried by setting it, which would race with worker threads
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def description_header(kind: str, path: Path) -> str:
+    return f"""
+{kind}: {path.name}
+Path: {path}
+
+Deskripsi:
+"""
+
+def description_footer(created: Optional[datetime] = None) -> str:
+    return f"""
+
+Dibuat pada: {(created or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}
+"""
+
+class DescriptionStream:
+    """Sink for a description that is streamed straight into its output file."""
+
+    def __init__(self, file, body_start: int):
+        self._file = file
+        self._body_start = body_start
+        self.chars = 0
+
+    def write(self, text: str) -> None:
+        self._file.write(text)
+        self._file.flush()
+        self.chars += len(text)
+
+    def reset(self) -> None:
+        # A retried call starts over: drop whatever the failed attempt streamed
+        self._file.seek(self._body_start)
+        self._file.truncate()
+        self.chars = 0
 
 class OutputWriter:
-    def __init__(self, output_path: str = None):
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-        self.output_dir = Path("output") / f"analisis-{timestamp}"
+    """Writes the analysis file plus one description per module and directory.
+
+    Descriptions go to text files mirroring the project tree, or with
+    `use_store` into a single DescriptionStore in the output directory, keyed
+    by the path the text file would have. Callers see the same paths either way.
+    """
+
+    def __init__(self, output_path: str = None, output_dir: Optional[str] = None, project_path: Optional[Path] = None,
+                 use_store: bool = False):
+        # With the project root known, descriptions mirror the project layout so equal file names never collide
+        self.project_path = Path(project_path) if project_path else None
+        # A fixed output_dir is updated in place (watch mode); otherwise every run gets its own directory
+        if output_dir:
+            self.output_dir = Path(output_dir)
+        else:
+            timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            self.output_dir = Path("output") / f"analisis-{timestamp}"
         self.output_dir.mkdir(parents=True, exist_ok=True)
         self.output_path = self.output_dir / "analisis_proyek.txt"
+        self.store = DescriptionStore(self.output_dir / DescriptionStore.FILE_NAME) if use_store else None
+        self._previous_stores: Dict[Path, DescriptionStore] = {}
 
     def write_analysis(self, analysis_results: Dict[str, str], description: str) -> None:
         output = config.OUTPUT_TEMPLATE.format(
@@ -25,41 +87,189 @@ class OutputWriter:
 Dibuat pada: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 Model Analisis: {config.GROQ_MODEL}
 """
+        if self.store:
+            self.store.put(self._output_key(self.output_path), "Proyek", analysis_results['project_name'], output,
+                           model=config.GROQ_MODEL)
         output = metadata + output
 
-        with open(self.output_path, 'w', encoding='utf-8') as f:
-            f.write(output)
+        self._write_file(self.output_path, output)
 
-    def write_module_description(self, module_path: Path, description: str) -> None:
-        modules_dir = self.output_dir / "modul"
-        modules_dir.mkdir(exist_ok=True)
-        
-        output = f"""
-Modul: {module_path.name}
-Path: {module_path}
+    def _write_file(self, output_path: Path, content: str) -> None:
+        # Write through a temporary file so hard-linked descriptions from earlier runs are never modified
+        with span("writer.write_file", "io", chars=len(content)):
+            tmp_path = output_path.with_name(output_path.name + ".tmp")
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            os.replace(tmp_path, output_path)
 
-Deskripsi:
-{description}
+    def _relative_parent(self, path: Path) -> Path:
+        if self.project_path is None:
+            return Path()
+        try:
+            return path.relative_to(self.project_path).parent
+        except ValueError:
+            return Path()
 
-Dibuat pada: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-        output_path = modules_dir / f"{module_path.stem}_deskripsi.txt"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(output)
+    def module_output_path(self, module_path: Path) -> Path:
+        return self.output_dir / "modul" / self._relative_parent(module_path) / f"{module_path.stem}_deskripsi.txt"
+
+    def directory_output_path(self, dir_path: Path) -> Path:
+        return self.output_dir / "direktori" / self._relative_parent(dir_path) / f"{dir_path.name}_deskripsi.txt"
+
+    def _output_key(self, output_path: Path) -> str:
+        return output_path.relative_to(self.output_dir).as_posix()
+
+    def _source_path(self, path: Path) -> str:
+        if self.project_path is not None:
+            try:
+                return path.relative_to(self.project_path).as_posix()
+            except ValueError:
+                pass
+        return str(path)
+
+    @staticmethod
+    def _parse_description_file(output_path: Path) -> str:
+        content = output_path.read_text(encoding='utf-8')
+        start = content.index("Deskripsi:\n") + len("Deskripsi:\n")
+        end = content.rindex("\n\nDibuat pada:")
+        return content[start:end].strip()
+
+    def read_description(self, output_path: Path) -> str:
+        """Extract the description text back out of a module or directory description written by this class."""
+        if self.store:
+            description = self.store.get(self._output_key(output_path))
+            if description is None:
+                raise ValueError(f"No description stored for {self._output_key(output_path)}")
+            return description
+        return self._parse_description_file(output_path)
+
+    def _previous_store(self, previous_dir: Path) -> Optional[DescriptionStore]:
+        if self.store and previous_dir.resolve() == self.output_dir.resolve():
+            return self.store
+        if previous_dir not in self._previous_stores:
+            db_path = previous_dir / DescriptionStore.FILE_NAME
+            self._previous_stores[previous_dir] = DescriptionStore(db_path, read_only=True) if db_path.is_file() else None
+        return self._previous_stores[previous_dir]
+
+    def _previous_record(self, previous_dir: Path, previous_output: str) -> Optional[Dict[str, Any]]:
+        # The earlier run may have used either backend
+        store = self._previous_store(previous_dir)
+        record = store.get_record(previous_output) if store else None
+        previous_file = previous_dir / previous_output
+        if record is None and previous_file.is_file():
+            kind = "Direktori" if previous_output.startswith("direktori/") else "Modul"
+            record = {"kind": kind, "path": None, "description": self._parse_description_file(previous_file),
+                      "source_hash": None, "model": None, "created": previous_file.stat().st_mtime}
+        return record
+
+    def carry_over(self, previous_dir: Path, previous_output: str, output_path: Path) -> bool:
+        """Reuse a description from an earlier run; False when that run's description is gone.
+
+        Text files are hard-linked when the filesystem allows it.
+        """
+        previous_file = Path(previous_dir) / previous_output
+        with span("writer.carry_over", "io") as carry_span:
+            if self.store is None and previous_file.is_file():
+                if previous_file.resolve() == output_path.resolve():
+                    return True
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                if output_path.exists():
+                    output_path.unlink()
+                try:
+                    os.link(previous_file, output_path)
+                    carry_span.set(hard_linked=True)
+                except OSError:
+                    shutil.copy2(previous_file, output_path)
+                return True
+            if (self._previous_store(Path(previous_dir)) is self.store and previous_output == self._output_key(output_path)
+                    and self.store.get_record(previous_output) is not None):
+                # Updating the store in place: the row is already there
+                return True
+            try:
+                record = self._previous_record(Path(previous_dir), previous_output)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not read previous description {previous_output}: {e}")
+                return False
+            if record is None:
+                return False
+            path = record["path"] or previous_output
+            if self.store:
+                self.store.put(self._output_key(output_path), record["kind"], path, record["description"],
+                               record["source_hash"], record["model"], record["created"])
+            else:
+                self._write_description(output_path, record["kind"], Path(path), record["description"])
+            return True
+
+    def remove_description(self, output: str) -> None:
+        if self.store:
+            self.store.delete(output)
+        (self.output_dir / output).unlink(missing_ok=True)
+
+    def _description_header(self, kind: str, path: Path) -> str:
+        return description_header(kind, path)
+
+    def _description_footer(self) -> str:
+        return description_footer()
+
+    def _write_description(self, output_path: Path, kind: str, path: Path, description: str,
+                           source_hash: Optional[str] = None) -> None:
+        if self.store:
+            self.store.put(self._output_key(output_path), kind, self._source_path(path), description, source_hash,
+                           config.GROQ_MODEL)
+            return
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        self._write_file(output_path, self._description_header(kind, path) + description + self._description_footer())
+
+    @contextmanager
+    def _open_description_stream(self, output_path: Path, kind: str, path: Path,
+                                 source_hash: Optional[str] = None) -> Iterator[DescriptionStream]:
+        """Stream a description into its file; the file only replaces the target once the call succeeded."""
+        if self.store:
+            # Buffered in memory and stored once complete
+            buffer = io.StringIO()
+            yield DescriptionStream(buffer, 0)
+            self._write_description(output_path, kind, path, buffer.getvalue(), source_hash)
+            return
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temporary name: several streams may target the same file concurrently
+        fd, tmp_name = tempfile.mkstemp(dir=output_path.parent, prefix=output_path.name + ".", suffix=".tmp")
+        tmp_path = Path(tmp_name)
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                f.write(self._description_header(kind, path))
+                stream = DescriptionStream(f, f.tell())
+                yield stream
+                f.write(self._description_footer())
+            # mkstemp creates owner-only files; give them the permissions open() would have
+            os.chmod(tmp_path, 0o666 & ~_UMASK)
+            os.replace(tmp_path, output_path)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+
+    def write_module_description(self, module_path: Path, description: str, source_hash: Optional[str] = None) -> None:
+        self._write_description(self.module_output_path(module_path), "Modul", module_path, description, source_hash)
 
     def write_directory_description(self, dir_path: Path, description: str) -> None:
-        dirs_dir = self.output_dir / "direktori"
-        dirs_dir.mkdir(exist_ok=True)
-        
-        output = f"""
-Direktori: {dir_path.name}
-Path: {dir_path}
+        self._write_description(self.directory_output_path(dir_path), "Direktori", dir_path, description)
 
-Deskripsi:
-{description}
+    def open_module_stream(self, module_path: Path, source_hash: Optional[str] = None):
+        return self._open_description_stream(self.module_output_path(module_path), "Modul", module_path, source_hash)
 
-Dibuat pada: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
-"""
-        output_path = dirs_dir / f"{dir_path.name}_deskripsi.txt"
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(output) 
\ No newline at end of file
+    def open_directory_stream(self, dir_path: Path):
+        return self._open_description_stream(self.directory_output_path(dir_path), "Direktori", dir_path)
+
+    def flush(self) -> None:
+        """Wait until every description is on disk."""
+        if self.store:
+            self.store.flush()
+
+    def close(self) -> None:
+        for store in self._previous_stores.values():
+            if store:
+                store.close()
+        self._previous_stores = {}
+        if self.store:
+            self.store.close()
+            logger.info(self.store.stats())
+            self.store = None
@@ -0,0 +1,107 @@
+import json
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import config
+from scanner.file_scanner import FileScanner
+import logging
+
+logger = logging.getLogger(__name__)
+
+class RunManifest:
+    """Record of what a run saw and produced, stored as manifest.json in its output directory.
+
+    A later run compares its own scan against this record to decide which
+    modules, directories and project-level stages need to be described again.
+    """
+
+    FILE_NAME = "manifest.json"
+    VERSION = 2
+
+    def __init__(self, output_dir: Path):
+        self.output_dir = Path(output_dir)
+        self.model = config.GROQ_MODEL
+        self.files: Dict[str, Dict] = {}
+        self.modules: Dict[str, Dict] = {}
+        self.directories: Dict[str, Dict] = {}
+        self.stages: Dict[str, Dict[str, str]] = {}
+
+    @classmethod
+    def load(cls, output_dir: str) -> "RunManifest":
+        output_dir = Path(output_dir)
+        with open(output_dir / cls.FILE_NAME, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        version = data.get("version")
+        if version not in (1, cls.VERSION):
+            raise ValueError(f"Unsupported manifest version in {output_dir}: {version}")
+        manifest = cls(output_dir)
+        manifest.model = data.get("model")
+        manifest.files = data.get("files", {})
+        manifest.modules = data.get("modules", {})
+        manifest.directories = data.get("directories", {})
+        if version == 1:
+            # Version 1 did not record the project context, so its descriptions are never carried over
+            manifest.modules = {rel_path: {"output": output, "context": None}
+                                for rel_path, output in manifest.modules.items()}
+            for entry in manifest.directories.values():
+                entry["context"] = None
+        manifest.stages = data.get("stages", {})
+        return manifest
+
+    def record_files(self, file_scanner: FileScanner, files: Dict[str, List[Path]],
+                     previous: Optional["RunManifest"] = None) -> None:
+        """Hash every scanned source file, reusing previous hashes when size and mtime are unchanged."""
+        for file_type in ("python", "documentation", "config"):
+            for file in files[file_type]:
+                self.record_file(file_scanner, file, previous)
+
+    def record_file(self, file_scanner: FileScanner, file: Path, previous: Optional["RunManifest"] = None) -> None:
+        rel_path = file.relative_to(file_scanner.project_path).as_posix()
+        if rel_path in self.files:
+            return
+        try:
+            stat = file_scanner.get_file_stat(file)
+        except OSError as e:
+            logger.warning(f"Could not stat {file}: {e}")
+            return
+        old_entry = previous.files.get(rel_path) if previous else None
+        if old_entry and old_entry["size"] == stat.st_size and old_entry["mtime_ns"] == stat.st_mtime_ns:
+            file_scanner.file_hashes[file] = old_entry["hash"]
+        self.files[rel_path] = {
+            "hash": file_scanner.get_file_hash(file),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns
+        }
+
+    def module_unchanged(self, rel_path: str, previous: Optional["RunManifest"], context: str) -> bool:
+        """True when the module's source, the model and the project context are all the same as in the previous run."""
+        if not previous or previous.model != self.model:
+            return False
+        old_module = previous.modules.get(rel_path)
+        if not old_module or old_module.get("context") != context:
+            return False
+        old_entry = previous.files.get(rel_path)
+        new_entry = self.files.get(rel_path)
+        return bool(old_entry and new_entry and old_entry["hash"] == new_entry["hash"])
+
+    def directory_unchanged(self, rel_path: str, members: List[str], previous: Optional["RunManifest"],
+                            context: str) -> bool:
+        if not previous or previous.model != self.model:
+            return False
+        old_entry = previous.directories.get(rel_path)
+        return bool(old_entry and old_entry["members"] == members and old_entry.get("context") == context)
+
+    def save(self) -> Path:
+        manifest_path = self.output_dir / self.FILE_NAME
+        data = {
+            "version": self.VERSION,
+            "created": datetime.now().isoformat(timespec='seconds'),
+            "model": self.model,
+            "files": self.files,
+            "modules": self.modules,
+            "directories": self.directories,
+            "stages": self.stages
+        }
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return manifest_path
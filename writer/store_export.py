@@ -0,0 +1,71 @@
+import argparse
+from datetime import datetime
+from pathlib import Path
+from writer.description_store import DescriptionStore
+from writer.output_writer import description_footer, description_header
+import logging
+
+logger = logging.getLogger(__name__)
+
+def export_text(store: DescriptionStore, output_dir: Path) -> int:
+    """Write every module and directory description as the text file a run without the store would have written."""
+    count = 0
+    for record in store.records():
+        if record["kind"] == "Proyek":
+            # The analysis file is always written as text
+            continue
+        output_path = Path(output_dir) / record["output"]
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(description_header(record["kind"], Path(record["path"])) + record["description"]
+                               + description_footer(datetime.fromtimestamp(record["updated"])), encoding='utf-8')
+        count += 1
+    return count
+
+def export_markdown(store: DescriptionStore, output_path: Path) -> int:
+    """Render the whole store as one Markdown document: the analysis, then directories and modules in path order."""
+    sections = []
+    count = 0
+    for kind, heading in (("Proyek", None), ("Direktori", "Direktori"), ("Modul", "Modul")):
+        records = list(store.records(kind))
+        if not records:
+            continue
+        if heading:
+            sections.append(f"## {heading}")
+        for record in records:
+            updated = datetime.fromtimestamp(record["updated"]).strftime('%Y-%m-%d %H:%M:%S')
+            title = f"# Analisis proyek {record['path']}" if kind == "Proyek" else f"### `{record['path']}`"
+            sections.append(f"{title}\n\n{record['description'].strip()}\n\n"
+                            f"_Model: {record['model'] or '-'}, diperbarui: {updated}_")
+            count += 1
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    output_path.write_text("\n\n".join(sections) + "\n", encoding='utf-8')
+    return count
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description='Export the descriptions of an --output-store run as text or Markdown.')
+    parser.add_argument('output_dir', type=str, help=f'Output directory holding {DescriptionStore.FILE_NAME}')
+    parser.add_argument('--format', choices=('text', 'markdown'), default='text',
+                        help='text: one file per description as without the store; markdown: a single document')
+    parser.add_argument('--to', type=str,
+                        help='Target directory (text) or file (markdown); default: the output directory / deskripsi.md')
+    args = parser.parse_args()
+    db_path = Path(args.output_dir) / DescriptionStore.FILE_NAME
+    if not db_path.is_file():
+        logger.error(f"No description store at {db_path}")
+        return
+    store = DescriptionStore(db_path, read_only=True)
+    try:
+        if args.format == 'markdown':
+            target = Path(args.to) if args.to else Path(args.output_dir) / "deskripsi.md"
+            count = export_markdown(store, target)
+        else:
+            target = Path(args.to) if args.to else Path(args.output_dir)
+            count = export_text(store, target)
+    finally:
+        store.close()
+    logger.info(f"Exported {count} descriptions to {target}")
+
+if __name__ == "__main__":
+    main()